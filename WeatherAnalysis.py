@@ -3,26 +3,49 @@
 
 # In[1]:
 
-import pandas as pd
+import importlib.machinery
+
+# Worker processes import __main__ again unless it has a spec, see epwviz.workers.process_pool
+__spec__ = importlib.machinery.ModuleSpec('__main__', None)
+
 import numpy as np
-import io
 
 import streamlit as st
 from ladybug.epw import EPW
 import pathlib
-import plotly.graph_objects as go
-import ladybug_comfort.ts as ts
 from plotly.graph_objects import Figure
-from typing import List, Tuple
+from typing import Callable, List, Tuple
 
 from ladybug.datacollection import HourlyContinuousCollection
-from ladybug.epw import EPWFields
-from ladybug.header import Header
-from ladybug.color import Colorset, Color
-from ladybug.legend import LegendParameters
-from ladybug.hourlyplot import HourlyPlot
 from ladybug.analysisperiod import AnalysisPeriod
 
+from epwviz.analysis import (COLORSETS, DERIVED_PSYCHROMETRICS, FIELDS, PMV_SWEEP_PARAMETERS, REPORT_FIGURES,
+                             REPORT_SECTIONS, ReportParameters, colorset_colors, comparison_analysis,
+                             conditional_analysis, degree_days_analysis, derived_psychrometrics_analysis,
+                             line_plot_figure, pair_plot_figure, periodic_analysis, pmv_chart, pmv_sweep_figures,
+                             pmv_sweep_parameters, psychrometric_chart, psychrometric_point, report_context,
+                             strategy_label_figure, sunpath, temperature_bins_analysis,
+                             thermal_sensation_analysis, windrose_figures)
+from epwviz.cache import EPWCache, content_hash
+from epwviz.compare import load_stores, summarize_stores
+from epwviz.conditions import Threshold
+from epwviz.degreedays import DegreeDayEngine
+from epwviz.downsample import DEFAULT_POINTS
+from epwviz.store import EPWStore
+from epwviz.export import FigureExporter
+from epwviz.histogram import (Distribution, JointDistribution, bin_edges,
+                              store_histogram, store_joint_histogram)
+from epwviz.instrumentation import (DEFAULT_ENABLED, METRICS_FILE, Metrics, Recorder, activate,
+                                    instrument_cache, lap, measure)
+from epwviz.pmv import PMVSweep, pmv_sweep
+from epwviz.report import ReportBuilder
+from epwviz.psychrometrics import Psychrometrics, store_psychrometrics
+from epwviz.sections import SectionRegistry, fingerprint
+from epwviz.solar import SolarTable, open_solar_table
+from epwviz.stats import EPWStatistics
+from epwviz.thermal import ThermalSensation, store_thermal_sensation
+from epwviz.uploads import epw_from_bytes, evict_stale_files
+from epwviz.windrose import WindRoseEngine
 
 
 st.set_page_config(page_title='EPW Vizualiser Toolkit', layout='wide')
@@ -50,81 +73,92 @@ with st.sidebar:
     # st.write('Source codes: Ladybug Tools Core SDK Documentation')
 #st.sidebar.image('https://www.ceros.com/wp-content/uploads/2019/04/Stantec_Logo.png',use_column_width='auto',output_format='PNG')
 
-# Loading colorsets used in Legend Parameters
-#---------------------------------------------------------------------------------
-colorsets = {
-    'original': Colorset.original(),
-    'nuanced': Colorset.nuanced(),
-    'annual_comfort': Colorset.annual_comfort(),
-    'benefit': Colorset.benefit(),
-    'benefit_harm': Colorset.benefit_harm(),
-    'black_to_white': Colorset.black_to_white(),
-    'blue_green_red': Colorset.blue_green_red(),
-    'cloud_cover': Colorset.cloud_cover(),
-    'cold_sensation': Colorset.cold_sensation(),
-    'ecotect': Colorset.ecotect(),
-    'energy_balance': Colorset.energy_balance(),
-    'energy_balance_storage': Colorset.energy_balance_storage(),
-    'glare_study': Colorset.glare_study(),
-    'harm': Colorset.harm(),
-    'heat_sensation': Colorset.heat_sensation(),
-    'multi_colored': Colorset.multi_colored(),
-    'multicolored_2': Colorset.multicolored_2(),
-    'multicolored_3': Colorset.multicolored_3(),
-    'openstudio_palette': Colorset.openstudio_palette(),
-    'peak_load_balance': Colorset.peak_load_balance(),
-    'shade_benefit': Colorset.shade_benefit(),
-    'shade_benefit_harm': Colorset.shade_benefit_harm(),
-    'shade_harm': Colorset.shade_harm(),
-    'shadow_study': Colorset.shadow_study(),
-    'therm': Colorset.therm(),
-    'thermal_comfort': Colorset.thermal_comfort(),
-    'view_study': Colorset.view_study()
-}
+# Instrumentation - opt-in timings, cache hits and memory of every rerun
+#------------------------------------------------------------------------------
 
-# A function to derive the color code when selected in Streamlit
+@st.cache_resource
+def get_metrics() -> Metrics:
+    """Get the totals of the instrumented reruns of every session."""
+    return Metrics()
+
+# the checkbox is drawn with the panel at the end of the sidebar, its value is read first
+# so that the whole rerun is measured
+instrumented = st.session_state.get('instrumented', DEFAULT_ENABLED)
+# a rerun interrupted by a widget change never reached the end of the script, finish its recorder
+# so that memory tracing stops once no rerun is measured
+previous_recorder = st.session_state.pop('recorder', None)
+if previous_recorder is not None and not previous_recorder.finished:
+    previous_recorder.finish()
+recorder = Recorder() if instrumented else None
+if recorder is not None:
+    st.session_state['recorder'] = recorder
+activate(recorder)
+
+# Shared EPW cache - one parsed EPW per distinct file across all sessions
 #------------------------------------------------------------------------------
 
-@st.cache_data(ttl=2)
-def get_colors(switch: bool, global_colorset: str) -> List[Color]:
-    """Get switched colorset if requested.
+@instrument_cache(st.cache_resource)
+def get_epw_cache() -> EPWCache:
+    """Get the process-wide cache of parsed EPW objects."""
+    return EPWCache()
+
+def load_epw(epw_bytes: bytes) -> Tuple[EPW, str]:
+    """Get the parsed EPW for the given file content from the shared cache.
     Args:
-        switch: Boolean to switch colorset.
-        global_colorset: Global colorset to use.
+        epw_bytes: Raw content of the EPW file.
     Returns:
-        List of colors.
+        A tuple with the loaded EPW object and the SHA-256 of its content.
     """
+    epw_hash = content_hash(epw_bytes)
+    return get_epw_cache().get(epw_hash, lambda: epw_from_bytes(epw_bytes)), epw_hash
 
-    if switch:
-        colors = list(colorsets[global_colorset])
-        colors.reverse()
-    else:
-        colors = colorsets[global_colorset]
-    return colors
+@instrument_cache(st.cache_resource(max_entries=32))
+def get_epw_store(epw_hash: str, _epw_bytes: bytes) -> EPWStore:
+    """Get the columnar store of an EPW file, memory-mapped from ./data.
+    Args:
+        epw_hash: SHA-256 of the EPW file content.
+        _epw_bytes: Raw content of the EPW file, parsed only if no sidecar exists.
+    Returns:
+        An EPWStore object.
+    """
+    epw_store = EPWStore.open(_epw_bytes, epw_hash)
+    evict_stale_files(keep=[epw_hash])
+    return epw_store
 
-# Define a function to extract the epw variable from the class
-#------------------------------------------------------------------------------
-@st.cache_data(ttl=2)
-def get_fields() -> dict:
-    # A dictionary of EPW variable name to its corresponding field number
-    return {EPWFields._fields[i]['name'].name: i for i in range(6, 23)}
+@instrument_cache(st.cache_resource(max_entries=32))
+def get_epw_statistics(epw_hash: str, _store: EPWStore) -> EPWStatistics:
+    """Get the monthly and annual statistics of every field of an EPW file, persisted in ./data.
+    Args:
+        epw_hash: SHA-256 of the EPW file content.
+        _store: Columnar store of the EPW file.
+    Returns:
+        An EPWStatistics object.
+    """
+    return EPWStatistics.open(_store)
 
 # Uploading EPW file
 #------------------------------------------------------------------------------
+lap('sidebar')
 
 with st.sidebar:
     # epw file #####################################################################
     with st.expander('Upload EPW file'):
         epw_data = st.file_uploader('', type='epw')
         if epw_data:
-            epw_file = pathlib.Path(f'./data/{epw_data.name}')
-            epw_file.parent.mkdir(parents=True, exist_ok=True)
-            epw_file.write_bytes(epw_data.read())
+            epw_bytes = epw_data.getvalue()
         else:
-            epw_file = './assets/sample.epw'
-            # epw_file = './app/assets/sample.epw' 
-        global_epw = EPW(epw_file)
-    
+            epw_bytes = pathlib.Path('./assets/sample.epw').read_bytes()
+            # epw_bytes = pathlib.Path('./app/assets/sample.epw').read_bytes()
+        global_epw, epw_hash = load_epw(epw_bytes)
+        epw_store = get_epw_store(epw_hash, epw_bytes)
+        epw_statistics = get_epw_statistics(epw_hash, epw_store)
+    
+    with st.expander('Compare EPW files'):
+        compare_files = st.file_uploader('EPW files compared with the one above', type='epw',
+                                         accept_multiple_files=True, key='compare_files')
+        compare_selected = st.selectbox('Monthly mean differences of', options=FIELDS.keys(),
+                                        key='compare_selected')
+
     data_unit = st.radio("Metric:", options= ['SI','IP'], key = 'units',horizontal = True)
 
     st.markdown('---')
@@ -135,12 +169,36 @@ with st.sidebar:
 
 with st.sidebar:
     with st.expander('Global colorset'):
-        global_colorset = st.selectbox('', list(colorsets.keys()))
+        global_colorset = st.selectbox('', list(COLORSETS.keys()))
+
+# Dashboard sections - computed only when displayed (or reported) and their inputs change
+#------------------------------------------------------------------------------
+
+SECTION_TITLES = {
+    'periodic': 'Periodic Weather Data Analysis',
+    'derived_psychrometrics': 'Derived Psychrometrics',
+    'conditional': 'Conditional Analysis',
+    'thermal_sensation': 'Thermal Sensation',
+    'psychrometric': 'Psychrometric Chart',
+    'windrose': 'Wind Rose',
+    'sunpath': 'Sunpath Diagram',
+    'degree_days': 'Degree Days',
+    'temperature_bins': 'Distributed Temperature Plot',
+    'pair_plots': 'Monthly Density Pair Plots',
+    'comparison': 'EPW Comparison',
+}
+
+sections = SectionRegistry(SECTION_TITLES, st.session_state)
+
+with st.sidebar:
+    with st.expander('Dashboard sections'):
+        visible_titles = st.multiselect('Sections to display', options=list(SECTION_TITLES.values()),
+                                        default=list(SECTION_TITLES.values()), key='visible_sections')
+        sections.set_visible([name for name, title in SECTION_TITLES.items() if title in visible_titles])
 
-# Converting to IP
+# Converting to IP - fields are converted by EPWStore through epwviz.units
 #------------------------------------------------------------------------------
         
-fields = get_fields()
 
 if data_unit == 'SI':
     use_ip_bool = False
@@ -149,70 +207,17 @@ elif data_unit == 'IP':
     use_ip_bool = True
     unit = 'F'
 
-def SI_IP_Check(data: HourlyContinuousCollection):
-    
-    data_IP = data.duplicate()
-
-    _wea_data_ip = []
-
-    if data_unit == 'IP':
-        
-        for hr in range (0,8760):
-            if data.header.data_type.name == 'Dry Bulb Temperature' or data.header.data_type.name == 'Dew Point Temperature': #C > F
-                ip_values = (data.values[hr] * ( 9 / 5)) + 32
-                data_IP._header._unit = 'F'
-                
-            elif data.header.data_type.name == 'Relative Humidity': #%
-                ip_values = data.values[hr]
-                data_IP._header._unit = '%'
-
-            elif data.header.data_type.name == 'Atmospheric Station Pressure': #Pa > inHg
-                ip_values = data.values[hr] * 0.0002953
-                data_IP._header._unit = 'inHg'
-        
-            elif data.header.data_type.name == 'Extraterrestrial Horizontal Radiation' or data.header.data_type.name == 'Extraterrestrial Direct Normal Radiation' or data.header.data_type.name == 'Global Horizontal Radiation' or data.header.data_type.name == 'Direct Normal Radiation' or data.header.data_type.name == 'Diffuse Horizontal Radiation': #Wh/m2 > kWh_m2
-                ip_values = data.values[hr] * 3.15459
-                data_IP._header._unit = 'kBtu/ft2'
-        
-            elif data.header.data_type == 'Horizontal Infrared Radiation Intensity': #W/m2 > Btu_hft2
-                ip_values = data.values[hr] * 0.317
-                data_IP._header._unit = 'Btu/ft2'
-
-            elif data.header.data_type.name == 'Global Horizontal Illuminance' or data.header.data_type.name == 'Diffuse Horizontal Illuminance' or data.header.data_type.name == 'Direct Normal Illuminance'or data.header.data_type.name =='Zenith Luminance': #lux > fc or cd/m2 > cd/ft2
-                ip_values = data.values[hr] / 10.7639
-                data_IP._header._unit = 'cd/ft2'
-
-            elif data.header.data_type.name == 'Wind Direction': #degrees
-                ip_values = data.values[hr]
-                data_IP._header._unit = 'degrees'
-
-            elif data.header.data_type.name == 'Wind Speed': #m/s > mph
-                ip_values = data.values[hr] * 2.23694
-                data_IP._header._unit = 'mph'
-            
-            elif data.header.data_type.name == 'Total Sky Cover': #tenths
-                ip_values = data.values[hr]
-                data_IP._header._unit = 'tenths'
-
-            _wea_data_ip.append(ip_values)
-
-        data_IP.values = _wea_data_ip
-    
-    return data_IP
-
-
 # PeriodicAnalysis
 #------------------------------------------------------------------------------
+lap('periodic')
 
 with st.sidebar:
     # A dictionary of EPW variable name to its corresponding field number
     
     with st.expander('Periodic analysis'):
 
-        hourly_selected = st.selectbox('Which variable to plot?',options=fields.keys())
-        _wea_var = global_epw.import_data_by_field(fields[hourly_selected])
-
-        _wea_data = SI_IP_Check(_wea_var)
+        hourly_selected = st.selectbox('Which variable to plot?',options=FIELDS.keys())
+        _wea_data = epw_store.to_collection(FIELDS[hourly_selected], data_unit)
 
 
         if data_unit == 'IP':
@@ -259,59 +264,68 @@ with st.sidebar:
             hourly_data_st_hour = None
             hourly_data_end_hour = None
 
+            year_days = -(-len(epw_store) // (24 * epw_store.timestep))
+            line_days = st.slider('Visible days', min_value=1, max_value=year_days, value=(1, year_days),
+                                  key='line_days', help='Narrow the range down to see every value of the file')
+            line_points = st.number_input('Chart width (px)', min_value=200, max_value=8000, value=DEFAULT_POINTS,
+                                          step=100, key='line_points',
+                                          help='The values are downsampled to about one per pixel')
+
+        st.subheader('Derived Psychrometrics')
+
+        derived_selected = st.multiselect('Hourly psychrometric heatmaps', options=list(DERIVED_PSYCHROMETRICS),
+                                          key='derived_selected',
+                                          help='Derived from the dry bulb temperature and relative humidity of every hour')
+        derived_fast = st.checkbox('Interpolate wet bulb temperatures', value=False, key='derived_fast',
+                                   help='Read wet bulb temperatures from a precomputed table instead of solving for each hour: within 0.05°C, up to 0.75°C for wet bulb temperatures near 0°C')
+
         st.subheader('Conditional Analysis')
     
         st.markdown(':red[**Min/Max Thresholds**]')
 
-        min_value = _wea_data.bounds[0]
-        max_value = _wea_data.bounds[1]
+        hourly_statistics = epw_statistics.annual(FIELDS[hourly_selected], data_unit)
+        min_value = hourly_statistics['min']
+        max_value = hourly_statistics['max']
       
         threshold_min = st.number_input('Minimum {}'.format(hourly_selected), value = min_value, step=None)
         threshold_max = st.number_input('Maximum {}'.format(hourly_selected), value = max_value, step=None)
 
-# @st.cache_data(ttl=2)
-def get_hourly_data_figure(data_type:str,
-        _wea_data: HourlyContinuousCollection, global_colorset: str,st_month: int, st_day: int, st_hour: int, end_month: int,
-        end_day: int, end_hour: int) -> Figure:
-    """Create heatmap from hourly data.
-    Args:
-        data: HourlyContinuousCollection object.
-        global_colorset: A string representing the name of a Colorset.
-        conditional_statement: A string representing a conditional statement.
-        min: A string representing the lower bound of the data range.
-        max: A string representing the upper bound of the data range.
-        st_month: start month.
-        st_day: start day.
-        st_hour: start hour.
-        end_month: end month.
-        end_day: end day.
-        end_hour: end hour.
-    Returns:
-        A plotly figure.
-    """
-    lb_lp = LegendParameters(colors=colorsets[global_colorset])
-    
-    lb_ap = AnalysisPeriod(st_month, st_day, st_hour, end_month, end_day, end_hour)
-
-    colors = colorsets[global_colorset] 
+        condition_fields = st.multiselect('Combine with', options=[name for name in FIELDS if name != hourly_selected],
+                                          key='condition_fields',
+                                          help='Only count the hours where these variables are within their thresholds too')
+        conditions = [Threshold(FIELDS[hourly_selected], threshold_min, threshold_max)]
+        for condition_field in condition_fields:
+            condition_statistics = epw_statistics.annual(FIELDS[condition_field], data_unit)
+            condition_unit = epw_store.unit(FIELDS[condition_field], data_unit)
+            conditions.append(Threshold(
+                FIELDS[condition_field],
+                st.number_input(f'Minimum {condition_field} ({condition_unit})',
+                                value=condition_statistics['min'], step=None),
+                st.number_input(f'Maximum {condition_field} ({condition_unit})',
+                                value=condition_statistics['max'], step=None)))
+
+@sections.register('periodic')
+def compute_periodic(epw_hash: str, data_unit: str, hourly_selected: str, global_colorset: str,
+                     st_month: int, st_day: int, st_hour: int, end_month: int, end_day: int,
+                     end_hour: int, _wea_data: HourlyContinuousCollection,
+                     _statistics: EPWStatistics) -> dict:
+    """Compute the figures and statistics of the periodic analysis section."""
+    return periodic_analysis(_wea_data, COLORSETS[global_colorset],
+                             (st_month, st_day, st_hour, end_month, end_day, end_hour),
+                             _statistics.annual(FIELDS[hourly_selected], data_unit))
+
+sections.bind('periodic', epw_hash=epw_hash, data_unit=data_unit, hourly_selected=hourly_selected,
+              global_colorset=global_colorset, st_month=hourly_data_st_month, st_day=hourly_data_st_day,
+              st_hour=hourly_data_st_hour, end_month=hourly_data_end_month, end_day=hourly_data_end_day,
+              end_hour=hourly_data_end_hour, _wea_data=_wea_data, _statistics=epw_statistics)
+
+@instrument_cache(st.cache_data(max_entries=32))
+def get_line_plot(epw_hash: str, field: int, data_unit: str, global_colorset: str, days: Tuple[int, int],
+                  points: int, _store: EPWStore) -> Figure:
+    """Get the downsampled WebGL line of a field within a range of days."""
+    return line_plot_figure(_store, field, data_unit, COLORSETS[global_colorset], days, points)
 
-    if data_type == 'Hourly Plot':
-        hourly_data = _wea_data.filter_by_analysis_period(lb_ap)
-        hourly_plot = HourlyPlot(hourly_data, legend_parameters=lb_lp)
-        
-        return hourly_plot.plot(title=str(_wea_data.header.data_type), show_title=True)
-    
-    elif data_type == 'Mean Daily Plot':
-        return _wea_data.diurnal_average_chart(
-            title=_wea_data.header.data_type.name, show_title=True,color=colors[-1])
-    
-    elif data_type == 'Line Plot':
-        return _wea_data.line_chart(title=_wea_data.header.data_type.name,show_title=True,color=colors[-1])
-    
 with st.container():
-    Hourly_figure = get_hourly_data_figure(data_plot_radio,_wea_data,global_colorset, hourly_data_st_month, hourly_data_st_day,
-                    hourly_data_st_hour, hourly_data_end_month, hourly_data_end_day,
-                    hourly_data_end_hour)
     
     st.header('Climate Summary')
     
@@ -327,208 +341,179 @@ with st.container():
         st.metric('ASHRAE Climate Zone', cz)
     
     with col4:
-        ave_dbt = round(SI_IP_Check(global_epw.dry_bulb_temperature).average,2)
+        ave_dbt = round(epw_statistics.value(FIELDS['Dry Bulb Temperature'], 'mean', data_unit),2)
         st.metric('Average Yearly Outdoor Dry Bulb Temperature:', f'{ave_dbt}{temp_unit}')
     
     with col5:
         ""
     st.markdown('---')
     
-    st.write("""
-    # Periodic Weather Data Analysis
-             
-    ***
-    """)
-    st.plotly_chart(Hourly_figure, use_container_width=True)
-
-#Saving images
-
-Hourly_figure_image = get_hourly_data_figure('Hourly Plot',_wea_data,global_colorset, hourly_data_st_month, hourly_data_st_day,
-                hourly_data_st_hour, hourly_data_end_month, hourly_data_end_day,
-                hourly_data_end_hour)
-Daily_figure_image = get_hourly_data_figure('Mean Daily Plot',_wea_data,global_colorset, hourly_data_st_month, hourly_data_st_day,
-                hourly_data_st_hour, hourly_data_end_month, hourly_data_end_day,
-                hourly_data_end_hour)
-Line_figure_image = get_hourly_data_figure('Line Plot',_wea_data,global_colorset, hourly_data_st_month, hourly_data_st_day,
-                hourly_data_st_hour, hourly_data_end_month, hourly_data_end_day,
-                hourly_data_end_hour)
-
-Hourly_figure_image.write_image("hourly_data.png")
-Daily_figure_image.write_image("Daily_data.png")
-Line_figure_image.write_image("Line_data.png")
-
-
-#statistics
-from statistics import mean
-ave_val = round(mean(_wea_data._values),2)
-
+    if sections.is_visible('periodic'):
+        st.write("""
+        # Periodic Weather Data Analysis
+                 
+        ***
+        """)
+        if data_plot_radio == 'Line Plot':
+            # every value of the visible days, drawn with WebGL instead of the daily ranges of the report
+            Hourly_figure = get_line_plot(epw_hash, FIELDS[hourly_selected], data_unit, global_colorset,
+                                          line_days, line_points, epw_store)
+        else:
+            Hourly_figure = sections.result('periodic')['figures'][data_plot_radio]
+        st.plotly_chart(Hourly_figure, use_container_width=True)
+
+
+@instrument_cache(st.cache_data(max_entries=16))
+def get_psychrometrics(epw_hash: str, fast: bool, _store: EPWStore) -> Psychrometrics:
+    """Get the derived psychrometric properties of every hour of an EPW file."""
+    return store_psychrometrics(_store, fast=fast)
+
+@sections.register('derived_psychrometrics')
+def compute_derived_psychrometrics(epw_hash: str, data_unit: str, derived_selected: list, derived_fast: bool,
+                                   global_colorset: str, st_month: int, st_day: int, st_hour: int,
+                                   end_month: int, end_day: int, end_hour: int, _store: EPWStore) -> dict:
+    """Compute the heatmaps of the selected derived psychrometric variables."""
+    if not derived_selected:
+        return {'figures': {}}
+    # the Mean Daily and Line plots have no period, the whole year is shown
+    return derived_psychrometrics_analysis(get_psychrometrics(epw_hash, derived_fast, _store), _store,
+                                           derived_selected, data_unit, COLORSETS[global_colorset],
+                                           (st_month, st_day, st_hour, end_month, end_day, end_hour))
+
+sections.bind('derived_psychrometrics', epw_hash=epw_hash, data_unit=data_unit,
+              derived_selected=derived_selected, derived_fast=derived_fast, global_colorset=global_colorset,
+              st_month=hourly_data_st_month, st_day=hourly_data_st_day, st_hour=hourly_data_st_hour,
+              end_month=hourly_data_end_month, end_day=hourly_data_end_day, end_hour=hourly_data_end_hour,
+              _store=epw_store)
+
+if sections.is_visible('derived_psychrometrics') and derived_selected:
+    with st.container():
+        st.write("""
+        # Derived Psychrometrics
+                 
+        ***
+        """)
+        for derived_figure in sections.result('derived_psychrometrics')['figures'].values():
+            st.plotly_chart(derived_figure, use_container_width=True)
 
 
 # CONDITIONAL HOURLY PLOTS
 #------------------------------------------------------------------------------
+lap('conditional')
 
-        
-@st.cache_data(ttl=2)
-def get_hourly_data_figure_conditional(_hourly_data: HourlyContinuousCollection, global_colorset: str,st_month: int, st_day: int, st_hour: int, end_month: int,
-        end_day: int, end_hour: int) -> Figure:
-    """Create heatmap from hourly data.
-    Args:
-        data: HourlyContinuousCollection object.
-        global_colorset: A string representing the name of a Colorset.
-        conditional_statement: A string representing a conditional statement.
-        min: A string representing the lower bound of the data range.
-        max: A string representing the upper bound of the data range.
-        st_month: start month.
-        st_day: start day.
-        st_hour: start hour.
-        end_month: end month.
-        end_day: end day.
-        end_hour: end hour.
-    Returns:
-        A plotly figure.
-    """
-    lb_lp = LegendParameters(colors=colorsets[global_colorset])
-    
-    lb_ap = AnalysisPeriod(st_month, st_day, st_hour, end_month, end_day, end_hour)
-    
-    filtered_hourly_data = _hourly_data.filter_by_analysis_period(lb_ap)
 
-           
-    hourly_plot = HourlyPlot(filtered_hourly_data, legend_parameters=lb_lp)
+@sections.register('conditional')
+def compute_conditional(epw_hash: str, data_unit: str, global_colorset: str, st_month: int, st_day: int,
+                        st_hour: int, end_month: int, end_day: int, end_hour: int, conditions: tuple,
+                        _store: EPWStore) -> dict:
+    """Compute the figures, met/unmet hours and met hour tables of the conditional analysis section."""
+    return conditional_analysis(_store, data_unit, COLORSETS[global_colorset],
+                                (st_month, st_day, st_hour, end_month, end_day, end_hour), conditions)
 
-    return hourly_plot.plot(title=str(filtered_hourly_data.header.data_type), show_title=True)
+sections.bind('conditional', epw_hash=epw_hash, data_unit=data_unit, global_colorset=global_colorset,
+              st_month=hourly_data_st_month, st_day=hourly_data_st_day, st_hour=hourly_data_st_hour,
+              end_month=hourly_data_end_month, end_day=hourly_data_end_day, end_hour=hourly_data_end_hour,
+              conditions=tuple(conditions), _store=epw_store)
 
-st.subheader('_Applied Thresholds_')
-st.markdown('Please choose the thresholds from the min/max sliders on the left to plot the filtered data below:')
+if sections.is_visible('conditional'):
+    st.subheader('_Applied Thresholds_')
+    st.markdown('Please choose the thresholds from the min/max sliders on the left to plot the filtered data below:')
 
-with st.container():
-    
-    filtered_hourly_data= _wea_data.filter_by_analysis_period(AnalysisPeriod(hourly_data_st_month,hourly_data_st_day,hourly_data_st_hour,hourly_data_end_month,hourly_data_end_day,hourly_data_end_hour))
-    
-    data_work_hours = filtered_hourly_data.filter_by_conditional_statement('a>={} and a<={}'.format(threshold_min,threshold_max))
-    
-    Hourly_conditional_figure = get_hourly_data_figure_conditional(data_work_hours,global_colorset, hourly_data_st_month, hourly_data_st_day,
-                    hourly_data_st_hour, hourly_data_end_month, hourly_data_end_day,
-                    hourly_data_end_hour)
-    st.plotly_chart(Hourly_conditional_figure, use_container_width=True)
-    
-    
-    met_num_hours = len(data_work_hours)
-    unmet_num_hours = len(filtered_hourly_data)-len(data_work_hours)
-    
-    col1,col2 = st.columns(2)
-    with col1:
-        st.metric(':blue[**Met hours for the selected {} thresholds:**]'.format(hourly_selected), value = met_num_hours)
-    with col2:
-        st.metric(':red[**Unmet hours for the selected {} thresholds:**]'.format(hourly_selected), value = unmet_num_hours)
+    with st.container():
+        
+        conditional = sections.result('conditional')
+        st.plotly_chart(conditional['figure'], use_container_width=True)
+        
+        col1,col2 = st.columns(2)
+        with col1:
+            st.metric(':blue[**Met hours for the selected {} thresholds:**]'.format(', '.join([hourly_selected, *condition_fields])), value = conditional['met_num_hours'])
+        with col2:
+            st.metric(':red[**Unmet hours for the selected {} thresholds:**]'.format(', '.join([hourly_selected, *condition_fields])), value = conditional['unmet_num_hours'])
 
-Hourly_conditional_figure.write_image("conditional_hourly_data.png")
-   
-st.markdown('---')
+        st.plotly_chart(conditional['mask_figure'], use_container_width=True)
 
+        col1,col2 = st.columns(2)
+        with col1:
+            st.markdown('**Met hours by month**')
+            st.dataframe(conditional['monthly'], use_container_width=True)
+        with col2:
+            st.markdown('**Met hours by hour of the day**')
+            st.dataframe(conditional['hourly'], use_container_width=True)
+       
+    st.markdown('---')
 
-st.write("""
-# Thermal Sensation
-         
-***
-""")
 
 # Thermal Sensation
 #------------------------------------------------------------------------------
+lap('thermal_sensation')
 
-def get_ts(
-        _epw: EPW, global_colorset: str) -> Figure:
-    
-    lb_lp = LegendParameters(colors=colorsets[global_colorset], title = 'TS Catergory', )
-    
+@instrument_cache(st.cache_data)
+def get_thermal_sensation(epw_hash: str, _store: EPWStore) -> ThermalSensation:
+    """Compute the thermal sensation of every hour once per EPW file."""
+    return store_thermal_sensation(_store)
 
-    ts_ta = _epw.dry_bulb_temperature
+@sections.register('thermal_sensation')
+def compute_thermal_sensation(epw_hash: str, global_colorset: str, _store: EPWStore) -> dict:
+    """Compute the figures and category shares of the thermal sensation section."""
+    return thermal_sensation_analysis(_store, get_thermal_sensation(epw_hash, _store),
+                                      COLORSETS[global_colorset])
 
-    ts_vel = _epw.wind_speed
-    
-    ts_rh = _epw.relative_humidity
+sections.bind('thermal_sensation', epw_hash=epw_hash, global_colorset=global_colorset, _store=epw_store)
 
-    ts_sr = _epw.global_horizontal_radiation
+if sections.is_visible('thermal_sensation'):
 
-    ts_data = []
-    
-    condition_data = {'comfort': [],'hot': [],'quitehot':[],  'veryhot': [],
-                    'cold': [], 'quitecold':[],'verycold':[]}
+    st.write("""
+    # Thermal Sensation
+             
+    ***
+    """)
 
+    thermal_sensation = sections.result('thermal_sensation')
+    condition_data = thermal_sensation['condition_data']
 
-    for i in range(len(ts_sr.values)):
-        ts_ = ts.thermal_sensation_effect_category(ts.thermal_sensation(ts_ta.values[i], ts_vel.values[i], ts_rh.values[i], ts_sr.values[i], 20))
-        ts_data.append(ts_)
+    with st.container():
+        st.plotly_chart(thermal_sensation['figure'], use_container_width=True)
 
-    condition_data['comfort'] = round((ts_data.count(0)/8760)*100,2)
-    condition_data['hot'] = round((ts_data.count(1)/8760)*100,2)
-    condition_data['quitehot'] = round((ts_data.count(2)/8760)*100,2)
-    condition_data['veryhot'] = round((ts_data.count(3)/8760)*100,2)
-    condition_data['cold'] = round((ts_data.count(-1)/8760)*100,2)
-    condition_data['quitecold'] = round((ts_data.count(-2)/8760)*100,2)
-    condition_data['verycold'] = round((ts_data.count(-3)/8760)*100,2)
-    
+    cols = st.columns(9)
+    with cols[0]:
+        ""
+    with cols[1]:
+        status = condition_data['verycold']
+        st.metric(":blue[**Very Cold [-3]**]", f'{status}%')
+    with cols[2]:
+        status = condition_data['quitecold']
+        st.metric(":blue[**Quite Cold**]", f'{status}%')
+    with cols[3]:
+        status = condition_data['cold']
+        st.metric(":blue[**Cold**]", f'{status}%')
+    with cols[4]:
+        status = condition_data['comfort']
+        st.metric("[**Comfort**]", f'{status}%')
+    with cols[5]:
+        status = condition_data['hot']
+        st.metric(":red[**Hot**]", f'{status}%')
+    with cols[6]:
+        status = condition_data['quitehot']
+        st.metric(":red[**Quite Hot**]", f'{status}%')
+    with cols[7]:
+        status = condition_data['veryhot']
+        st.metric(":red[**Very Hot**]", f'{status}%')
+    with cols[8]:
+        ""
 
-    ts_header = Header.from_dict({"data_type": {"name":"Thermal Sensation", "data_type": 'ThermalConditionSevenPoint',"type":'DataType'},  "unit": "condition", "analysis_period": {
-        "st_month":1,"st_day":1,"st_hour":0,"end_month":12,"end_day":31,"end_hour":23,"timestep":1,
-    },  "metadata": {}})
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown('**Monthly thermal sensation**')
+        st.plotly_chart(thermal_sensation['monthly_figure'], use_container_width=True)
+    with col2:
+        st.markdown('**Hour of the day thermal sensation**')
+        st.plotly_chart(thermal_sensation['hourly_figure'], use_container_width=True)
 
-    ts_data = HourlyContinuousCollection(ts_header,ts_data)
-    
-    ts_plot = HourlyPlot(ts_data, legend_parameters=lb_lp)
-    
-    return ts_plot.plot(title='Thermal Sensation', show_title=True),condition_data
-    
-    
-with st.container():
-    TS_figure = get_ts(global_epw,global_colorset)[0]
-
-    st.plotly_chart(TS_figure, use_container_width=True)
-
-cols = st.columns(9)
-with cols[0]:
-    ""
-with cols[1]:
-    status = get_ts(global_epw,global_colorset)[1]['verycold']
-    st.metric(":blue[**Very Cold [-3]**]", f'{status}%')
-with cols[2]:
-    status = get_ts(global_epw,global_colorset)[1]['quitecold']
-    st.metric(":blue[**Quite Cold**]", f'{status}%')
-with cols[3]:
-    status = get_ts(global_epw,global_colorset)[1]['verycold']
-    st.metric(":blue[**Cold**]", f'{status}%')
-with cols[4]:
-    status = get_ts(global_epw,global_colorset)[1]['comfort']
-    st.metric("[**Comfort**]", f'{status}%')
-with cols[5]:
-    status = get_ts(global_epw,global_colorset)[1]['hot']
-    st.metric(":red[**Hot**]", f'{status}%')
-with cols[6]:
-    status = get_ts(global_epw,global_colorset)[1]['quitehot']
-    st.metric(":red[**Quite Hot**]", f'{status}%')
-with cols[7]:
-    status = get_ts(global_epw,global_colorset)[1]['veryhot']
-    st.metric(":red[**Very Hot**]", f'{status}%')
-with cols[8]:
-    ""
-
-st.markdown('---')
+    st.markdown('---')
 
 #Pyschometric Chart
 #------------------------------------------------------------------------------
-
-import ladybug.psychrometrics
-import ladybug_comfort
-from ladybug.psychchart import PsychrometricChart
-from ladybug_charts.utils import Strategy
-from ladybug_comfort.chart.polygonpmv import PolygonPMV
-
-st.write("""
-# Psychrometric Chart
-         
-***
-""")
-
+lap('psychrometric')
 
 with st.sidebar:
     
@@ -536,9 +521,11 @@ with st.sidebar:
         
         psy_radio = st.radio('',['Hourly Data', 'Psychrometrics', 'PMV/PPD'],index = 0, key='psy_radio',horizontal = True)
         
+        psy_db = psy_rh = psy_mrt = None
+        pmv_sweep_axes = None
         if psy_radio == 'Hourly Data':
-            psy_selected = st.selectbox('Select an environmental variable', options=fields.keys())
-            psy_data = SI_IP_Check(global_epw.import_data_by_field(fields[psy_selected]))
+            psy_selected = st.selectbox('Select an environmental variable', options=FIELDS.keys())
+            psy_data = epw_store.to_collection(FIELDS[psy_selected], data_unit)
             psy_draw_polygons = st.checkbox('Draw comfort polygons')
             psy_clo_value = st.number_input('Clothing Level',value=0.7)
             psy_met_value = st.number_input('Metabloic Rate',value=1.1)
@@ -554,6 +541,7 @@ with st.sidebar:
                 'Select a passive strategy', options=psy_strategy_options)
         
         elif psy_radio == 'Psychrometrics':
+            psy_selected = None
             psy_selected_strategy = None
             psy_draw_polygons = None
             psy_data = None
@@ -582,208 +570,71 @@ with st.sidebar:
             psy_rh = st.number_input('RH value (%)',min_value =0, max_value = 100, value = 45)                
             psy_clo_value = st.number_input('Clothing Level',value=0.7)
             psy_met_value = st.number_input('Metabloic Rate',value=1.1)
+
+            st.markdown('**Comfort map**')
+            if st.checkbox('Sweep two parameters', key='pmv_sweep',
+                           help='Map PMV/PPD over a grid of two parameters, the others keeping the values above'):
+                pmv_sweep_x = st.selectbox('X axis', options=list(PMV_SWEEP_PARAMETERS), index=5, key='pmv_sweep_x')
+                pmv_sweep_y = st.selectbox('Y axis', options=list(PMV_SWEEP_PARAMETERS), index=4, key='pmv_sweep_y')
+                pmv_sweep_steps = st.slider('Grid steps', min_value=10, max_value=200, value=60, key='pmv_sweep_steps')
+                pmv_sweep_ranges = {}
+                for axis_label in dict.fromkeys([pmv_sweep_x, pmv_sweep_y]):
+                    parameter, low, high, default = PMV_SWEEP_PARAMETERS[axis_label]
+                    pmv_sweep_ranges[axis_label] = st.slider(axis_label, min_value=low, max_value=high,
+                                                             value=default, key=f'pmv_sweep_{parameter}')
+                pmv_sweep_axes = (pmv_sweep_x, pmv_sweep_y, pmv_sweep_steps, pmv_sweep_ranges)
             
 
 
-@st.cache_data(ttl=2)
-def get_psy_chart_figure(_epw: EPW, global_colorset: str, selected_strategy: str,
-                         load_data: str, draw_polygons: bool,
-                         _data: HourlyContinuousCollection, use_ip_bool: bool) -> Tuple[Figure, HourlyContinuousCollection]:
+@instrument_cache(st.cache_data(ttl=2))
+def get_psy_chart_figure(epw_hash: str, _store: EPWStore, global_colorset: str, selected_strategy: str,
+                         load_data: str, draw_polygons: bool, data_selected: str,
+                         _data: HourlyContinuousCollection, use_ip_bool: bool, data_unit: str,
+                         psy_clo_value: float, psy_met_value: float, psy_air: float,
+                         psy_db: float, psy_rh: float, psy_mrt: float) -> Tuple[Figure, list, tuple, dict, np.ndarray]:
     """Create psychrometric chart figure.
     Args:
-        epw: An EPW object.
+        epw_hash: SHA-256 of the EPW file, used as the cache key of the store.
+        _store: Columnar store of the EPW file.
         global_colorset: A string representing the name of a Colorset.
-        selected_strategy: A string representing the name of a psychrometric strategy.
+        selected_strategy: A key of PSYCHROMETRIC_STRATEGIES.
         load_data: A boolean to indicate whether to load the data.
         draw_polygons: A boolean to indicate whether to draw the polygons.
+        data_selected: Name of the variable in data, used as the cache key of the data.
         data: Hourly data to load on psychrometric chart.
         use_ip_bool: Boolean to have SI-IP conversions up on user selection.
+        data_unit: Unit system of the data, either 'SI' or 'IP'.
+        psy_clo_value: Clothing level.
+        psy_met_value: Metabolic rate.
+        psy_air: Air velocity in m/s.
+        psy_db: Dry bulb temperature in C for the Psychrometrics and PMV/PPD modes.
+        psy_rh: Relative humidity in % for the Psychrometrics and PMV/PPD modes.
+        psy_mrt: Mean radiant temperature in C for the PMV/PPD mode.
     Returns:
-        A plotly figure.
+        A tuple of five items:
+        -   A plotly figure.
+        -   Percentages of the time each strategy is effective (Hourly Data mode).
+        -   The PMV/PPD calculation result (PMV/PPD mode).
+        -   A dictionary of metric labels to values to display under the chart.
+        -   The index in STRATEGY_LABELS of the strategy of each hour (Hourly Data mode).
     """
 
-    lb_lp = LegendParameters(colors=colorsets[global_colorset],)
-    
-    lb_psy = PsychrometricChart(_epw.dry_bulb_temperature,
-                                _epw.relative_humidity, legend_parameters=lb_lp, use_ip = use_ip_bool)
-
-    if selected_strategy == 'All':
-        strategies = [Strategy.comfort, Strategy.evaporative_cooling,
-                      Strategy.mas_night_ventilation, Strategy.occupant_use_of_fans,
-                      Strategy.capture_internal_heat, Strategy.passive_solar_heating]
-    elif selected_strategy == 'Comfort':
-        strategies = [Strategy.comfort]
-    elif selected_strategy == 'Evaporative Cooling':
-        strategies = [Strategy.evaporative_cooling]
-    elif selected_strategy == 'Mass + Night Ventilation':
-        strategies = [Strategy.mas_night_ventilation]
-    elif selected_strategy == 'Occupant use of fans':
-        strategies = [Strategy.occupant_use_of_fans]
-    elif selected_strategy == 'Capture internal heat':
-        strategies = [Strategy.capture_internal_heat]
-    elif selected_strategy == 'Passive solar heating':
-        strategies = [Strategy.passive_solar_heating]
-        
-    pmv_param = ladybug_comfort.parameter.pmv.PMVParameter(10,humid_ratio_upper = 0.03, humid_ratio_lower=0)
-    
-    pmv = PolygonPMV(lb_psy,rad_temperature = None, met_rate=[psy_met_value],clo_value=[psy_clo_value], air_speed = [psy_air], comfort_parameter = pmv_param )
-    
     if load_data == 'Hourly Data':
-        
-        #Extracting values for the report
-        internal_heat_pc = round(sum(pmv.evaluate_polygon(pmv.internal_heat_polygon(),0.01)),2)/100
-        if pmv.fan_use_polygon(psy_air) is not None:
-            Fan_pc = round(pmv.evaluate_polygon(pmv.fan_use_polygon(psy_air),0.01),2)/100
-        else:
-            Fan_pc = 0
-        if pmv.night_flush_polygon() is not None:
-            nightflush_pc = round(sum(pmv.evaluate_polygon(pmv.night_flush_polygon(),0.01)),2)/100
-        else:
-            nightflush_pc = 0
-        evaluate_passive_solar = pmv.evaluate_passive_solar(global_epw.global_horizontal_radiation,50,8,12.8)
-        passivesolar_pc = round(sum(pmv.evaluate_polygon(pmv.passive_solar_polygon(evaluate_passive_solar[1]),0.01)),2)/100
-        if pmv.evaporative_cooling_polygon() is not None:
-            evap_clg_pc = round(sum(pmv.evaluate_polygon(pmv.evaporative_cooling_polygon(),0.01)),2)/100
-        else:
-            evap_clg_pc = 0
-
-        comfort_value_pc = round((pmv.merged_comfort_data.total/8760)*100,2)
-        
-        strategies_percentages = [internal_heat_pc,Fan_pc,nightflush_pc,passivesolar_pc,evap_clg_pc,comfort_value_pc]
-        
-        if draw_polygons:
-
-            figure = lb_psy.plot(data=_data, polygon_pmv=pmv,
-                                 strategies=strategies,title='PSYCHROMETRIC CHART', show_title=True, solar_data =global_epw.global_horizontal_radiation)
-            
-        else:
-            figure = lb_psy.plot(data=_data, show_title=True)
-            
-        return figure, strategies_percentages, None
+        figure, strategies_percentages, labels = psychrometric_chart(
+            _store, COLORSETS[global_colorset], selected_strategy, draw_polygons, _data, use_ip_bool,
+            psy_clo_value, psy_met_value, psy_air)
+        return figure, strategies_percentages, None, {}, labels
     
     elif load_data == 'Psychrometrics':
-        
-        if data_unit == 'SI':
-            min_temperature = -20
-            max_temperature = 50
-        if data_unit == 'IP':
-            min_temperature = 0
-            max_temperature = 120
-        
-        lb_psy_ext = PsychrometricChart(24,45, min_temperature=min_temperature, max_temperature=max_temperature, use_ip = use_ip_bool)
-
-        figure = lb_psy_ext.plot(title='PSYCHROMETRIC CHART', show_title=True)
-        
-        if data_unit == 'SI':
-            dew_pt = round(ladybug.psychrometrics.dew_point_from_db_rh(psy_db, psy_rh),2)
-            hr_pt = round(ladybug.psychrometrics.humid_ratio_from_db_rh(psy_db, psy_rh),2)
-            wb_pt = round(ladybug.psychrometrics.wet_bulb_from_db_rh(psy_db, psy_rh),2)
-            ent_pt = round(ladybug.psychrometrics.enthalpy_from_db_hr(psy_db, hr_pt),2)
-            psy_db_kelvin = psy_db + 274.15
-            sat_p = round(ladybug.psychrometrics.saturated_vapor_pressure(psy_db_kelvin),2)
-        
-            col1,col2,col3,col4,col5,col6,col7 = st.columns(7)
-            
-            with col1:
-                
-                st.metric('Dry Bulb Temperature (°C)', value = psy_db)
-                
-            with col2:
-                
-                st.metric('Relative Humidity (%)', value = psy_rh)
-                
-            with col3:
-                
-                st.metric('Dew Point Temperature (°C)', value = dew_pt)
-                
-            with col4:
-                
-                st.metric('Humidty Ratio (kg_H₂O kg_Air⁻¹)', value = hr_pt)
-                
-            with col5:
-                
-                st.metric('Wet Bulb Temperature (°C)', value = wb_pt)
-                
-            with col6:
-                
-                st.metric('Enthalpy (J kg⁻¹)', value = ent_pt)
-                
-            with col7:
-                
-                st.metric('Saturated Vapour Pressure (Pa)', value = sat_p)
-        
-        elif data_unit == 'IP':
-            dew_pt = round(ladybug.psychrometrics.dew_point_from_db_rh(psy_db, psy_rh),2)*1.8 +32
-            hr_pt = round(ladybug.psychrometrics.humid_ratio_from_db_rh(psy_db, psy_rh),2)
-            wb_pt = round(round(ladybug.psychrometrics.wet_bulb_from_db_rh(psy_db, psy_rh),2)*1.8+32, 2)
-            ent_pt = round(round(ladybug.psychrometrics.enthalpy_from_db_hr(psy_db, hr_pt),2)*0.0004299)
-            psy_db_kelvin = psy_db + 274.15
-            sat_p = round(round(ladybug.psychrometrics.saturated_vapor_pressure(psy_db_kelvin),2)*0.0002953,2)
-        
-            col1,col2,col3,col4,col5,col6,col7 = st.columns(7)
-            
-            with col1:
-                
-                st.metric('Dry Bulb Temperature (°F)', value = psy_db*1.8 +32)
-                
-            with col2:
-                
-                st.metric('Relative Humidity (%)', value = psy_rh)
-                
-            with col3:
-                
-                st.metric('Dew Point Temperature (°F)', value = dew_pt)
-                
-            with col4:
-                
-                st.metric('Humidty Ratio (kg_H₂O kg_Air⁻¹)', value = hr_pt)
-                
-            with col5:
-                
-                st.metric('Wet Bulb Temperature (°F)', value = wb_pt)
-                
-            with col6:
-                
-                st.metric('Enthalpy (Btu lb⁻¹)', value = ent_pt)
-                
-            with col7:
-                
-                st.metric('Saturated Vapour Pressure (inHg)', value = sat_p)
-        
-        return figure, None, None
+        figure, metrics = psychrometric_point(psy_db, psy_rh, data_unit)
+        return figure, None, None, metrics, None
 
     else:
-        
-        if data_unit == 'SI':
-            min_temperature = -20
-            max_temperature = 50
-        if data_unit == 'IP':
-            min_temperature = 0
-            max_temperature = 120
-
-        lb_psy_ext = PsychrometricChart(psy_db,psy_rh, min_temperature = min_temperature,max_temperature=max_temperature, use_ip = use_ip_bool)
-        figure = lb_psy_ext.plot(polygon_pmv=pmv, title='PSYCHROMETRIC CHART', show_title=True)
-        
-
-        PMV_cal = ladybug_comfort.pmv.fanger_pmv(psy_db, psy_mrt , psy_air , psy_rh, psy_met_value, psy_clo_value)
-        
-        col1,col2,col3,col4 = st.columns([2,1,1,2])
-        
-        with col1:
-            st.markdown('')
-            
-        with col2:
-            st.metric('**:orange[PMV Fanger Value]**', value = round(PMV_cal[0],2))
-        
-        with col3:
-            st.metric('**:orange[PPD Fanger Value (%)]**',value = round(PMV_cal[1],2))
-            
-        with col4:
-            st.markdown('')
-        
-        return figure, None, PMV_cal
+        figure, PMV_cal, metrics = pmv_chart(psy_db, psy_rh, psy_mrt, psy_air, psy_met_value,
+                                             psy_clo_value, data_unit)
+        return figure, None, PMV_cal, metrics, None
 
-@st.cache_data(ttl=2)
+@instrument_cache(st.cache_data(ttl=2))
 def get_figure_config(title: str) -> dict:
     """Set figure config so that a figure can be downloaded as SVG."""
 
@@ -797,43 +648,108 @@ def get_figure_config(title: str) -> dict:
         }
     }
 
-with st.container():
-    
-    st.markdown('**The following Psychrometric chart contains THREE functions here:**')
-    st.info(
-        '(1) Load Hourly Data: A psychrometric chart plots multiple data '
-        'points, that represent the air conditions at a specific time, on the chart and overlays an area '
-        'that identifies the “comfort zone.”  The comfort zone is defined as the range within occupants are '
-        'satisfied with the surrounding thermal conditions. After plotting the air conditions and overlaying '
-        'the comfort zone, it becomes possible to see how passive design strategies can extend the comfort '
-        'zone.')
-    st.info(
-        '(2) Extracting psychrometrics: Calculating the psychrometrics based on the given dry bulb temperature'
-        ' and relative humidity.')
-    st.info(
-        '(3) Calculate PMV/PPD: Calculating thermal comfort indices including Predicted Mean Vote (PMV) and Percentage of People Dissatisfied (PPD)' 
-        ' based on the given necessary inputs for an indoor environmental condition.')
-    
-    psy_chart_figure, strategies_percentages, PMV_cal  = get_psy_chart_figure(
-        global_epw, global_colorset, psy_selected_strategy, psy_radio,
-        psy_draw_polygons,psy_data, use_ip_bool)
-    
-    
-    st.plotly_chart(psy_chart_figure, use_container_width=True, config=get_figure_config(f'Psychrometric_chart_{global_epw.location.city}'))
+@instrument_cache(st.cache_data(max_entries=32))
+def get_pmv_sweep(parameters: dict) -> PMVSweep:
+    """Get the PMV/PPD of every combination of a sweep definition (see epwviz.pmv.pmv_sweep)."""
+    return pmv_sweep(parameters)
+
+@sections.register('psychrometric')
+def compute_psychrometric(epw_hash: str, global_colorset: str, psy_selected_strategy: str,
+                          psy_radio: str, psy_draw_polygons: bool, psy_selected: str, use_ip_bool: bool,
+                          data_unit: str, psy_clo_value: float, psy_met_value: float, psy_air: float,
+                          psy_db: float, psy_rh: float, psy_mrt: float, pmv_sweep_axes: tuple,
+                          _store: EPWStore, _psy_data: HourlyContinuousCollection) -> dict:
+    """Compute the chart, strategy shares and metrics of the psychrometric section."""
+    psy_chart_figure, strategies_percentages, PMV_cal, metrics, labels = get_psy_chart_figure(
+        epw_hash, _store, global_colorset, psy_selected_strategy, psy_radio,
+        psy_draw_polygons, psy_selected, _psy_data, use_ip_bool, data_unit,
+        psy_clo_value, psy_met_value, psy_air, psy_db, psy_rh, psy_mrt)
+
+    strategy_figure = None
+    if labels is not None:
+        strategy_figure = strategy_label_figure(labels, _store.timestep)
+
+    sweep_figures = None
+    if psy_radio == 'PMV/PPD' and pmv_sweep_axes is not None:
+        x_label, y_label, steps, ranges = pmv_sweep_axes
+        parameters = pmv_sweep_parameters(
+            dict(ta=psy_db, tr=psy_mrt, vel=psy_air, rh=psy_rh, met=psy_met_value, clo=psy_clo_value),
+            steps, ranges)
+        if x_label != y_label:
+            sweep_figures = pmv_sweep_figures(get_pmv_sweep(parameters), x_label, y_label,
+                                              COLORSETS[global_colorset])
+
+    return {'figure': psy_chart_figure, 'strategies_percentages': strategies_percentages,
+            'PMV_cal': PMV_cal, 'metrics': metrics, 'strategy_figure': strategy_figure,
+            'sweep_figures': sweep_figures}
+
+sections.bind('psychrometric', epw_hash=epw_hash, global_colorset=global_colorset,
+              psy_selected_strategy=psy_selected_strategy, psy_radio=psy_radio,
+              psy_draw_polygons=psy_draw_polygons, psy_selected=psy_selected, use_ip_bool=use_ip_bool,
+              data_unit=data_unit, psy_clo_value=psy_clo_value, psy_met_value=psy_met_value,
+              psy_air=psy_air, psy_db=psy_db, psy_rh=psy_rh, psy_mrt=psy_mrt, pmv_sweep_axes=pmv_sweep_axes,
+              _store=epw_store, _psy_data=psy_data)
+
+if sections.is_visible('psychrometric'):
 
+    st.write("""
+    # Psychrometric Chart
+           
+    ***
+    """)
+
+    with st.container():
+    
+        st.markdown('**The following Psychrometric chart contains THREE functions here:**')
+        st.info(
+            '(1) Load Hourly Data: A psychrometric chart plots multiple data '
+            'points, that represent the air conditions at a specific time, on the chart and overlays an area '
+            'that identifies the “comfort zone.”  The comfort zone is defined as the range within occupants are '
+            'satisfied with the surrounding thermal conditions. After plotting the air conditions and overlaying '
+            'the comfort zone, it becomes possible to see how passive design strategies can extend the comfort '
+            'zone.')
+        st.info(
+            '(2) Extracting psychrometrics: Calculating the psychrometrics based on the given dry bulb temperature'
+            ' and relative humidity.')
+        st.info(
+            '(3) Calculate PMV/PPD: Calculating thermal comfort indices including Predicted Mean Vote (PMV) and Percentage of People Dissatisfied (PPD)' 
+            ' based on the given necessary inputs for an indoor environmental condition.')
+    
+        psychrometric = sections.result('psychrometric')
+    
+        st.plotly_chart(psychrometric['figure'], use_container_width=True, config=get_figure_config(f'Psychrometric_chart_{global_epw.location.city}'))
+
+        if psychrometric['strategy_figure'] is not None:
+            st.plotly_chart(psychrometric['strategy_figure'], use_container_width=True,
+                            config=get_figure_config(f'Passive_strategies_{global_epw.location.city}'))
+
+        metrics = psychrometric['metrics']
+        if psy_radio == 'Psychrometrics':
+            for col, (label, value) in zip(st.columns(len(metrics)), metrics.items()):
+                with col:
+                    st.metric(label, value = value)
+        elif psy_radio == 'PMV/PPD':
+            cols = st.columns([2,1,1,2])
+            with cols[0]:
+                st.markdown('')
+            for col, (label, value) in zip(cols[1:3], metrics.items()):
+                with col:
+                    st.metric(label, value = value)
+            with cols[3]:
+                st.markdown('')
+
+            if pmv_sweep_axes is not None:
+                if psychrometric['sweep_figures'] is None:
+                    st.warning('Select two different parameters to draw the comfort map.')
+                else:
+                    for col, sweep_figure in zip(st.columns(2), psychrometric['sweep_figures']):
+                        with col:
+                            st.plotly_chart(sweep_figure, use_container_width=True)
 
-#Saving image
-psy_chart_figure.write_image("psy_main.png")
 
 # WINDROSE
 #------------------------------------------------------------------------------
-from ladybug.windrose import WindRose
-
-st.markdown('---')
-st.write("""
-# Wind Rose
-""")
-st.markdown('---')
+lap('windrose')
 
 with st.sidebar:
     
@@ -853,192 +769,57 @@ with st.sidebar:
             'Start hour', min_value=0, max_value=23, value=0, key='windrose_st_hour')
         windrose_end_hour = st.number_input(
             'End hour', min_value=0, max_value=23, value=23, key='windrose_end_hour')
-   
-@st.cache_data(ttl=2)
-def get_windrose_figure(st_month: int, st_day: int, st_hour: int, end_month: int,
-                        end_day: int, end_hour: int, _epw, global_colorset) -> Figure:
-    
-    """Create windrose figure.
-    Args:
-        st_month: A number representing the start month.
-        st_day: A number representing the start day.
-        st_hour: A number representing the start hour.
-        end_month: A number representing the end month.
-        end_day: A number representing the end day.
-        end_hour: A number representing the end hour.
-        epw: An EPW object.
-        global_colorset: A string representing the name of a Colorset.
-    Returns:
-        A plotly figure.
-    """
-            
-    lb_ap = AnalysisPeriod(st_month, st_day, st_hour, end_month, end_day, end_hour)
-    wind_dir = _epw.wind_direction.filter_by_analysis_period(lb_ap)
-    wind_spd = SI_IP_Check(_epw.import_data_by_field(fields['Wind Speed'])).filter_by_analysis_period(lb_ap)
-    
-    lb_lp = LegendParameters(colors=colorsets[global_colorset])
-    
-    lb_wind_rose = WindRose(wind_dir, wind_spd)
-    lb_wind_rose.legend_parameters = lb_lp
-    
-    
-    return lb_wind_rose.plot(title='Windrose',show_title=True)
-
-@st.cache_data(ttl=2)
-def get_windrose_figure_temp(st_month: int, st_day: int, st_hour: int, end_month: int,
-                    end_day: int, end_hour: int, _epw, global_colorset) -> Figure:
-    
-    """Create windrose figure.
-    Args:
-        st_month: A number representing the start month.
-        st_day: A number representing the start day.
-        st_hour: A number representing the start hour.
-        end_month: A number representing the end month.
-        end_day: A number representing the end day.
-        end_hour: A number representing the end hour.
-        epw: An EPW object.
-        global_colorset: A string representing the name of a Colorset.
-    Returns:
-        A plotly figure.
-    """
-    
-    lb_ap = AnalysisPeriod(st_month, st_day, st_hour, end_month, end_day, end_hour)        
-    
-    fields = get_fields()
-        
-    windrose_data = SI_IP_Check(_epw.import_data_by_field(fields['Dry Bulb Temperature']))
-    
-    wind_dir = _epw.wind_direction.filter_by_analysis_period(lb_ap)
-    windrose_dbt_ = windrose_data.filter_by_analysis_period(lb_ap)
 
-    lb_lp = LegendParameters(colors=colorsets[global_colorset])
-    
-    lb_windrose_temp = WindRose(wind_dir,windrose_dbt_)
-    lb_windrose_temp.legend_parameters = lb_lp
-    
-    return lb_windrose_temp.plot(title='Wind Direction vs. Dry Bulb Temperature', show_title=True)
- 
-@st.cache_data(ttl=2)
-def get_windrose_figure_dir_rad(st_month: int, st_day: int, st_hour: int, end_month: int,
-                    end_day: int, end_hour: int, _epw, global_colorset) -> Figure:
-    
-    """Create windrose figure.
-    Args:
-        st_month: A number representing the start month.
-        st_day: A number representing the start day.
-        st_hour: A number representing the start hour.
-        end_month: A number representing the end month.
-        end_day: A number representing the end day.
-        end_hour: A number representing the end hour.
-        epw: An EPW object.
-        global_colorset: A string representing the name of a Colorset.
-    Returns:
-        A plotly figure.
-    """
-    
-    lb_ap = AnalysisPeriod(st_month, st_day, st_hour, end_month, end_day, end_hour)        
-    
-    fields = get_fields()
-        
-    
-    windrose_data = SI_IP_Check(_epw.import_data_by_field(fields['Direct Normal Radiation']))
-    
-    wind_dir = _epw.wind_direction.filter_by_analysis_period(lb_ap)
-    windrose_data_ = windrose_data.filter_by_analysis_period(lb_ap)
-    
-    lb_lp = LegendParameters(colors=colorsets[global_colorset])
-    
-    lb_windrose_dir = WindRose(wind_dir,windrose_data_)
-    lb_windrose_dir.legend_parameters = lb_lp
-    
-    return lb_windrose_dir.plot(title='Wind Direction vs. Direct Normal Radiation', show_title=True)
-
-@st.cache_data(ttl=2)
-def get_windrose_figure_diff_rad(st_month: int, st_day: int, st_hour: int, end_month: int,
-                    end_day: int, end_hour: int, _epw, global_colorset) -> Figure:
-    
-    """Create windrose figure.
-    Args:
-        st_month: A number representing the start month.
-        st_day: A number representing the start day.
-        st_hour: A number representing the start hour.
-        end_month: A number representing the end month.
-        end_day: A number representing the end day.
-        end_hour: A number representing the end hour.
-        epw: An EPW object.
-        global_colorset: A string representing the name of a Colorset.
-    Returns:
-        A plotly figure.
-    """
-    
-    lb_ap = AnalysisPeriod(st_month, st_day, st_hour, end_month, end_day, end_hour)        
-    
-    fields = get_fields()
-        
-    windrose_data = SI_IP_Check(_epw.import_data_by_field(fields['Diffuse Horizontal Radiation']))
-    
-    wind_dir = _epw.wind_direction.filter_by_analysis_period(lb_ap)
-    windrose_data_ = windrose_data.filter_by_analysis_period(lb_ap)
-    
-    
-    lb_lp = LegendParameters(colors=colorsets[global_colorset])
-    
-    lb_windrose_diff = WindRose(wind_dir,windrose_data_)
-    lb_windrose_diff.legend_parameters = lb_lp
-    
-    return lb_windrose_diff.plot(title='Wind Direction vs. Diffuse Horizontal Radiation', show_title=True)
+        windrose_monthly = st.checkbox('Monthly wind roses', key='windrose_monthly',
+                                       help='Show the wind speed rose of each month of the period')
+   
+@instrument_cache(st.cache_resource(max_entries=32))
+def get_windrose_engine(epw_hash: str, _store: EPWStore) -> WindRoseEngine:
+    """Get the wind rose engine of an EPW file, shared by every session."""
+    return WindRoseEngine(_store)
+
+@sections.register('windrose')
+def compute_windrose(st_month: int, st_day: int, st_hour: int, end_month: int, end_day: int,
+                     end_hour: int, epw_hash: str, global_colorset: str, data_unit: str,
+                     windrose_monthly: bool, _store: EPWStore) -> dict:
+    """Compute the wind rose figures of the wind rose section, binned by the shared engine of the EPW file."""
+    return windrose_figures(get_windrose_engine(epw_hash, _store),
+                            (st_month, st_day, st_hour, end_month, end_day, end_hour),
+                            COLORSETS[global_colorset], data_unit, windrose_monthly)
+
+sections.bind('windrose', st_month=windrose_st_month, st_day=windrose_st_day, st_hour=windrose_st_hour,
+              end_month=windrose_end_month, end_day=windrose_end_day, end_hour=windrose_end_hour,
+              epw_hash=epw_hash, global_colorset=global_colorset, data_unit=data_unit,
+              windrose_monthly=windrose_monthly, _store=epw_store)
+
+if sections.is_visible('windrose'):
 
+    st.markdown('---')
+    st.write("""
+    # Wind Rose
+    """)
+    st.markdown('---')
 
-with st.container():
-    
-    st.markdown('Generate a wind rose to summarise the occurrence of winds at a location, showing their strength, direction and frequency, for the selected period and environmental parameter!')
-    
-    col1,col2,col3,col4 = st.columns(4)
-    with col1:
-        
-        windrose_figure = get_windrose_figure(windrose_st_month, windrose_st_day, windrose_st_hour, windrose_end_month,
-                                              windrose_end_day, windrose_end_hour, global_epw, global_colorset)
-    
-        st.plotly_chart(windrose_figure, use_container_width=True,
-                        config=get_figure_config(f'Windrose_{global_epw.location.city}'))
-    with col2:
-        windrose_figure_temp = get_windrose_figure_temp(windrose_st_month, windrose_st_day, windrose_st_hour, windrose_end_month,
-                                              windrose_end_day, windrose_end_hour, global_epw, global_colorset)
-    
-        st.plotly_chart(windrose_figure_temp, use_container_width=True,
-                        config=get_figure_config(f'Windrose_{global_epw.location.city}'))
-    
-    with col3:
-        windrose_figure_dir = get_windrose_figure_dir_rad(windrose_st_month, windrose_st_day, windrose_st_hour, windrose_end_month,
-                                              windrose_end_day, windrose_end_hour, global_epw, global_colorset)
-    
-        st.plotly_chart(windrose_figure_dir, use_container_width=True,
-                        config=get_figure_config(f'Windrose_{global_epw.location.city}'))
+    with st.container():
         
-    with col4:
-        windrose_figure_diff = get_windrose_figure_diff_rad(windrose_st_month, windrose_st_day, windrose_st_hour, windrose_end_month,
-                                              windrose_end_day, windrose_end_hour, global_epw, global_colorset)
-    
-        st.plotly_chart(windrose_figure_diff, use_container_width=True,
-                        config=get_figure_config(f'Windrose_{global_epw.location.city}'))
+        st.markdown('Generate a wind rose to summarise the occurrence of winds at a location, showing their strength, direction and frequency, for the selected period and environmental parameter!')
         
-    st.markdown('---')
-
-#Saving image
-windrose_figure.write_image("windrose.png")
-windrose_figure_temp.write_image("windrose-temp.png")
-windrose_figure_dir.write_image("windrose-dir.png")
-windrose_figure_diff.write_image("windrose-diff.png")
+        windrose_result = sections.result('windrose')
+        for col, name in zip(st.columns(4), ['windrose', 'temp', 'dir', 'diff']):
+            with col:
+                st.plotly_chart(windrose_result[name], use_container_width=True,
+                                config=get_figure_config(f'Windrose_{global_epw.location.city}'))
+
+        if 'monthly' in windrose_result:
+            st.plotly_chart(windrose_result['monthly'], use_container_width=True,
+                            config=get_figure_config(f'Monthly_Windrose_{global_epw.location.city}'))
+            
+        st.markdown('---')
 
 #SUNPATH
 #-----------------------------------------------------------------------------
-from ladybug.sunpath import Sunpath
+lap('sunpath')
 
-st.write("""
-# Sunpath Diagram
-         
-***
-""")
 with st.sidebar:
     
     with st.expander('Sunpath'):
@@ -1051,63 +832,82 @@ with st.sidebar:
         if sunpath_radio == 'from epw location':
             sunpath_switch = st.checkbox('Switch colors', key='sunpath_switch',
                                          help='Reverse the colorset')
-            sunpath_data = None
+            sunpath_selected = None
     
         else:
             sunpath_selected = st.selectbox(
-                'Select an environmental variable', options=fields.keys(), key='sunpath')
-            sunpath_data = SI_IP_Check(global_epw._get_data_by_field(fields[sunpath_selected]))
+                'Select an environmental variable', options=FIELDS.keys(), key='sunpath')
             sunpath_switch = None
-            
-@st.cache_data(ttl=2)
-def get_sunpath_figure(sunpath_type: str, global_colorset: str, _epw: EPW = None,
-                       switch: bool = False,
-                       _data: HourlyContinuousCollection = None, ) -> Figure:
+
+@instrument_cache(st.cache_resource(max_entries=32))
+def get_solar_table(coordinates: Tuple[float, float, float], timestep: int,
+                    is_leap_year: bool) -> SolarTable:
+    """Get the sun position at every timestep of a year, persisted per location in ./data.
+    Args:
+        coordinates: Latitude, longitude and time zone of the location.
+        timestep: Number of timesteps per hour.
+        is_leap_year: Whether the year is a leap year.
+    Returns:
+        A SolarTable.
+    """
+    return open_solar_table(*coordinates, timestep=timestep, is_leap_year=is_leap_year)
+
+@instrument_cache(st.cache_data(max_entries=32))
+def get_sunpath_figure(sunpath_type: str, global_colorset: str, epw_hash: str,
+                       switch: bool = False, selected: str = None, data_unit: str = 'SI',
+                       _store: EPWStore = None) -> Figure:
     """Create sunpath figure.
     Args:
         sunpath_type: A string representing the type of sunpath to be plotted.
         global_colorset: A string representing the name of a Colorset.
-        epw: An EPW object.
+        epw_hash: SHA-256 of the EPW file content.
         switch: A boolean to indicate whether to reverse the colorset.
-        data: Hourly data to load on sunpath.
+        selected: Name of the EPW field to load on the sunpath.
+        data_unit: Either 'SI' or 'IP'.
+        _store: Columnar store of the EPW file.
     Returns:
         A plotly figure.
     """
+    table = get_solar_table(_store.coordinates, _store.timestep, _store.is_leap_year)
     if sunpath_type == 'from epw location':
-        lb_sunpath = Sunpath.from_location(_epw.location)
-        colors = get_colors(switch, global_colorset)
-        return lb_sunpath.plot(title='Sunpath Diagram',colorset=colors,show_title=True)
+        return sunpath(_store, colorset_colors(global_colorset, switch), table=table)
     else:
-        lb_sunpath = Sunpath.from_location(_epw.location)
-        colors = colorsets[global_colorset]
-        return lb_sunpath.plot(title=str(_data.header.data_type),colorset=colors, data=_data, show_title=True)
-
-with st.container():
-
-    st.markdown('Generate a sunpath using EPW location. Additionally, you can'
-                ' also load one of the environmental variables from the EPW file'
-                ' on the sunpath.'
-                )
-    
-    sunpath_figure = get_sunpath_figure(sunpath_radio, global_colorset, global_epw, sunpath_switch, sunpath_data)
-    
-    st.plotly_chart(sunpath_figure, use_container_width=True,
-                    config=get_figure_config(
-                        f'Sunpath_{global_epw.location.city}'))
+        return sunpath(_store, COLORSETS[global_colorset], selected, data_unit, table)
 
+@sections.register('sunpath')
+def compute_sunpath(sunpath_radio: str, global_colorset: str, epw_hash: str, sunpath_switch: bool,
+                    sunpath_selected: str, data_unit: str, _store: EPWStore) -> Figure:
+    """Compute the figure of the sunpath section."""
+    return get_sunpath_figure(sunpath_radio, global_colorset, epw_hash, sunpath_switch,
+                              sunpath_selected, data_unit, _store)
 
-#Saving images
-sunpath_figure.write_image("Sunpath.png")
+sections.bind('sunpath', sunpath_radio=sunpath_radio, global_colorset=global_colorset, epw_hash=epw_hash,
+              sunpath_switch=sunpath_switch, sunpath_selected=sunpath_selected, data_unit=data_unit,
+              _store=epw_store)
 
+if sections.is_visible('sunpath'):
 
-#Degree Days
-#------------------------------------------------------------------------------
+    st.write("""
+    # Sunpath Diagram
+             
+    ***
+    """)
 
+    with st.container():
 
-from ladybug.datatype.temperaturetime import HeatingDegreeTime, CoolingDegreeTime
-from ladybug_comfort.degreetime import heating_degree_time, cooling_degree_time
+        st.markdown('Generate a sunpath using EPW location. Additionally, you can'
+                    ' also load one of the environmental variables from the EPW file'
+                    ' on the sunpath.'
+                    )
+        
+        st.plotly_chart(sections.result('sunpath'), use_container_width=True,
+                        config=get_figure_config(
+                            f'Sunpath_{global_epw.location.city}'))
 
 
+#Degree Days
+#------------------------------------------------------------------------------
+lap('degree_days')
 
 with st.sidebar:
     with st.expander('Degree days'):
@@ -1129,123 +929,133 @@ with st.sidebar:
             'Start hour', min_value=0, max_value=23, value=0, key='dd_st_hour')
         dd_end_hour = st.number_input(
             'End hour', min_value=0, max_value=23, value=23, key='dd_end_hour')
+
+        if data_unit == 'SI':
+            degree_days_bases = st.slider('Base temperature sweep (°C)', min_value=-10.0, max_value=40.0,
+                                          value=(10.0, 30.0), key='degree_days_bases_SI')
+        if data_unit == 'IP':
+            degree_days_bases = st.slider('Base temperature sweep (°F)', min_value=14.0, max_value=104.0,
+                                          value=(50.0, 86.0), key='degree_days_bases_IP')
         
-@st.cache_data(ttl=2)
-def get_degree_days_figure(_st_hour,_end_hour,
-    _dbt: HourlyContinuousCollection, _heat_base_: int, _cool_base_: int,
-    global_colorset: str) -> [Figure,HourlyContinuousCollection,HourlyContinuousCollection]:
-    """Create HDD and CDD figure.
+@instrument_cache(st.cache_resource(max_entries=32))
+def get_degree_day_engine(epw_hash: str, st_hour: int, end_hour: int, data_unit: str,
+                          _store: EPWStore) -> DegreeDayEngine:
+    """Get the degree day engine of the dry bulb temperature of an hour window.
     Args:
-        dbt: A HourlyContinuousCollection object.
-        _heat_base_: A number representing the heat base temperature.
-        _cool_base_: A number representing the cool base temperature.
-        stack: A boolean to indicate whether to stack the data.
-        switch: A boolean to indicate whether to reverse the colorset.
-        global_colorset: A string representing the name of a Colorset.
+        epw_hash: SHA-256 of the EPW file, used as the cache key of the store.
+        st_hour: A number representing the start hour.
+        end_hour: A number representing the end hour.
+        data_unit: Either 'SI' or 'IP'.
+        _store: Columnar store of the EPW file.
     Returns:
-        A tuple of three items:
-        -   A plotly figure.
-        -   Heating degree days as a HourlyContinuousCollection.
-        -   Cooling degree days as a HourlyContinuousCollection.
+        A DegreeDayEngine.
     """
-    
-    
-    lp_ap = AnalysisPeriod(1,1,_st_hour,12,31,_end_hour)
-    
-    filtered_data = SI_IP_Check(_dbt).filter_by_analysis_period(lp_ap)
-    
-    hourly_heat = filtered_data.compute_function_aligned(
-        heating_degree_time, [filtered_data, _heat_base_],
-        HeatingDegreeTime(), f'deg{unit}-hours')
-    hourly_heat.convert_to_unit(f'deg{unit}-days')
-
-    hourly_cool = filtered_data.compute_function_aligned(
-        cooling_degree_time, [filtered_data, _cool_base_],
-        CoolingDegreeTime(), f'deg{unit}-hours')
-    hourly_cool.convert_to_unit(f'deg{unit}-days')
+    return DegreeDayEngine.from_store(_store, st_hour, end_hour, data_unit)
 
-    months = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
-          'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+@sections.register('degree_days')
+def compute_degree_days(dd_st_hour: int, dd_end_hour: int, epw_hash: str, data_unit: str,
+                        degree_days_heat_base: float, degree_days_cool_base: float,
+                        degree_days_bases: tuple, global_colorset: str, _store: EPWStore) -> dict:
+    """Compute the figures, tables and totals of the degree days section."""
+    engine = get_degree_day_engine(epw_hash, dd_st_hour, dd_end_hour, data_unit, _store)
+    return degree_days_analysis(engine, degree_days_heat_base, degree_days_cool_base,
+                                'F' if data_unit == 'IP' else 'C', degree_days_bases)
 
-    monthly_chart_plt = Figure(data=[
-                                go.Bar(name = f'Heating Degree Days - deg{unit}days', x= months ,
-                                        y = hourly_heat.total_monthly().values, marker_color='indianred'),
-                                go.Bar(name = f'Cooling Degree Days - deg{unit}days', x = months,
-                                        y = hourly_cool.total_monthly().values, marker_color='blue')])
+sections.bind('degree_days', dd_st_hour=dd_st_hour, dd_end_hour=dd_end_hour, epw_hash=epw_hash,
+              data_unit=data_unit, degree_days_heat_base=degree_days_heat_base,
+              degree_days_cool_base=degree_days_cool_base, degree_days_bases=degree_days_bases,
+              global_colorset=global_colorset, _store=epw_store)
 
-    monthly_chart_plt.update_traces(marker_line_width=1.5, opacity=0.95)
-    monthly_chart_plt.update_layout(bargap = 0.1, title_text='Degree Days', xaxis_tickangle=-45, yaxis_range=[0,200])
+if sections.is_visible('degree_days'):
 
-    return monthly_chart_plt, hourly_heat, hourly_cool
-
-with st.container():
-    st.markdown('---')
-    st.header('Degree Days')
-    st.markdown('---')
-    st.markdown('**Degree days** is another way of combining time and temperature, but it has different implications for heating and cooling than does design temperature.')
-
-    if data_unit == 'SI':         
-        st.markdown('**Heating degree days (HDD)** – This is the number that tells you' 
-                    'how long a location stays below a special temperature called the base'
-                    'temperature.'
-                    f' For example, the most commonly used base temperature for heating is 18°C.'
-                    'So if the temperature at your house is 12°C for one hour, you just'
-                    ' accumulated 6 degree hours. If the temperature is 15°C for the next hour'
-                    ', you’ve got another 3 degree hours and 9 degree hours total.'
-                    'To find the number of degree days, you divide it by 24,'
-                    ' so you’ve got 0.375 degree day in this example.'
-                    'You can do that for every hour of the year to find the total and then divide by 24.'
-                    ' Or you can use the average temperature for each day to get degree days directly.')
-        st.markdown('**Cooling degree days (CDD)** – Same principle as for heating degree days but usually'
-                    'with a different base temperature which is here set as 24°C by default.') 
-    if data_unit == 'IP':         
-        st.markdown('**Heating degree days (HDD)** – This is the number that tells you' 
-                    'how long a location stays below a special temperature called the base'
-                    'temperature.'
-                    f' For example, the most commonly used base temperature for heating is 64.40°F.'
-                    'So if the temperature at your house is 54.40°F for one hour, you just'
-                    ' accumulated 10 degree hours. If the temperature is 59.40°F for the next hour'
-                    ', you’ve got another 5 degree hours and 15 degree hours total.'
-                    'To find the number of degree days, you divide it by 24,'
-                    ' so you’ve got 0.625 degree day in this example.'
-                    'You can do that for every hour of the year to find the total and then divide by 24.'
-                    ' Or you can use the average temperature for each day to get degree days directly.')
-        st.markdown('**Cooling degree days (CDD)** – Same principle as for heating degree days but usually'
-                    'with a different base temperature which is here set as 75.20°F by default.') 
+    with st.container():
+        st.markdown('---')
+        st.header('Degree Days')
+        st.markdown('---')
+        st.markdown('**Degree days** is another way of combining time and temperature, but it has different implications for heating and cooling than does design temperature.')
+
+        if data_unit == 'SI':         
+            st.markdown('**Heating degree days (HDD)** – This is the number that tells you' 
+                        'how long a location stays below a special temperature called the base'
+                        'temperature.'
+                        f' For example, the most commonly used base temperature for heating is 18°C.'
+                        'So if the temperature at your house is 12°C for one hour, you just'
+                        ' accumulated 6 degree hours. If the temperature is 15°C for the next hour'
+                        ', you’ve got another 3 degree hours and 9 degree hours total.'
+                        'To find the number of degree days, you divide it by 24,'
+                        ' so you’ve got 0.375 degree day in this example.'
+                        'You can do that for every hour of the year to find the total and then divide by 24.'
+                        ' Or you can use the average temperature for each day to get degree days directly.')
+            st.markdown('**Cooling degree days (CDD)** – Same principle as for heating degree days but usually'
+                        'with a different base temperature which is here set as 24°C by default.') 
+        if data_unit == 'IP':         
+            st.markdown('**Heating degree days (HDD)** – This is the number that tells you' 
+                        'how long a location stays below a special temperature called the base'
+                        'temperature.'
+                        f' For example, the most commonly used base temperature for heating is 64.40°F.'
+                        'So if the temperature at your house is 54.40°F for one hour, you just'
+                        ' accumulated 10 degree hours. If the temperature is 59.40°F for the next hour'
+                        ', you’ve got another 5 degree hours and 15 degree hours total.'
+                        'To find the number of degree days, you divide it by 24,'
+                        ' so you’ve got 0.625 degree day in this example.'
+                        'You can do that for every hour of the year to find the total and then divide by 24.'
+                        ' Or you can use the average temperature for each day to get degree days directly.')
+            st.markdown('**Cooling degree days (CDD)** – Same principle as for heating degree days but usually'
+                        'with a different base temperature which is here set as 75.20°F by default.') 
                 
 
-    degree_days_figure, hourly_heat, hourly_cool = get_degree_days_figure(dd_st_hour,dd_end_hour,
-        global_epw.dry_bulb_temperature, degree_days_heat_base,
-        degree_days_cool_base,global_colorset)
+        degree_days = sections.result('degree_days')
 
-    st.plotly_chart(degree_days_figure, use_container_width=True,
-                    config=get_figure_config(
-                        f'Degree days_{global_epw.location.city}'))
-    col1, col2  = st.columns(2)
-    with col1:
-        st.metric(':blue[**TOTOAL COOLING DEGREE DAYS**]', value = round(hourly_cool.total))
-    with col2:
-        st.metric(':red[**TOTAL HEATING DEGREE DAYS**]', value = round(hourly_heat.total))
+        st.plotly_chart(degree_days['figure'], use_container_width=True,
+                        config=get_figure_config(
+                            f'Degree days_{global_epw.location.city}'))
+        col1, col2  = st.columns(2)
+        with col1:
+            st.metric(':blue[**TOTOAL COOLING DEGREE DAYS**]', value = round(degree_days['cooling_total']))
+        with col2:
+            st.metric(':red[**TOTAL HEATING DEGREE DAYS**]', value = round(degree_days['heating_total']))
 
+        st.plotly_chart(degree_days['curve_figure'], use_container_width=True,
+                        config=get_figure_config(
+                            f'Degree days versus base_{global_epw.location.city}'))
+        heating_tab, cooling_tab = st.tabs(['Monthly Heating Degree Days', 'Monthly Cooling Degree Days'])
+        with heating_tab:
+            st.dataframe(degree_days['heating_table'], use_container_width=True)
+        with cooling_tab:
+            st.dataframe(degree_days['cooling_table'], use_container_width=True)
 
-#Saving image
-degree_days_figure.write_image("CDD_HDD.png")
 
 #Distributed DBT Plot
 #------------------------------------------------------------------------------
-import plotly.express as px
+lap('temperature_bins')
 
 with st.sidebar:
     
     with st.expander('Temperature Range'):
-        if data_unit == 'SI':
-            min_val_bin = st.number_input("Minimum Value", min_value = -20, max_value = 0, value = 0)
-            max_val_bin = st.number_input("Maximum Value", min_value = 20, max_value = 60, value = 40)
-        elif data_unit == 'IP':
-            min_val_bin = st.number_input("Minimum Value", min_value = -4, max_value = 32, value = 32)
-            max_val_bin = st.number_input("Maximum Value", min_value = 68, max_value = 140, value = 104)
+        temp_bin_field = st.selectbox('Variable', options=FIELDS.keys(),
+                                      index=list(FIELDS).index('Dry Bulb Temperature'), key='temp_bin_field')
+        if temp_bin_field == 'Dry Bulb Temperature':
+            if data_unit == 'SI':
+                min_val_bin = st.number_input("Minimum Value", min_value = -20, max_value = 0, value = 0)
+                max_val_bin = st.number_input("Maximum Value", min_value = 20, max_value = 60, value = 40)
+            elif data_unit == 'IP':
+                min_val_bin = st.number_input("Minimum Value", min_value = -4, max_value = 32, value = 32)
+                max_val_bin = st.number_input("Maximum Value", min_value = 68, max_value = 140, value = 104)
 
-        steps = st.slider("Number of Steps", min_value = 1, max_value = 5, value = 2)
+            steps = st.slider("Number of Steps", min_value = 1, max_value = 5, value = 2)
+        else:
+            bin_statistics = epw_statistics.annual(FIELDS[temp_bin_field], data_unit)
+            bin_key = f'{FIELDS[temp_bin_field]}_{data_unit}'
+            min_val_bin = st.number_input("Minimum Value", value = float(np.floor(bin_statistics['min'])),
+                                          key = f'min_val_bin_{bin_key}')
+            max_val_bin = st.number_input("Maximum Value", value = float(np.ceil(bin_statistics['max'])),
+                                          key = f'max_val_bin_{bin_key}')
+            steps = st.number_input("Bin Width", min_value = 0.01,
+                                    value = float(max(np.ceil((max_val_bin - min_val_bin) / 20), 1)),
+                                    key = f'bin_width_{bin_key}')
+
+        temp_bin_view = st.radio('Distribution', ['Period', 'Stacked monthly', 'Cumulative'],
+                                 key='temp_bin_view', horizontal=True)
         temp_bin_st_month = st.number_input(
             'Start month', min_value=1, max_value=12, value=1, key='temp_bin_st_month')
         temp_bin_end_month = st.number_input(
@@ -1261,268 +1071,287 @@ with st.sidebar:
         temp_bin_end_hour = st.number_input(
             'End hour', min_value=0, max_value=23, value=23, key='temp_bin_end_hour')
 
-with st.container():
-    
-    st.markdown('---')
-    st.header('Distributed Temperature Plot')
-    st.markdown('---')
-    
-       
-    dbt = SI_IP_Check(global_epw.dry_bulb_temperature).filter_by_analysis_period(AnalysisPeriod(temp_bin_st_month,
-                                                                                   temp_bin_st_day, temp_bin_st_hour,
-                                                                                   temp_bin_end_month, temp_bin_end_day, temp_bin_end_hour))
-    
-     
-    db_df = pd.DataFrame(list(dbt.values), columns = ['Dry Bulb Temperature'])
-    
-    bins = list(np.arange(min_val_bin,max_val_bin,steps))
-    
-    @st.cache_data(ttl=2)
-    def get_ranges():
-        ranges = []
-        for i in range(0,(len(bins)-1)):
-            x = str(f'{bins[i]}-{bins[i]+steps}°{unit}')
-            ranges.append(x)
-        return ranges
-    
-    ranges_str = get_ranges()
-    
-    db_df['Temperature Range'] = pd.cut(db_df['Dry Bulb Temperature'], bins, labels = ranges_str)
-    db_df_grouped = db_df.groupby('Temperature Range').count()
-    
-    temp_bins_plot = px.bar(db_df_grouped, text_auto=True)
-    temp_bins_plot = temp_bins_plot.update_traces(textfont_size=12, textangle=0, textposition="outside", cliponaxis=False)
-    
-    st.plotly_chart(temp_bins_plot, use_container_width=True)
-
-
-Maximum_bin = db_df.index[(db_df["Dry Bulb Temperature"].argmax())]
-Minimum_bin = db_df.index[(db_df["Dry Bulb Temperature"].argmin())]
+@instrument_cache(st.cache_data(max_entries=64))
+def get_distribution(epw_hash: str, field: int, data_unit: str, period: tuple, min_val_bin: float,
+                     max_val_bin: float, steps: float, _store: EPWStore) -> Distribution:
+    """Get the binned distribution of an EPW field over an analysis period.
+    Args:
+        epw_hash: SHA-256 of the EPW file, used as the cache key of the store.
+        field: EPW field number.
+        data_unit: Either 'SI' or 'IP'.
+        period: Start month, day, hour and end month, day, hour of the period.
+        min_val_bin: Lower edge of the first bin.
+        max_val_bin: Upper edge of the last bin.
+        steps: Width of the bins.
+        _store: Columnar store of the EPW file.
+    Returns:
+        A Distribution.
+    """
+    return store_histogram(_store, field, AnalysisPeriod(*period),
+                           bin_edges(min_val_bin, max_val_bin, steps), data_unit)
+
+@sections.register('temperature_bins')
+def compute_temperature_bins(epw_hash: str, data_unit: str, temp_bin_field: str, min_val_bin: float,
+                             max_val_bin: float, steps: float, st_month: int, st_day: int, st_hour: int,
+                             end_month: int, end_day: int, end_hour: int, _store: EPWStore) -> dict:
+    """Compute the figures and extreme bins of the distributed temperature section."""
+    field = FIELDS[temp_bin_field]
+    distribution = get_distribution(epw_hash, field, data_unit,
+                                    (st_month, st_day, st_hour, end_month, end_day, end_hour),
+                                    min_val_bin, max_val_bin, steps, _store)
+    return temperature_bins_analysis(distribution, temp_bin_field, _store.unit(field, data_unit))
+
+sections.bind('temperature_bins', epw_hash=epw_hash, data_unit=data_unit, temp_bin_field=temp_bin_field,
+              min_val_bin=min_val_bin, max_val_bin=max_val_bin, steps=steps, st_month=temp_bin_st_month,
+              st_day=temp_bin_st_day, st_hour=temp_bin_st_hour, end_month=temp_bin_end_month,
+              end_day=temp_bin_end_day, end_hour=temp_bin_end_hour, _store=epw_store)
+
+if sections.is_visible('temperature_bins'):
 
+    with st.container():
+        
+        st.markdown('---')
+        st.header('Distributed Temperature Plot')
+        st.markdown('---')
+        
+        if max_val_bin < min_val_bin:
+            st.warning('Set a maximum value above the minimum value to draw the distribution.')
+        else:
+            st.plotly_chart(sections.result('temperature_bins')['figures'][temp_bin_view], use_container_width=True)
 
-#Saving image
-temp_bins_plot.write_image('temp-bins.png')
 
 #Pair Plots
 #------------------------------------------------------------------------------
+lap('pair_plots')
 
 with st.sidebar:
     with st.expander('Monthly Density Pair Plots'):
 
         variable_selected_01 = st.selectbox(
-                'Select the first environmental variable (X Axis)', options=fields.keys(), key='monthlypair01', index = 2)
-        monthly_variable_01 = SI_IP_Check(global_epw._get_data_by_field(fields[variable_selected_01]))
+                'Select the first environmental variable (X Axis)', options=FIELDS.keys(), key='monthlypair01', index = 2)
 
         variable_selected_02 = st.selectbox(
-                'Select the second environmental variable (Y Axis)', options=fields.keys(), key='monthlypair02', index = 0)
-        monthly_variable_02 = SI_IP_Check(global_epw._get_data_by_field(fields[variable_selected_02]))
-
-@st.cache_data(ttl=2)
-def get_monthly_dbt():
-    var_monthly_01 = []
-    var_monthly_02 = []
-    for i in range(1,13):
-        var01= monthly_variable_01.group_by_month()[i]
-        var02 = monthly_variable_02.group_by_month()[i]
-        var_monthly_01.append(var01)
-        var_monthly_02.append(var02)
-        dic_vars = {f'{monthly_variable_01._header._data_type}':var_monthly_01, f'{monthly_variable_02._header._data_type}':var_monthly_02}
-        df_monthly = pd.DataFrame(dic_vars)
-    return df_monthly
-
-Monthly_DF = get_monthly_dbt()
-
-months = {0:'January',1:'February', 2:'March',3:'April',4:'May',5:'June',6:'July',7:'August',8:'September',9:'October',10:'November',11:'December'}
+                'Select the second environmental variable (Y Axis)', options=FIELDS.keys(), key='monthlypair02', index = 0)
 
-with st.container():
-
-    st.markdown('---')
-    st.header('Monthly Density Pair Plots')
-    st.markdown('---')
-
-    cols = st.columns(6)
-    pair_01_save_img = []
-    
-    for col, month in zip(range(0,6), range(0,6)):
-        
-        with cols[col]:
-            Pair_01_hp = px.density_heatmap(Monthly_DF, x = Monthly_DF[variable_selected_01][month], y = Monthly_DF[variable_selected_02][month], orientation  = 'v', labels = {'x':variable_selected_01,'y':variable_selected_02}, title = months[month], width = 350)
-            st.plotly_chart(Pair_01_hp, use_container_width=True)
-
-    for col, month in zip(range(0,6), range(6,13)):
-        with cols[col]:
-            Pair_02_hp = px.density_heatmap(Monthly_DF, x = Monthly_DF[variable_selected_01][month], y = Monthly_DF[variable_selected_02][month], orientation  = 'v', labels = {'x':variable_selected_01,'y':variable_selected_02},title = months[month], width = 350)
-            st.plotly_chart(Pair_02_hp, use_container_width=True)
-
-
-#Generate the REPORT in WORD
-#------------------------------------------------------------------------------
-
-from docx import Document
-from docx.shared import Inches
+@instrument_cache(st.cache_data(max_entries=32))
+def get_joint_distribution(epw_hash: str, field_01: int, field_02: int, data_unit: str,
+                           _store: EPWStore) -> JointDistribution:
+    """Get the monthly 2-D histogram of two EPW fields.
+    Args:
+        epw_hash: SHA-256 of the EPW file, used as the cache key of the store.
+        field_01: EPW field number of the X axis.
+        field_02: EPW field number of the Y axis.
+        data_unit: Either 'SI' or 'IP'.
+        _store: Columnar store of the EPW file.
+    Returns:
+        A JointDistribution.
+    """
+    return store_joint_histogram(_store, field_01, field_02, data_unit)
 
+@sections.register('pair_plots')
+def compute_pair_plots(epw_hash: str, data_unit: str, variable_selected_01: str,
+                       variable_selected_02: str, _store: EPWStore) -> Figure:
+    """Compute the monthly density figure of the pair plots section."""
+    field_01, field_02 = FIELDS[variable_selected_01], FIELDS[variable_selected_02]
+    joint = get_joint_distribution(epw_hash, field_01, field_02, data_unit, _store)
+    return pair_plot_figure(joint, f'{variable_selected_01} ({_store.unit(field_01, data_unit)})',
+                                f'{variable_selected_02} ({_store.unit(field_02, data_unit)})')
 
-# export_as_docs = st.button("Export Report (.docx)")
+sections.bind('pair_plots', epw_hash=epw_hash, data_unit=data_unit,
+              variable_selected_01=variable_selected_01, variable_selected_02=variable_selected_02,
+              _store=epw_store)
 
-document = Document()
+if sections.is_visible('pair_plots'):
 
-x = 2
-h_res = x
-w_res = 3*x
+    with st.container():
 
-document.add_heading(f'Weather Analysis for {global_epw.location.city} ', level= 0)
+        st.markdown('---')
+        st.header('Monthly Density Pair Plots')
+        st.markdown('---')
 
-p1 = document.add_paragraph('This report outlines the Weather Analysis for ')
-p1.add_run(f'{global_epw.location.city}').bold = True
-p1.add_run(' located in ')
-p1.add_run(f'{global_epw.location.country}').bold = True
-p1.add_run(' in the following sections: ')
+        st.plotly_chart(sections.result('pair_plots'), use_container_width=True)
 
-document.add_paragraph('Periodic Weather Data Analysis', style='List Number')
-p2 = document.add_paragraph('The following graphs illustrate the ')
-p2.add_run(f'{hourly_selected}').bold = True
-p2.add_run(f' variable for the selected period in which the average {hourly_selected} is {ave_val}{var_unit} for the year,'
-           f' and ranges from {min_value}{var_unit} up to {max_value}{var_unit} (Figure 1).'
-           f' Figure 2 and Figure 3 show the mean daily values and {hourly_selected} variation per day.')
 
-document.add_picture('hourly_data.png', width=Inches(w_res), height= Inches(h_res))
-document.add_paragraph(f'Figure 1. Hourly {hourly_selected} Analysis', style='Caption')
+# EPW Comparison - deltas of the compared files against the uploaded one
+#------------------------------------------------------------------------------
+lap('comparison')
 
-document.add_picture('Daily_data.png', width=Inches(w_res), height= Inches(h_res))
-document.add_paragraph(f'Figure 2. Mean Daily {hourly_selected} Analysis', style='Caption')
+@instrument_cache(st.cache_resource(max_entries=8))
+def get_compared_stores(epw_hashes: Tuple[str, ...], _files: Tuple[bytes, ...]) -> List[EPWStore]:
+    """Get the columnar stores of the compared EPW files, parsing the new ones in parallel.
+    Args:
+        epw_hashes: SHA-256 of each EPW file, used as the cache key of the stores.
+        _files: Raw content of each EPW file.
+    Returns:
+        The EPWStore of each file.
+    """
+    return load_stores(_files)
+
+@sections.register('comparison')
+def compute_comparison(epw_names: tuple, epw_hashes: tuple, data_unit: str, compare_selected: str,
+                       heat_base: float, cool_base: float, dd_st_hour: int, dd_end_hour: int,
+                       _store: EPWStore, _compare_files: tuple) -> dict:
+    """Compute the delta figures and tables of the compared EPW files against the uploaded one."""
+    stores = [_store] + get_compared_stores(epw_hashes[1:], _compare_files)
+    summaries = summarize_stores(stores, list(FIELDS.values()), heat_base, cool_base,
+                                 dd_st_hour, dd_end_hour, data_unit)
+    field = FIELDS[compare_selected]
+    return comparison_analysis(epw_names, summaries, field, _store.unit(field, data_unit), unit)
+
+if compare_files:
+    compare_bytes = tuple(compare_file.getvalue() for compare_file in compare_files)
+    sections.bind('comparison', epw_names=(epw_data.name if epw_data else 'sample.epw',)
+                  + tuple(compare_file.name for compare_file in compare_files),
+                  epw_hashes=(epw_hash,) + tuple(content_hash(epw_bytes) for epw_bytes in compare_bytes),
+                  data_unit=data_unit, compare_selected=compare_selected,
+                  heat_base=degree_days_heat_base, cool_base=degree_days_cool_base,
+                  dd_st_hour=dd_st_hour, dd_end_hour=dd_end_hour,
+                  _store=epw_store, _compare_files=compare_bytes)
+
+if compare_files and sections.is_visible('comparison'):
 
-document.add_picture('Line_data.png', width=Inches(w_res), height= Inches(h_res))
-document.add_paragraph(f'Figure 3. Average/Range {hourly_selected} Analysis', style='Caption')
+    with st.container():
 
-document.add_paragraph(f'Conditional Hourly Data: {hourly_selected}', style='List Number')
-p3 = document.add_paragraph('Below graph plots the given thresholds between')
-p3.add_run(f' {threshold_min}{var_unit}').bold= True
-p3.add_run(' and ')
-p3.add_run(f'{threshold_max}{var_unit}').bold = True 
-p3.add_run(f' for {hourly_selected}. Additionally, the number of met hours within the given range is {met_num_hours}hrs and unmet hours is {unmet_num_hours}hrs.')
+        st.markdown('---')
+        st.header('EPW Comparison')
+        st.markdown('---')
 
-document.add_picture('conditional_hourly_data.png', width=Inches(w_res), height= Inches(h_res))
-document.add_paragraph(f'Figure 4. Hourly Conditional Analysis of {hourly_selected}', style='Caption')
+        comparison = sections.result('comparison')
+        st.plotly_chart(comparison['monthly_figure'], use_container_width=True)
+        st.dataframe(comparison['monthly_table'], use_container_width=True)
 
-document.add_paragraph('Psychrometric Chart', style='List Number')
-document.add_paragraph('A psychrometric chart can be used in two different ways.'
-                            ' The first is done by plotting multiple data points, that represent'
-                            ' the air conditions at a specific time, on the chart. Then, overlaying'
-                            ' an area that identifies the “comfort zone.” The comfort zone is defined '
-                            'as the range within occupants are satisfied with the surrounding thermal '
-                            'conditions. After plotting the air conditions and overlaying the comfort '
-                            'zone, it becomes possible to see how passive design strategies can extend '
-                            'the comfort zone.')
+        col1, col2 = st.columns(2)
+        with col1:
+            st.plotly_chart(comparison['degree_days_figure'], use_container_width=True)
+            st.dataframe(comparison['degree_days_table'], use_container_width=True)
+        with col2:
+            st.plotly_chart(comparison['ts_figure'], use_container_width=True)
+            st.dataframe(comparison['ts_table'], use_container_width=True)
 
-document.add_picture('psy_main.png', width=Inches(w_res), height= Inches(h_res*2))
-document.add_paragraph('Figure 5. Psychrometric Chart Analysis', style='Caption')
 
-document.add_paragraph(f'The chart above depicts the hourly distribution of the outdoor air condition throughout the year associated with hourly relative humidty and humidity ratio.'
-                            f' In particular, having a Clothing Level of {psy_clo_value} and Metabloic Rate of {psy_met_value}'
-                            ' resulted in the following statistics:')
-if psy_radio == 'Hourly Data':
-    
-    document.add_paragraph(f'{strategies_percentages[5]}% of the time is in comfortable range without the need of any passive/active strategies.', style = 'List Bullet')
-    document.add_paragraph(f'{strategies_percentages[0]}% of the time, internal heat gains can improve the environmental condition to meet the comfortable range.', style = 'List Bullet')
-    document.add_paragraph(f'{strategies_percentages[1]}% of the time, occupants can use fans (assuming 1m/s (2.23mph) of air velocity around the occupant) to reduce the temperature and improve thermal comfort.', style = 'List Bullet')
-    document.add_paragraph(f'{strategies_percentages[2]}% of the time, thermal massing and night ventilation allow the possibility to maintain the heat during the day and release it during the night to reduce the temperature passively.', style = 'List Bullet')
-    document.add_paragraph(f'{strategies_percentages[3]}% of the time, passive solar heat gains can increase the temperature as an additional potential. Noting that it assumes a 50W/m2 outdoor solar flux (W/m2) that is needed to raise the temperature of a theoretical building by 1 degree Celsius and can maintain its temperature for 8 hours.', style = 'List Bullet')
-    document.add_paragraph(f'{strategies_percentages[4]}% of the time, evaporative cooling strategy has the opportunity to cool down the building while increasing the relative humidity.', style = 'List Bullet')
-else:
+#Generate the REPORT in WORD
+#------------------------------------------------------------------------------
+lap('report')
+
+# The report is only assembled when requested. It reads the results (and figures)
+# of every section, hidden ones included, so those are computed on demand.
+@instrument_cache(st.cache_resource)
+def get_report_builder() -> ReportBuilder:
+    """Process pool building the reports of every session."""
+    return ReportBuilder()
+
+@instrument_cache(st.cache_resource)
+def get_figure_exporter() -> FigureExporter:
+    """Process pool exporting the report figures of every session."""
+    return FigureExporter()
+
+def get_report_inputs(progress: Callable[[int, int], None] = None) -> Tuple[dict, dict]:
+    """Compute the sections read by the report and collect its text values and figures."""
+    results = {name: sections.result(name) for name in REPORT_SECTIONS}
+    context = report_context(report_parameters, global_epw.location.city, global_epw.location.country,
+                             results)
+    # figures are exported again only when the inputs of their section changed
+    figures = {name: (f'{sections.key(section)}-{name}', get_figure(results[section]))
+               for name, (section, get_figure) in REPORT_FIGURES.items()}
+    images = get_figure_exporter().export(figures, progress)
+    return context, images
+
+report_builder = get_report_builder()
+# The dashboard inputs quoted by the report, as the batch command line takes them
+report_parameters = ReportParameters(
+    data_unit=data_unit, colorset=global_colorset, hourly_selected=hourly_selected,
+    period=(hourly_data_st_month, hourly_data_st_day, hourly_data_st_hour,
+            hourly_data_end_month, hourly_data_end_day, hourly_data_end_hour),
+    threshold_min=threshold_min, threshold_max=threshold_max,
+    conditions=tuple((name, condition.minimum, condition.maximum)
+                     for name, condition in zip(condition_fields, conditions[1:])),
+    psy_strategy=psy_selected_strategy, psy_draw_polygons=psy_draw_polygons, psy_selected=psy_selected,
+    psy_clo_value=psy_clo_value, psy_met_value=psy_met_value, psy_air=psy_air,
+    windrose_period=(windrose_st_month, windrose_st_day, windrose_st_hour,
+                     windrose_end_month, windrose_end_day, windrose_end_hour),
+    sunpath_selected=sunpath_selected, sunpath_switch=bool(sunpath_switch),
+    degree_days_heat_base=degree_days_heat_base, degree_days_cool_base=degree_days_cool_base,
+    dd_st_hour=dd_st_hour, dd_end_hour=dd_end_hour, temp_bin_field=temp_bin_field,
+    min_val_bin=min_val_bin, max_val_bin=max_val_bin, steps=steps,
+    temp_bin_period=(temp_bin_st_month, temp_bin_st_day, temp_bin_st_hour,
+                     temp_bin_end_month, temp_bin_end_day, temp_bin_end_hour))
+# Inputs of the report that are not inputs of its sections
+report_key = fingerprint({
+    'sections': [sections.key(name) for name in REPORT_SECTIONS],
+    'var_unit': var_unit, 'min_value': min_value, 'max_value': max_value,
+    'threshold_min': threshold_min, 'threshold_max': threshold_max,
+    'psy_radio': psy_radio, 'unit': unit, 'min_val_bin': min_val_bin, 'max_val_bin': max_val_bin})
+
+if psy_radio != 'Hourly Data':
     with st.container():
         
         st.error('In order to have the analysis in line with the generated report, we suggest to select'+' Hourly Data Option '+'for Psychrometric chart analysis!', icon="❌")
-    
-document.add_paragraph('Wind Rose Diagrams', style='List Number')
-document.add_paragraph('Wind roses are graphical charts that characterize the speed and direction'
-                       ' of winds at a location. Presented in a circular format, the length of each'
-                       ' "spoke" around the circle indicates the amount of time that the wind blows'
-                       ' from a particular direction. Colors along the spokes indicate categories'
-                       ' of wind speed. Additionally, the other diagrams plot the correlation between the wind direction and'
-                       ' Dry Bulb Temperature, Direct/Diffuse Solar Radiation which is helpful to understand'
-                       ' the possibilities of utilizing natural ventilation and shading strategies.')
-
-document.add_picture('windrose.png', width=Inches(4.2), height= Inches(3))
-document.add_paragraph('Figure 6. Wind Direction vs. Dry Bulb Temperature', style='Caption')
-document.add_picture('windrose-temp.png', width=Inches(4.2), height= Inches(3))
-document.add_paragraph('Figure 7. Wind Rose vs. Wind Direction', style='Caption')
-document.add_picture('windrose-dir.png', width=Inches(4.2), height= Inches(3))
-document.add_paragraph('Figure 8. Wind Rose vs. Direct Solar Radiation', style='Caption')
-document.add_picture('windrose-diff.png', width=Inches(4.2), height= Inches(3))
-document.add_paragraph('Figure 9. Wind Rose vs. Diffuse Solar Radiation', style='Caption')
-
-document.add_paragraph('Sunpath Diagram', style='List Number')
-document.add_paragraph('Solar charts and sun path diagrams have been devised as visual'
-                       'aids so that the solar position can be easily and quickly established'
-                       'for any hour in any day, to provide a valuable tool for designers and planners.'
-                       'A separate sun path diagram is required for each latitude.'
-                       ' Additionally, plotting one of the environmental variables on the sunpath diagram'
-                       ' can help to understand its variation across the sun position.')
-
-document.add_picture('Sunpath.png', width=Inches(4.2), height= Inches(3))
-document.add_paragraph('Figure 10. Sunpath Diagram', style='Caption')
-
-document.add_paragraph('Cooling/Heating Degree Days/Hours', style='List Number')
-if data_unit == 'SI':
-    document.add_paragraph('Degree days is another way of combining time and temperature, but it has different implications for heating and cooling than does design temperature.'
-                        ' Heating degree days (HDD) – This is the number that tells you' 
-                    'how long a location stays below a special temperature called the base'
-                    'temperature.'
-                    'For example, the most commonly used base temperature for heating is 18°C.'
-                    'So if the temperature at your house is 12°C for one hour, you just'
-                    ' accumulated 6 degree hours. If the temperature is 15°C for the next hour'
-                    ', you’ve got another 3 degree hours and 9 degree hours total.'
-                    'To find the number of degree days, you divide it by 24,'
-                    ' so you’ve got one degree day in this example.'
-                    'You can do that for every hour of the year to find the total and then divide by 24.'
-                    ' Or you can use the average temperature for each day to get degree days directly.'
-                    'Same principle as for heating degree days applies to Cooling degree days (CDD) but '
-                    'with a different base temperature which is typically set as 24°C by default.') 
-elif data_unit == 'IP':
-    document.add_paragraph('Degree days is another way of combining time and temperature, but it has different implications for heating and cooling than does design temperature.'
-                        ' Heating degree days (HDD) – This is the number that tells you' 
-                    'how long a location stays below a special temperature called the base'
-                    'temperature.'
-                    'For example, the most commonly used base temperature for heating is 64.40°F.'
-                    'So if the temperature at your house is 54.40°F for one hour, you just'
-                    ' accumulated 10 degree hours. If the temperature is 59.40°F for the next hour'
-                    ', you’ve got another 5 degree hours and 15 degree hours total.'
-                    'To find the number of degree days, you divide it by 24,'
-                    ' so you’ve got 0.625 degree day in this example.'
-                    'You can do that for every hour of the year to find the total and then divide by 24.'
-                    ' Or you can use the average temperature for each day to get degree days directly.'
-                    'Same principle as for heating degree days but usually'
-                    'with a different base temperature which is here set as 75.20°F by default.') 
-    
-document.add_paragraph(f'Choosing {degree_days_heat_base}°{unit} and {degree_days_cool_base}°{unit} as heating and cooling base temperatures, respectively, from hour {dd_st_hour}a.m. until {dd_end_hour}p.m.,'
-                       f' the total HEATING DEGREE DAYS and COOLING DEGREE DAYS are respetively {round(hourly_heat.total,0)} and {round(hourly_cool.total,0)} in {global_epw.location.city}')
-document.add_picture('CDD_HDD.png', width=Inches(w_res), height= Inches(h_res*1.5))
-document.add_paragraph('Figure 11. Cooling/Heating Degree Days', style='Caption')
-
-
-document.add_paragraph('Distributed Temperature Plot', style='List Number')
-p4 = document.add_paragraph('To better understand the outdoor temperature levels, the figure below divides the dry'
-                       f' bulb temperature into sequential bins from the minimum value of {min_val_bin}°{unit} up to the maximum value of {max_val_bin}°{unit}'
-                       f' where the highest and lowest intensities are')
-p4.add_run(f' {Maximum_bin} and ').bold= True   
-p4.add_run(f'{Minimum_bin}').bold= True          
-p4.add_run(' respectively')              
-                       
-
-document.add_picture('temp-bins.png', width=Inches(w_res), height= Inches(h_res*1.5))
-document.add_paragraph('Figure 12. Temperature Ranges', style='Caption')
-
-
-buffer = io.BytesIO()
-document.save(buffer)
-export_as_docs = st.download_button(
-        label="Download the Report.docx",
-        data=buffer,
-        file_name=f'WeatherAnalysis-{global_epw.location.city}.docx',
-        mime='application/vnd.openxmlformats-officedocument.wordprocessingml.document'
-    )
+
+report_steps = len(REPORT_SECTIONS) + 2
+report = report_builder.get(report_key)
+future = None if report is not None else report_builder.pending(report_key)
+if report is None and future is None and st.button('Generate the Report.docx', key='generate_report'):
+    progress = st.progress(0.0, text='Computing the report sections...')
+    try:
+        for i, name in enumerate(REPORT_SECTIONS):
+            sections.result(name)
+            progress.progress((i + 1) / report_steps, text=f'Computed {sections.titles[name]}')
+        context, images = get_report_inputs(lambda done, total: progress.progress(
+            (len(REPORT_SECTIONS) + done / total) / report_steps, text=f'Exported {done}/{total} figures'))
+    except ValueError as error:
+        # invalid inputs, eg. a temperature range whose maximum is below its minimum
+        progress.empty()
+        st.error(f'The report could not be generated: {error}', icon="❌")
+    else:
+        future = report_builder.submit(report_key, context, images)
+elif future is not None:
+    # the report was requested by an earlier rerun and is still being built
+    progress = st.progress(0.0)
+
+if future is not None:
+    progress.progress((report_steps - 1) / report_steps, text='Assembling the document...')
+    try:
+        with measure('assemble report', 'report'):
+            report = future.result()
+    except Exception as error:
+        st.error(f'The report could not be generated: {error}', icon="❌")
+    progress.empty()
+
+if report is not None:
+    export_as_docs = st.download_button(
+            label="Download the Report.docx",
+            data=report,
+            file_name=f'WeatherAnalysis-{global_epw.location.city}.docx',
+            mime='application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+        )
 
 st.markdown('Please note that the generated report will take your inputs as the basis of the weather analysis. Therefore, make sure you have selected the right values/thresholds and proper environmental variables given in the control panel based on your design needs.')
 # st.markdown('**The REPORT is in your DOWNLOADS folder now, ENJOY READING!**')
 
+# Instrumentation panel - the records of this rerun and the totals of the process
+#------------------------------------------------------------------------------
+
+if recorder is not None:
+    activate(None)
+    metrics = get_metrics()
+    metrics.add(recorder.finish())
+    if METRICS_FILE:
+        metrics.write(METRICS_FILE)
+
+with st.sidebar:
+    with st.expander('Performance'):
+        st.checkbox('Record timings, cache hits and memory', value=DEFAULT_ENABLED, key='instrumented',
+                    help='Measure every section, cached function and figure export of each rerun. '
+                         'Tracing memory slows the dashboard down.')
+        if recorder is not None:
+            st.metric('Rerun', f'{recorder.seconds * 1000:.0f} ms')
+            st.dataframe([{
+                'Name': '\u2003' * record.depth + record.name, 'Kind': record.kind,
+                'Cache': '' if record.kind == 'view' else 'hit' if record.hit else 'miss', 'Time (ms)': round(record.seconds * 1000, 1),
+                'Allocated (MB)': None if record.allocated is None else round(record.allocated / 1e6, 2),
+                'Peak (MB)': None if record.peak is None else round(record.peak / 1e6, 2),
+            } for record in recorder.records], hide_index=True, use_container_width=True)
+            st.download_button('Download metrics (Prometheus)', data=get_metrics().to_prometheus(),
+                               file_name='epwviz.prom', mime='text/plain')
+
 # %%
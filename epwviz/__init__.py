@@ -0,0 +1,4 @@
+"""Compute helpers behind the EPW Visualiser Toolkit dashboard."""
+from .cache import EPWCache, content_hash
+
+__all__ = ['EPWCache', 'content_hash']
@@ -0,0 +1,1006 @@
+"""Streamlit independent computations of the dashboard sections.
+
+Each function computes the figures and values of one dashboard section from
+an EPWStore, its ladybug collections or the engines built from it. Nothing
+here touches Streamlit, so the module can be used from notebooks, worker
+processes and scripts. The dashboard wraps these functions in its cached
+sections, and the batch command line (epwviz.batch) calls them directly, so
+both produce the same report.
+"""
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from ladybug.analysisperiod import AnalysisPeriod
+from ladybug.color import Color, Colorset
+from ladybug.datacollection import HourlyContinuousCollection, HourlyDiscontinuousCollection
+from ladybug.datatype.fraction import HumidityRatio
+from ladybug.datatype.pressure import Pressure
+from ladybug.datatype.specificenergy import Enthalpy
+from ladybug.datatype.temperature import WetBulbTemperature
+from ladybug.epw import EPWFields
+from ladybug.header import Header
+from ladybug.hourlyplot import HourlyPlot
+from ladybug.legend import LegendParameters
+from ladybug.psychchart import PsychrometricChart
+from ladybug_charts.utils import Strategy
+from plotly.graph_objects import Figure
+from plotly.subplots import make_subplots
+
+from .compare import StationSummary
+from .conditions import Condition, ConditionResult, Threshold
+from .degreedays import DegreeDayEngine, DegreeDays
+from .downsample import DEFAULT_POINTS, lttb
+from .histogram import Distribution, JointDistribution, bin_edges, bin_labels, store_histogram
+from .periods import filter_period, period_key, period_rows
+from .pmv import PMVSweep, fanger_pmv
+from .psychrometrics import Psychrometrics, psychrometrics
+from .solar import SolarTable, open_solar_table, sunpath_figure
+from .stats import EPWStatistics
+from .store import EPWStore, FIELD_NAMES
+from .strategies import STRATEGY_LABELS, chart_points, strategy_polygons
+from .thermal import ThermalSensation
+from .units import convert_values
+from .windrose import WindRoseEngine, wind_rose_figure, wind_rose_small_multiples
+
+# Colorsets of the legends, by name
+COLORSETS = {
+    'original': Colorset.original(),
+    'nuanced': Colorset.nuanced(),
+    'annual_comfort': Colorset.annual_comfort(),
+    'benefit': Colorset.benefit(),
+    'benefit_harm': Colorset.benefit_harm(),
+    'black_to_white': Colorset.black_to_white(),
+    'blue_green_red': Colorset.blue_green_red(),
+    'cloud_cover': Colorset.cloud_cover(),
+    'cold_sensation': Colorset.cold_sensation(),
+    'ecotect': Colorset.ecotect(),
+    'energy_balance': Colorset.energy_balance(),
+    'energy_balance_storage': Colorset.energy_balance_storage(),
+    'glare_study': Colorset.glare_study(),
+    'harm': Colorset.harm(),
+    'heat_sensation': Colorset.heat_sensation(),
+    'multi_colored': Colorset.multi_colored(),
+    'multicolored_2': Colorset.multicolored_2(),
+    'multicolored_3': Colorset.multicolored_3(),
+    'openstudio_palette': Colorset.openstudio_palette(),
+    'peak_load_balance': Colorset.peak_load_balance(),
+    'shade_benefit': Colorset.shade_benefit(),
+    'shade_benefit_harm': Colorset.shade_benefit_harm(),
+    'shade_harm': Colorset.shade_harm(),
+    'shadow_study': Colorset.shadow_study(),
+    'therm': Colorset.therm(),
+    'thermal_comfort': Colorset.thermal_comfort(),
+    'view_study': Colorset.view_study()
+}
+
+# EPW variable name to its field number, for the variables offered by the dashboard
+FIELDS = {EPWFields._fields[i]['name'].name: i for i in range(6, 23)}
+
+MONTH_NAMES = ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec')
+MONTH_FULL_NAMES = ('January', 'February', 'March', 'April', 'May', 'June', 'July', 'August',
+                    'September', 'October', 'November', 'December')
+
+# Passive strategy option of the psychrometric chart to the strategies it draws
+PSYCHROMETRIC_STRATEGIES = {
+    'Comfort': [Strategy.comfort],
+    'Evaporative Cooling': [Strategy.evaporative_cooling],
+    'Mass + Night Ventilation': [Strategy.mas_night_ventilation],
+    'Occupant use of fans': [Strategy.occupant_use_of_fans],
+    'Capture internal heat': [Strategy.capture_internal_heat],
+    'Passive solar heating': [Strategy.passive_solar_heating],
+    'All': [Strategy.comfort, Strategy.evaporative_cooling,
+            Strategy.mas_night_ventilation, Strategy.occupant_use_of_fans,
+            Strategy.capture_internal_heat, Strategy.passive_solar_heating],
+}
+
+# Overlay field and title of each wind rose figure
+WINDROSE_FIGURES = {
+    'windrose': ('wind_speed', 'Windrose'),
+    'temp': ('dry_bulb_temperature', 'Wind Direction vs. Dry Bulb Temperature'),
+    'dir': ('direct_normal_radiation', 'Wind Direction vs. Direct Normal Radiation'),
+    'diff': ('diffuse_horizontal_radiation', 'Wind Direction vs. Diffuse Horizontal Radiation'),
+}
+
+# Derived psychrometric variable name to its Psychrometrics attribute, data type and SI unit
+DERIVED_PSYCHROMETRICS = {
+    'Wet Bulb Temperature': ('wet_bulb', WetBulbTemperature(), 'C'),
+    'Humidity Ratio': ('humid_ratio', HumidityRatio(), 'fraction'),
+    'Enthalpy': ('enthalpy', Enthalpy(), 'kJ/kg'),
+    'Saturated Vapor Pressure': ('saturated_vapor_pressure', Pressure(), 'Pa'),
+}
+
+# Labels and colors of the thermal sensation categories, from -3 to 3
+TS_CATEGORY_NAMES = ('Very Cold', 'Quite Cold', 'Cold', 'Comfort', 'Hot', 'Quite Hot', 'Very Hot')
+TS_CATEGORY_COLORS = ('#08306b', '#2171b5', '#6baed6', '#74c476', '#fd8d3c', '#e6550d', '#a63603')
+
+# Colors of the passive strategy labels, in the order of STRATEGY_LABELS
+STRATEGY_COLORS = ('#d9d9d9', '#74c476', '#fdae6b', '#e6550d', '#6baed6', '#756bb1', '#08519c')
+
+# Colors of the unmet and met hours of the conditional analysis heatmap
+CONDITION_COLORS = ('#d62728', '#1f77b4')
+
+# Axis label of each parameter of the comfort map to its PMV input, limits and default range
+PMV_SWEEP_PARAMETERS = {
+    'Air Temperature (°C)': ('ta', -20.0, 50.0, (15.0, 35.0)),
+    'Mean Radiant Temperature (°C)': ('tr', 0.0, 100.0, (15.0, 40.0)),
+    'Air Velocity (m/s)': ('vel', 0.0, 3.0, (0.0, 1.5)),
+    'Relative Humidity (%)': ('rh', 0.0, 100.0, (0.0, 100.0)),
+    'Metabolic Rate': ('met', 0.7, 4.0, (0.8, 2.0)),
+    'Clothing Level': ('clo', 0.0, 2.5, (0.3, 1.5)),
+}
+
+# Sections read by the report
+REPORT_SECTIONS = ('periodic', 'conditional', 'psychrometric', 'windrose', 'sunpath',
+                   'degree_days', 'temperature_bins')
+
+# Section and figure behind each image of the report
+REPORT_FIGURES = {
+    'hourly_data': ('periodic', lambda result: result['figures']['Hourly Plot']),
+    'Daily_data': ('periodic', lambda result: result['figures']['Mean Daily Plot']),
+    'Line_data': ('periodic', lambda result: result['figures']['Line Plot']),
+    'conditional_hourly_data': ('conditional', lambda result: result['figure']),
+    'psy_main': ('psychrometric', lambda result: result['figure']),
+    'windrose': ('windrose', lambda result: result['windrose']),
+    'windrose-temp': ('windrose', lambda result: result['temp']),
+    'windrose-dir': ('windrose', lambda result: result['dir']),
+    'windrose-diff': ('windrose', lambda result: result['diff']),
+    'Sunpath': ('sunpath', lambda result: result),
+    'CDD_HDD': ('degree_days', lambda result: result['figure']),
+    'temp-bins': ('temperature_bins', lambda result: result['figures']['Period']),
+}
+
+# A whole year, as the start month, day, hour and end month, day, hour of a period
+ANNUAL_PERIOD = (1, 1, 0, 12, 31, 23)
+
+
+class ReportParameters(NamedTuple):
+    """Inputs of the report, defaulting to the initial values of the dashboard widgets.
+
+    Periods are given as (start month, start day, start hour, end month,
+    end day, end hour). conditions holds the (variable, minimum, maximum)
+    thresholds combined with the ones of hourly_selected in the conditional
+    analysis. Values left to None are derived from the EPW file and the unit
+    system by resolve.
+    """
+    data_unit: str = 'SI'
+    colorset: str = 'original'
+    hourly_selected: str = 'Dry Bulb Temperature'
+    period: Tuple[int, ...] = ANNUAL_PERIOD
+    threshold_min: Optional[float] = None
+    threshold_max: Optional[float] = None
+    conditions: Tuple[Tuple[str, Optional[float], Optional[float]], ...] = ()
+    psy_strategy: str = 'Comfort'
+    psy_draw_polygons: bool = False
+    psy_selected: str = 'Dry Bulb Temperature'
+    psy_clo_value: float = 0.7
+    psy_met_value: float = 1.1
+    psy_air: float = 0.1
+    windrose_period: Tuple[int, ...] = ANNUAL_PERIOD
+    sunpath_selected: Optional[str] = None
+    sunpath_switch: bool = False
+    degree_days_heat_base: Optional[float] = None
+    degree_days_cool_base: Optional[float] = None
+    dd_st_hour: int = 0
+    dd_end_hour: int = 23
+    temp_bin_field: str = 'Dry Bulb Temperature'
+    min_val_bin: Optional[float] = None
+    max_val_bin: Optional[float] = None
+    steps: Optional[float] = None
+    temp_bin_period: Tuple[int, ...] = ANNUAL_PERIOD
+
+    @property
+    def unit(self) -> str:
+        """Temperature unit of the unit system."""
+        return 'F' if self.data_unit == 'IP' else 'C'
+
+    def validate(self) -> 'ReportParameters':
+        """Check the names used by the parameters, raising a ValueError for unknown ones."""
+        if self.data_unit not in ('SI', 'IP'):
+            raise ValueError(f'data_unit must be SI or IP, not {self.data_unit!r}.')
+        if self.colorset not in COLORSETS:
+            raise ValueError(f'Unknown colorset {self.colorset!r}.')
+        if self.psy_strategy not in PSYCHROMETRIC_STRATEGIES:
+            raise ValueError(f'Unknown psychrometric strategy {self.psy_strategy!r}.')
+        for name in ('hourly_selected', 'psy_selected', 'sunpath_selected', 'temp_bin_field'):
+            value = getattr(self, name)
+            if value is not None and value not in FIELDS:
+                raise ValueError(f'Unknown variable {value!r} for {name}.')
+        for condition in self.conditions:
+            if len(condition) != 3 or condition[0] not in FIELDS:
+                raise ValueError(f'conditions must be (variable, minimum, maximum), not {condition!r}.')
+        for name in ('period', 'windrose_period', 'temp_bin_period'):
+            if len(getattr(self, name)) != 6:
+                raise ValueError(f'{name} must have 6 values.')
+        if None not in (self.min_val_bin, self.max_val_bin) and self.max_val_bin < self.min_val_bin:
+            raise ValueError(f'max_val_bin {self.max_val_bin:g} is below min_val_bin {self.min_val_bin:g}.')
+        if self.steps is not None and self.steps <= 0:
+            raise ValueError(f'steps must be positive, not {self.steps:g}.')
+        return self
+
+    def resolve(self, store: EPWStore, statistics: EPWStatistics = None) -> 'ReportParameters':
+        """Fill the values left to None the way the dashboard initializes its widgets.
+        Args:
+            store: Columnar store of the EPW file.
+            statistics: EPWStatistics of the file, computed when None.
+        Returns:
+            Resolved ReportParameters.
+        """
+        statistics = statistics or EPWStatistics.from_store(store)
+        values = {}
+        if self.threshold_min is None or self.threshold_max is None:
+            bounds = statistics.annual(FIELDS[self.hourly_selected], self.data_unit)
+            values['threshold_min'] = bounds['min'] if self.threshold_min is None else self.threshold_min
+            values['threshold_max'] = bounds['max'] if self.threshold_max is None else self.threshold_max
+        if self.degree_days_heat_base is None:
+            values['degree_days_heat_base'] = 64.4 if self.data_unit == 'IP' else 18
+        if self.degree_days_cool_base is None:
+            values['degree_days_cool_base'] = 75.2 if self.data_unit == 'IP' else 24
+        if self.temp_bin_field == 'Dry Bulb Temperature':
+            low, high, step = (32, 104, 2) if self.data_unit == 'IP' else (0, 40, 2)
+        else:
+            bounds = statistics.annual(FIELDS[self.temp_bin_field], self.data_unit)
+            low, high = float(np.floor(bounds['min'])), float(np.ceil(bounds['max']))
+            low, high = (low if self.min_val_bin is None else self.min_val_bin,
+                         high if self.max_val_bin is None else self.max_val_bin)
+            step = float(max(np.ceil((high - low) / 20), 1))
+        for name, value in (('min_val_bin', low), ('max_val_bin', high), ('steps', step)):
+            if getattr(self, name) is None:
+                values[name] = value
+        return self._replace(**values)
+
+
+def colorset_colors(colorset: str, switch: bool = False) -> List[Color]:
+    """Get the colors of a colorset of COLORSETS, reversed if switch is True."""
+    colors = list(COLORSETS[colorset])
+    if switch:
+        colors.reverse()
+    return colors
+
+
+def _line_chart_data(data: HourlyContinuousCollection) -> HourlyContinuousCollection:
+    """Reduce an annual collection to the 8760 hourly values drawn by ladybug_charts line charts.
+
+    Several values per hour are averaged and the 29th of February of leap
+    years is left out.
+    """
+    ap = data.header.analysis_period
+    values = np.asarray(data.values).reshape(-1, ap.timestep).mean(axis=1)
+    if ap.is_leap_year:
+        values = np.delete(values, np.s_[59 * 24:60 * 24])
+    header = Header(data_type=data.header.data_type, unit=data.header.unit,
+                    analysis_period=AnalysisPeriod(), metadata=data.header.metadata)
+    return HourlyContinuousCollection(header, values.tolist())
+
+
+def hourly_data_figure(plot_type: str, data: HourlyContinuousCollection, colors: Sequence[Color],
+                       period: Sequence[int] = ANNUAL_PERIOD) -> Figure:
+    """Create the figure of hourly data of the periodic analysis.
+    Args:
+        plot_type: One of 'Hourly Plot', 'Mean Daily Plot' or 'Line Plot'.
+        data: HourlyContinuousCollection object.
+        colors: Colors of the legend.
+        period: Start month, day, hour and end month, day, hour of the
+            period of the hourly plot.
+    Returns:
+        A plotly figure.
+    """
+    if plot_type == 'Hourly Plot':
+        hourly_data = filter_period(data, period)
+        hourly_plot = HourlyPlot(hourly_data, legend_parameters=LegendParameters(colors=colors))
+        return hourly_plot.plot(title=str(data.header.data_type), show_title=True)
+    elif plot_type == 'Mean Daily Plot':
+        return data.diurnal_average_chart(
+            title=data.header.data_type.name, show_title=True, color=colors[-1])
+    elif plot_type == 'Line Plot':
+        ap = data.header.analysis_period
+        if ap.timestep > 1 or ap.is_leap_year:
+            data = _line_chart_data(data)
+        return data.line_chart(title=data.header.data_type.name, show_title=True, color=colors[-1])
+    raise ValueError(f'Unknown plot type {plot_type!r}.')
+
+
+def line_plot_figure(store: EPWStore, field: int, data_unit: str, colors: Sequence[Color],
+                     days: Tuple[int, int] = None, points: int = DEFAULT_POINTS) -> Figure:
+    """Create a WebGL line of every value of a field within a range of days.
+
+    Unlike the daily ranges of the Line Plot of hourly_data_figure, every
+    timestep of the file is drawn. The values within the range are
+    downsampled with LTTB to about one per pixel of the chart, so a range
+    holding fewer values than points is drawn at full resolution.
+
+    Args:
+        store: Columnar store of the EPW file.
+        field: EPW field number.
+        data_unit: Either 'SI' or 'IP'.
+        colors: Colors of the legend, the line is drawn with the last one.
+        days: First and last day of the year drawn, both included. The
+            whole file when None.
+        points: Most values drawn, about the width of the chart in pixels.
+    Returns:
+        A plotly figure.
+    """
+    steps_per_day = 24 * store.timestep
+    first, last = days or (1, -(-len(store) // steps_per_day))
+    rows = np.arange((first - 1) * steps_per_day, min(last * steps_per_day, len(store)))
+    values = store.field(field, data_unit)[rows]
+    kept = lttb(values, points)
+    # the reference years of ladybug DateTime
+    start = np.datetime64(f'{2016 if store.is_leap_year else 2017}-01-01T00:00')
+    times = start + rows[kept] * (3600 // store.timestep) * np.timedelta64(1, 's')
+
+    name = EPWFields.field_by_number(field).name.name
+    unit = store.unit(field, data_unit)
+    color = colors[-1]
+    drawn = 'every value' if len(kept) == len(rows) else f'{len(kept)} of {len(rows)} values'
+    fig = go.Figure(go.Scattergl(
+        x=times, y=values[kept], mode='lines', name=name,
+        line=dict(color=f'rgb({color.r},{color.g},{color.b})', width=1),
+        hovertemplate=f'%{{x|%b %d %H:%M}}<br>%{{y}} {unit}<extra></extra>'))
+    fig.update_layout(title=f'{name}<br><sup>{drawn}</sup>', yaxis_title=unit, template='plotly_white',
+                      xaxis=dict(tickformat='%b %d'), margin=dict(t=60, b=0))
+    return fig
+
+
+def periodic_analysis(data: HourlyContinuousCollection, colors: Sequence[Color],
+                      period: Sequence[int], statistics: Dict[str, float]) -> dict:
+    """Compute the figures and statistics of the periodic analysis section.
+    Args:
+        data: HourlyContinuousCollection object.
+        colors: Colors of the legend.
+        period: Start month, day, hour and end month, day, hour of the
+            period of the hourly plot.
+        statistics: Annual statistics of the data (see EPWStatistics.annual).
+    Returns:
+        A dictionary with the figure of each plot type and the annual mean,
+        minimum and maximum.
+    """
+    figures = {plot_type: hourly_data_figure(plot_type, data, colors, period)
+               for plot_type in ('Hourly Plot', 'Mean Daily Plot', 'Line Plot')}
+    return {'figures': figures, 'ave_val': round(statistics['mean'], 2),
+            'min_value': statistics['min'], 'max_value': statistics['max'],
+            'unit': data.header.unit}
+
+
+def condition_mask_figure(result: ConditionResult, title: str = 'Hours meeting the conditions') -> Figure:
+    """Heatmap of the met and unmet hours of a condition, by day of the year and hour of the day."""
+    timestep = result.timestep
+    z = np.where(result.met, 1., 0.)
+    z[~result.in_period] = np.nan
+    z = z.reshape(-1, 24 * timestep).T
+    colorscale = [[0, CONDITION_COLORS[0]], [0.5, CONDITION_COLORS[0]],
+                  [0.5, CONDITION_COLORS[1]], [1, CONDITION_COLORS[1]]]
+    fig = go.Figure(go.Heatmap(
+        z=z, x=np.arange(1, z.shape[1] + 1), y=np.arange(z.shape[0]) / timestep,
+        zmin=-0.5, zmax=1.5, colorscale=colorscale, hoverongaps=False,
+        hovertemplate='day: %{x}<br>hour: %{y}<br>met: %{z}<extra></extra>',
+        colorbar=dict(tickvals=[0, 1], ticktext=['Unmet', 'Met'])))
+    fig.update_layout(title=title, xaxis_title='Day of the year', yaxis_title='Hour of the day',
+                      margin=dict(t=30, b=0))
+    return fig
+
+
+def condition_tables(result: ConditionResult) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Tabulate the met and unmet hours of a condition by month and by hour of the day."""
+    tables = []
+    for met, period, index in ((result.monthly, result.period_table.sum(axis=1),
+                                pd.Index(MONTH_NAMES, name='Month')),
+                               (result.hourly, result.period_table.sum(axis=0),
+                                pd.Index(range(24), name='Hour'))):
+        table = pd.DataFrame({'Met hours': met, 'Unmet hours': period - met}, index=index)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            table['Met (%)'] = np.where(period > 0, 100 * met / period, np.nan)
+        tables.append(table.round(1))
+    return tables[0], tables[1]
+
+
+def conditional_analysis(store: EPWStore, data_unit: str, colors: Sequence[Color], period: Sequence[int],
+                         thresholds: Sequence[Threshold]) -> dict:
+    """Compute the figures, met/unmet hours and met hour tables of the conditional analysis section.
+    Args:
+        store: Columnar store of the EPW file.
+        data_unit: Either 'SI' or 'IP', the unit of the thresholds.
+        colors: Colors of the legend.
+        period: Start month, day, hour and end month, day, hour of the period.
+        thresholds: Thresholds that every met hour satisfies. The hourly plot
+            shows the met values of the field of the first one.
+    Returns:
+        A dictionary with the hourly plot of the met values ('figure'), the
+        heatmap of the met hours ('mask_figure'), the met and unmet hours and
+        the 'monthly' and 'hourly' tables of met hours.
+    """
+    result = Condition(thresholds).evaluate(store, period, data_unit)
+    data = store.to_collection(thresholds[0].field, data_unit)
+    ap = data.header.analysis_period
+    # the met rows in the order of the period, as filter_by_analysis_period would give them
+    rows = period_rows(period_key(period), ap.timestep, ap.is_leap_year)
+    met_rows = rows[result.met[rows]]
+    header = Header(data.header.data_type, data.header.unit,
+                    AnalysisPeriod(*period, timestep=ap.timestep, is_leap_year=ap.is_leap_year),
+                    data.header.metadata)
+    datetimes = data.datetimes
+    met_data = HourlyDiscontinuousCollection(header, np.asarray(data.values)[met_rows].tolist(),
+                                             [datetimes[i] for i in met_rows])
+    hourly_plot = HourlyPlot(met_data, legend_parameters=LegendParameters(colors=colors))
+    figure = hourly_plot.plot(title=str(data.header.data_type), show_title=True)
+    monthly, hourly = condition_tables(result)
+    return {'figure': figure, 'mask_figure': condition_mask_figure(result),
+            'met_num_hours': result.met_hours, 'unmet_num_hours': result.unmet_hours,
+            'monthly': monthly, 'hourly': hourly}
+
+
+def psychrometric_chart(store: EPWStore, colors: Sequence[Color], strategy: str,
+                        draw_polygons: bool, data: HourlyContinuousCollection, use_ip: bool,
+                        clo_value: float, met_value: float,
+                        air_speed: float) -> Tuple[Figure, List[float], np.ndarray]:
+    """Create the psychrometric chart of the hours of an EPW file.
+    Args:
+        store: Columnar store of the EPW file.
+        colors: Colors of the legend.
+        strategy: Key of PSYCHROMETRIC_STRATEGIES drawn with the polygons.
+        draw_polygons: Whether to draw the comfort and strategy polygons.
+        data: Hourly data to load on the chart.
+        use_ip: Whether to draw the chart in IP units.
+        clo_value: Clothing level.
+        met_value: Metabolic rate.
+        air_speed: Air velocity in m/s.
+    Returns:
+        A tuple with three items:
+        -   A plotly figure.
+        -   Percentages of the time each strategy is effective, in the order
+            of the report.
+        -   The index in STRATEGY_LABELS of the strategy of each hour.
+    """
+    dry_bulb = store.to_collection('dry_bulb_temperature')
+    solar = store.to_collection('global_horizontal_radiation')
+    chart = PsychrometricChart(dry_bulb, store.to_collection('relative_humidity'),
+                               legend_parameters=LegendParameters(colors=colors), use_ip=use_ip)
+
+    # polygons are shared per comfort parameters, hours are evaluated in one pass
+    polygons = strategy_polygons(clo_value, met_value, air_speed, use_ip)
+    x, y = chart_points(chart)
+    evaluation = polygons.evaluate(x, y, store.field('dry_bulb_temperature'),
+                                   store.field('global_horizontal_radiation'), store.timestep)
+    shares = evaluation.shares
+    percentages = [shares['internal_heat'], shares['fan_use'], shares['night_flush'],
+                   shares['passive_solar'], shares['evaporative_cooling'], shares['comfort']]
+
+    if draw_polygons:
+        figure = chart.plot(data=data, polygon_pmv=polygons.pmv,
+                            strategies=PSYCHROMETRIC_STRATEGIES[strategy],
+                            title='PSYCHROMETRIC CHART', show_title=True, solar_data=solar)
+    else:
+        figure = chart.plot(data=data, show_title=True)
+    return figure, percentages, evaluation.labels
+
+
+def windrose_figures(engine: WindRoseEngine, period: Sequence[int], colors: Sequence[Color],
+                     data_unit: str = 'SI', monthly: bool = False) -> Dict[str, Figure]:
+    """Compute the wind rose figures of the wind rose section.
+
+    The histograms of every overlay field are binned in one pass by the wind
+    rose engine of the EPW file.
+
+    Args:
+        engine: WindRoseEngine of the EPW file.
+        period: Start month, day, hour and end month, day, hour of the period.
+        colors: Colors of the legend.
+        data_unit: Either 'SI' or 'IP'.
+        monthly: Whether to add the wind speed rose of each month, as 'monthly'.
+    Returns:
+        A dictionary of the keys of WINDROSE_FIGURES (and 'monthly') to figures.
+    """
+    lb_ap = AnalysisPeriod(*period)
+    histograms = engine.histograms(lb_ap, [field for field, _ in WINDROSE_FIGURES.values()], data_unit)
+    figures = {name: wind_rose_figure(*histograms[field], colors, title)
+               for name, (field, title) in WINDROSE_FIGURES.items()}
+    if monthly:
+        by_month = engine.histograms(lb_ap, ['wind_speed'], data_unit, by_month=True)['wind_speed']
+        figures['monthly'] = wind_rose_small_multiples(*by_month, colors, MONTH_NAMES)
+    return figures
+
+
+def degree_days_figure(degree_days: DegreeDays, unit: str) -> Figure:
+    """Create the monthly HDD and CDD figure of a heating and a cooling base temperature.
+    Args:
+        degree_days: DegreeDays of one heating and one cooling base temperature.
+        unit: Temperature unit, 'C' or 'F'.
+    Returns:
+        A plotly figure.
+    """
+    figure = Figure(data=[
+        go.Bar(name=f'Heating Degree Days - deg{unit}days', x=MONTH_NAMES,
+               y=degree_days.monthly_heating[:, 0], marker_color='indianred'),
+        go.Bar(name=f'Cooling Degree Days - deg{unit}days', x=MONTH_NAMES,
+               y=degree_days.monthly_cooling[:, 0], marker_color='blue')])
+    figure.update_traces(marker_line_width=1.5, opacity=0.95)
+    figure.update_layout(bargap=0.1, title_text='Degree Days', xaxis_tickangle=-45, yaxis_range=[0, 200])
+    return figure
+
+
+def degree_days_curve_figure(degree_days: DegreeDays, heat_base: float, cool_base: float,
+                             unit: str) -> Figure:
+    """Create the figure of the annual HDD and CDD versus the base temperature.
+    Args:
+        degree_days: DegreeDays of a sweep of base temperatures.
+        heat_base: Selected heating base temperature, marked on the figure.
+        cool_base: Selected cooling base temperature, marked on the figure.
+        unit: Temperature unit, 'C' or 'F'.
+    Returns:
+        A plotly figure.
+    """
+    fig = go.Figure([
+        go.Scatter(x=degree_days.heat_bases, y=degree_days.heating, name='Heating Degree Days',
+                   line_color='indianred'),
+        go.Scatter(x=degree_days.cool_bases, y=degree_days.cooling, name='Cooling Degree Days',
+                   line_color='blue')])
+    fig.add_vline(x=heat_base, line_dash='dash', line_color='indianred')
+    fig.add_vline(x=cool_base, line_dash='dash', line_color='blue')
+    fig.update_layout(title_text='Degree Days versus Base Temperature', xaxis_title=f'Base temperature (°{unit})',
+                      yaxis_title=f'deg{unit}-days', hovermode='x unified')
+    return fig
+
+
+def degree_days_table(bases: np.ndarray, monthly: np.ndarray, unit: str) -> pd.DataFrame:
+    """Tabulate monthly degree days, with one row per base temperature and a total column."""
+    table = pd.DataFrame(monthly.T, columns=list(MONTH_NAMES),
+                         index=pd.Index(bases, name=f'Base (°{unit})'))
+    table['Total'] = table.sum(axis=1)
+    return table.round(1)
+
+
+def degree_days_analysis(engine: DegreeDayEngine, heat_base: float, cool_base: float,
+                         unit: str, bases: Tuple[float, float] = None) -> dict:
+    """Compute the figures, tables and totals of the degree days section.
+    Args:
+        engine: DegreeDayEngine of the hour window.
+        heat_base: Heating base temperature.
+        cool_base: Cooling base temperature.
+        unit: Temperature unit, 'C' or 'F'.
+        bases: Optional lowest and highest base temperatures of the sweep
+            figure and the monthly tables, which are left out when None.
+    Returns:
+        A dictionary with the figures, tables and annual totals.
+    """
+    selected = engine.degree_days([heat_base], [cool_base])
+    result = {'figure': degree_days_figure(selected, unit),
+              'heating_total': float(selected.heating[0]),
+              'cooling_total': float(selected.cooling[0])}
+    if bases is not None:
+        low, high = bases
+        curve_bases = np.linspace(low, high, 201)
+        table_bases = np.arange(np.ceil(low), np.floor(high) + 1)
+        tables = engine.degree_days(table_bases, table_bases)
+        result['curve_figure'] = degree_days_curve_figure(
+            engine.degree_days(curve_bases, curve_bases), heat_base, cool_base, unit)
+        result['heating_table'] = degree_days_table(table_bases, tables.monthly_heating, unit)
+        result['cooling_table'] = degree_days_table(table_bases, tables.monthly_cooling, unit)
+    return result
+
+
+def distribution_figures(distribution: Distribution, field_name: str, field_unit: str) -> Dict[str, Figure]:
+    """Create the period, stacked monthly and cumulative figures of a distribution."""
+    labels = bin_labels(distribution.edges, field_unit)
+    layout = dict(xaxis_title=f'{field_name} Range', yaxis_title='Hours', margin=dict(t=30, b=0))
+
+    period_figure = go.Figure(go.Bar(x=labels, y=distribution.counts, text=distribution.counts,
+                                     name=field_name))
+    period_figure.update_traces(textfont_size=12, textangle=0, textposition="outside", cliponaxis=False)
+    period_figure.update_layout(**layout)
+
+    monthly_figure = go.Figure([go.Bar(x=labels, y=counts, name=month)
+                                for month, counts in zip(MONTH_NAMES, distribution.monthly)])
+    monthly_figure.update_layout(barmode='stack', **layout)
+
+    cumulative_figure = go.Figure(go.Scatter(
+        x=distribution.edges[1:], y=distribution.cumulative, mode='lines+markers', name=field_name,
+        hovertemplate=f'%{{y:.1f}}% of hours at or below %{{x}}{field_unit}<extra></extra>'))
+    cumulative_figure.update_layout(xaxis_title=f'{field_name} ({field_unit})',
+                                    yaxis_title='Cumulative frequency (%)', yaxis_range=[0, 100],
+                                    margin=dict(t=30, b=0))
+    return {'Period': period_figure, 'Stacked monthly': monthly_figure, 'Cumulative': cumulative_figure}
+
+
+def temperature_bins_analysis(distribution: Distribution, field_name: str, unit: str) -> dict:
+    """Compute the figures and extreme bins of the distributed temperature section.
+    Args:
+        distribution: Distribution of the field.
+        field_name: Name of the binned EPW variable.
+        unit: Unit of the field.
+    Returns:
+        A dictionary with the figures, the displayed unit and the labels of
+        the bins with the most and the fewest (but some) hours.
+    """
+    field_unit = f'°{unit}' if unit in ('C', 'F') else f' {unit}'
+    labels = bin_labels(distribution.edges, field_unit)
+    counts = distribution.counts
+    filled = np.flatnonzero(counts)
+    maximum_bin = labels[int(counts.argmax())] if len(filled) else None
+    minimum_bin = labels[int(filled[counts[filled].argmin()])] if len(filled) else None
+    return {'figures': distribution_figures(distribution, field_name, field_unit),
+            'field_unit': field_unit, 'Maximum_bin': maximum_bin, 'Minimum_bin': minimum_bin}
+
+
+def sunpath(store: EPWStore, colors: Sequence[Color], selected: str = None,
+            data_unit: str = 'SI', table: SolarTable = None) -> Figure:
+    """Create the sunpath of the location of an EPW file.
+    Args:
+        store: Columnar store of the EPW file.
+        colors: Colors of the legend.
+        selected: Optional name of the EPW variable loaded on the sunpath.
+        data_unit: Either 'SI' or 'IP'.
+        table: SolarTable of the file, loaded from the storage folder when None.
+    Returns:
+        A plotly figure.
+    """
+    if table is None:
+        table = open_solar_table(*store.coordinates, timestep=store.timestep,
+                                 is_leap_year=store.is_leap_year)
+    if selected is None:
+        return sunpath_figure(table, store.coordinates, colors, title='Sunpath Diagram')
+    field = FIELDS[selected]
+    return sunpath_figure(table, store.coordinates, colors, values=store.field(field, data_unit),
+                          name=selected, unit=store.unit(field, data_unit), title=selected)
+
+
+def derived_psychrometric_figure(name: str, values: np.ndarray, store: EPWStore, data_unit: str,
+                                 colors: Sequence[Color], period: Sequence[int] = ANNUAL_PERIOD) -> Figure:
+    """Create the heatmap of a derived psychrometric variable.
+    Args:
+        name: Key of DERIVED_PSYCHROMETRICS.
+        values: SI values of the variable for every hour of the file.
+        store: Columnar store of the EPW file.
+        data_unit: Either 'SI' or 'IP'.
+        colors: Colors of the legend.
+        period: Start month, day, hour and end month, day, hour of the period.
+    Returns:
+        A plotly figure.
+    """
+    _, data_type, si_unit = DERIVED_PSYCHROMETRICS[name]
+    values, unit = convert_values(values, data_type.name, si_unit, data_unit)
+    header = Header(data_type=data_type, unit=unit, analysis_period=store.analysis_period,
+                    metadata=store.metadata)
+    data = HourlyContinuousCollection(header, values.tolist())
+    data = filter_period(data, period)
+    return HourlyPlot(data, legend_parameters=LegendParameters(colors=colors)).plot(title=name, show_title=True)
+
+
+def derived_psychrometrics_analysis(derived: Psychrometrics, store: EPWStore, selected: Sequence[str],
+                                    data_unit: str, colors: Sequence[Color],
+                                    period: Sequence[int] = ANNUAL_PERIOD) -> dict:
+    """Compute the heatmaps of the selected derived psychrometric variables."""
+    return {'figures': {
+        name: derived_psychrometric_figure(name, getattr(derived, DERIVED_PSYCHROMETRICS[name][0]),
+                                           store, data_unit, colors, period)
+        for name in selected}}
+
+
+def thermal_sensation_figure(store: EPWStore, thermal_sensation: ThermalSensation,
+                             colors: Sequence[Color]) -> Figure:
+    """Create the heatmap of the thermal sensation category of every hour."""
+    ts_header = Header.from_dict({
+        'data_type': {'name': 'Thermal Sensation', 'data_type': 'ThermalConditionSevenPoint',
+                      'type': 'DataType'},
+        'unit': 'condition', 'analysis_period': store.analysis_period.to_dict(), 'metadata': {}})
+    ts_data = HourlyContinuousCollection(ts_header, thermal_sensation.categories.tolist())
+    ts_plot = HourlyPlot(ts_data, legend_parameters=LegendParameters(colors=colors, title='TS Catergory'))
+    return ts_plot.plot(title='Thermal Sensation', show_title=True)
+
+
+def ts_breakdown_figure(shares: np.ndarray, x: list, x_title: str) -> Figure:
+    """Stacked bars of the thermal sensation shares per month or hour of the day."""
+    fig = go.Figure()
+    for category, (name, color) in enumerate(zip(TS_CATEGORY_NAMES, TS_CATEGORY_COLORS)):
+        fig.add_trace(go.Bar(x=x, y=shares[:, category], name=name, marker_color=color))
+    fig.update_layout(barmode='stack', xaxis_title=x_title, yaxis_title='% of hours',
+                      margin=dict(t=30, b=0))
+    return fig
+
+
+def thermal_sensation_analysis(store: EPWStore, thermal_sensation: ThermalSensation,
+                               colors: Sequence[Color]) -> dict:
+    """Compute the figures and category shares of the thermal sensation section."""
+    return {'figure': thermal_sensation_figure(store, thermal_sensation, colors),
+            'monthly_figure': ts_breakdown_figure(thermal_sensation.monthly, list(MONTH_NAMES), 'Month'),
+            'hourly_figure': ts_breakdown_figure(thermal_sensation.hourly, list(range(24)), 'Hour of the day'),
+            'condition_data': thermal_sensation.shares}
+
+
+def _chart_temperatures(data_unit: str) -> Tuple[float, float]:
+    """Temperature range of the psychrometric chart of a single condition."""
+    return (0, 120) if data_unit == 'IP' else (-20, 50)
+
+
+def psychrometric_point(psy_db: float, psy_rh: float, data_unit: str = 'SI') -> Tuple[Figure, dict]:
+    """Calculate the psychrometric properties of one air condition.
+    Args:
+        psy_db: Dry bulb temperature in C.
+        psy_rh: Relative humidity in %.
+        data_unit: Either 'SI' or 'IP', the unit system of the metrics.
+    Returns:
+        A tuple with an empty psychrometric chart and a dictionary of metric
+        labels to values.
+    """
+    min_temperature, max_temperature = _chart_temperatures(data_unit)
+    chart = PsychrometricChart(24, 45, min_temperature=min_temperature, max_temperature=max_temperature,
+                               use_ip=data_unit == 'IP')
+    figure = chart.plot(title='PSYCHROMETRIC CHART', show_title=True)
+
+    point = psychrometrics(np.array([psy_db]), np.array([psy_rh]))
+    dew_pt, hr_pt, wb_pt, ent_pt, sat_p = (float(values[0]) for values in point)
+    if data_unit == 'IP':
+        metrics = {
+            'Dry Bulb Temperature (°F)': psy_db * 1.8 + 32,
+            'Relative Humidity (%)': psy_rh,
+            'Dew Point Temperature (°F)': round(dew_pt * 1.8 + 32, 2),
+            'Humidty Ratio (kg_H₂O kg_Air⁻¹)': round(hr_pt, 4),
+            'Wet Bulb Temperature (°F)': round(wb_pt * 1.8 + 32, 2),
+            'Enthalpy (Btu lb⁻¹)': round(ent_pt * 0.429923, 2),
+            'Saturated Vapour Pressure (inHg)': round(sat_p * 0.0002953, 2),
+        }
+    else:
+        metrics = {
+            'Dry Bulb Temperature (°C)': psy_db,
+            'Relative Humidity (%)': psy_rh,
+            'Dew Point Temperature (°C)': round(dew_pt, 2),
+            'Humidty Ratio (kg_H₂O kg_Air⁻¹)': round(hr_pt, 4),
+            'Wet Bulb Temperature (°C)': round(wb_pt, 2),
+            'Enthalpy (kJ kg⁻¹)': round(ent_pt, 2),
+            'Saturated Vapour Pressure (Pa)': round(sat_p, 2),
+        }
+    return figure, metrics
+
+
+def pmv_chart(psy_db: float, psy_rh: float, psy_mrt: float, psy_air: float, met_value: float,
+              clo_value: float, data_unit: str = 'SI') -> Tuple[Figure, Tuple[float, float], dict]:
+    """Calculate the PMV and PPD of one indoor condition.
+    Args:
+        psy_db: Air temperature in C.
+        psy_rh: Relative humidity in %.
+        psy_mrt: Mean radiant temperature in C.
+        psy_air: Air velocity in m/s.
+        met_value: Metabolic rate.
+        clo_value: Clothing level.
+        data_unit: Either 'SI' or 'IP', the unit system of the chart.
+    Returns:
+        A tuple with the psychrometric chart of the condition and its PMV
+        comfort polygon, the PMV and PPD, and a dictionary of metric labels
+        to values.
+    """
+    use_ip = data_unit == 'IP'
+    min_temperature, max_temperature = _chart_temperatures(data_unit)
+    chart = PsychrometricChart(psy_db, psy_rh, min_temperature=min_temperature,
+                               max_temperature=max_temperature, use_ip=use_ip)
+    pmv = strategy_polygons(clo_value, met_value, psy_air, use_ip).pmv
+    figure = chart.plot(polygon_pmv=pmv, title='PSYCHROMETRIC CHART', show_title=True)
+
+    pmv_value, ppd_value = (float(v[0]) for v in fanger_pmv([psy_db], psy_mrt, psy_air, psy_rh,
+                                                              met_value, clo_value))
+    metrics = {
+        '**:orange[PMV Fanger Value]**': round(pmv_value, 2),
+        '**:orange[PPD Fanger Value (%)]**': round(ppd_value, 2),
+    }
+    return figure, (pmv_value, ppd_value), metrics
+
+
+def strategy_label_figure(labels: np.ndarray, timestep: int) -> Figure:
+    """Heatmap of the passive strategy of each hour, by day of the year and hour of the day."""
+    labels = labels.reshape(-1, 24 * timestep).T
+    count = len(STRATEGY_LABELS)
+    # one flat band of the colorscale per label
+    colorscale = []
+    for i, color in enumerate(STRATEGY_COLORS):
+        colorscale += [[i / count, color], [(i + 1) / count, color]]
+    fig = go.Figure(go.Heatmap(
+        z=labels, x=np.arange(1, labels.shape[1] + 1), y=np.arange(labels.shape[0]) / timestep,
+        zmin=-0.5, zmax=count - 0.5, colorscale=colorscale,
+        customdata=np.array(STRATEGY_LABELS)[labels],
+        hovertemplate='day: %{x}<br>hour: %{y}<br>%{customdata}<extra></extra>',
+        colorbar=dict(tickvals=list(range(count)), ticktext=list(STRATEGY_LABELS))))
+    fig.update_layout(title='Passive strategy of each hour', xaxis_title='Day of the year',
+                      yaxis_title='Hour of the day', margin=dict(t=30, b=0))
+    return fig
+
+
+def pmv_sweep_parameters(fixed: Dict[str, float], steps: int,
+                         ranges: Dict[str, Tuple[float, float]]) -> Dict[str, Any]:
+    """Get the pmv_sweep parameters of a comfort map.
+    Args:
+        fixed: Value of each parameter of epwviz.pmv.PARAMETERS.
+        steps: Number of values of each swept parameter.
+        ranges: Lowest and highest value of each swept parameter, keyed by
+            its label in PMV_SWEEP_PARAMETERS.
+    Returns:
+        A dictionary for epwviz.pmv.pmv_sweep.
+    """
+    parameters = dict(fixed)
+    for label, (low, high) in ranges.items():
+        parameters[PMV_SWEEP_PARAMETERS[label][0]] = tuple(np.linspace(low, high, steps))
+    return parameters
+
+
+def pmv_sweep_figures(sweep: PMVSweep, x_label: str, y_label: str,
+                      colors: Sequence[Color]) -> Tuple[Figure, Figure]:
+    """Create the PMV and PPD heatmaps of a sweep of two parameters.
+    Args:
+        sweep: A PMVSweep with two axes.
+        x_label: Key of PMV_SWEEP_PARAMETERS on the X axis.
+        y_label: Key of PMV_SWEEP_PARAMETERS on the Y axis.
+        colors: Colors of the PPD legend.
+    Returns:
+        A tuple with the PMV and the PPD figures.
+    """
+    x, y = PMV_SWEEP_PARAMETERS[x_label][0], PMV_SWEEP_PARAMETERS[y_label][0]
+    # axes follow the order of the PMV inputs, heatmaps are indexed [y][x]
+    transpose = list(sweep.axes) == [x, y]
+    pmv, ppd = (sweep.pmv.T, sweep.ppd.T) if transpose else (sweep.pmv, sweep.ppd)
+    ppd_colorscale = [[i / (len(colors) - 1), f'rgb({c.r},{c.g},{c.b})'] for i, c in enumerate(colors)]
+
+    pmv_figure = go.Figure(go.Heatmap(z=pmv, x=sweep.axes[x], y=sweep.axes[y], colorscale='RdBu_r',
+                                      zmid=0, colorbar_title='PMV'))
+    # comfort envelope, -0.5 <= PMV <= 0.5
+    pmv_figure.add_trace(go.Contour(z=pmv, x=sweep.axes[x], y=sweep.axes[y], showscale=False,
+                                    contours=dict(start=-0.5, end=0.5, size=1, coloring='none'),
+                                    line=dict(color='black', width=2), hoverinfo='skip'))
+    ppd_figure = go.Figure(go.Heatmap(z=ppd, x=sweep.axes[x], y=sweep.axes[y], colorscale=ppd_colorscale,
+                                      colorbar_title='PPD (%)'))
+    for figure, title in ((pmv_figure, 'PMV'), (ppd_figure, 'PPD (%)')):
+        figure.update_layout(title=title, xaxis_title=x_label, yaxis_title=y_label, margin=dict(t=30, b=0))
+    return pmv_figure, ppd_figure
+
+
+def pair_plot_figure(joint: JointDistribution, x_title: str, y_title: str) -> Figure:
+    """Create one figure with the density heatmap of each month, sharing axes and colors."""
+    x = (joint.x_edges[:-1] + joint.x_edges[1:]) / 2
+    y = (joint.y_edges[:-1] + joint.y_edges[1:]) / 2
+    fig = make_subplots(rows=2, cols=6, shared_xaxes=True, shared_yaxes=True,
+                        subplot_titles=list(MONTH_FULL_NAMES),
+                        horizontal_spacing=0.01, vertical_spacing=0.08)
+    for month in range(12):
+        fig.add_trace(go.Heatmap(x=x, y=y, z=joint.cube[month].T, coloraxis='coloraxis',
+                                 hovertemplate=f'{x_title}: %{{x:.1f}}<br>{y_title}: %{{y:.1f}}<br>'
+                                               'hours: %{z}<extra></extra>'),
+                      row=month // 6 + 1, col=month % 6 + 1)
+    fig.update_xaxes(title_text=x_title, row=2)
+    fig.update_yaxes(title_text=y_title, col=1)
+    fig.update_layout(coloraxis=dict(colorscale='Plasma', colorbar_title='hours'), height=650,
+                      margin=dict(t=40, b=0))
+    return fig
+
+
+def comparison_analysis(names: Sequence[str], summaries: Sequence[StationSummary], field: int,
+                        field_unit: str, unit: str) -> dict:
+    """Compute the delta figures and tables of several EPW files against the first one.
+    Args:
+        names: Name of each EPW file, the baseline first.
+        summaries: StationSummary of each EPW file.
+        field: EPW field number of the monthly mean differences.
+        field_unit: Unit of the field.
+        unit: Temperature unit, 'C' or 'F'.
+    Returns:
+        A dictionary with the figure and table of the monthly mean differences
+        ('monthly_figure', 'monthly_table'), of the degree days
+        ('degree_days_figure', 'degree_days_table') and of the thermal
+        sensation shares ('ts_figure', 'ts_table').
+    """
+    baseline, others = summaries[0], list(zip(names[1:], summaries[1:]))
+    column = FIELD_NAMES[field]
+    field_name = next(name for name, number in FIELDS.items() if number == field)
+
+    monthly_figure = go.Figure([go.Scatter(x=MONTH_NAMES, y=summary.monthly_means[column]
+                                           - baseline.monthly_means[column], name=name)
+                                for name, summary in others])
+    monthly_figure.add_hline(y=0, line_color='grey')
+    monthly_figure.update_layout(title_text=f'{field_name}: monthly mean difference to {names[0]}',
+                                 yaxis_title=f'Δ {field_unit}', hovermode='x unified')
+    monthly_table = pd.DataFrame(
+        [np.append(summary.monthly_means[column] - baseline.monthly_means[column],
+                   summary.annual_means[column] - baseline.annual_means[column]) for _, summary in others],
+        index=pd.Index(names[1:], name='EPW file'), columns=list(MONTH_NAMES) + ['Annual']).round(2)
+
+    degree_days_figure = go.Figure()
+    for name, summary in others:
+        degree_days_figure.add_trace(go.Bar(x=MONTH_NAMES, y=summary.heating - baseline.heating,
+                                            name=f'{name} - Δ HDD', legendgroup=name))
+        degree_days_figure.add_trace(go.Bar(x=MONTH_NAMES, y=summary.cooling - baseline.cooling,
+                                            name=f'{name} - Δ CDD', legendgroup=name))
+    degree_days_figure.update_layout(title_text=f'Degree days difference to {names[0]}',
+                                     yaxis_title=f'Δ deg{unit}-days', barmode='group')
+    heating = np.array([summary.heating.sum() for summary in summaries])
+    cooling = np.array([summary.cooling.sum() for summary in summaries])
+    degree_days_table = pd.DataFrame(
+        {'HDD': heating, 'CDD': cooling, 'Δ HDD': heating - heating[0], 'Δ CDD': cooling - cooling[0]},
+        index=pd.Index(names, name='EPW file')).round(0)
+
+    ts_figure = go.Figure([go.Bar(x=list(TS_CATEGORY_NAMES), y=summary.ts_shares - baseline.ts_shares,
+                                  name=name) for name, summary in others])
+    ts_figure.update_layout(title_text=f'Thermal sensation share difference to {names[0]}',
+                            yaxis_title='Δ % of hours', barmode='group')
+    ts_table = pd.DataFrame([summary.ts_shares - baseline.ts_shares for _, summary in others],
+                            index=pd.Index(names[1:], name='EPW file'),
+                            columns=list(TS_CATEGORY_NAMES)).round(2)
+    return {'monthly_figure': monthly_figure, 'monthly_table': monthly_table,
+            'degree_days_figure': degree_days_figure, 'degree_days_table': degree_days_table,
+            'ts_figure': ts_figure, 'ts_table': ts_table}
+
+
+def report_results(store: EPWStore, parameters: ReportParameters,
+                   statistics: EPWStatistics = None) -> Dict[str, Any]:
+    """Compute every section read by the report.
+    Args:
+        store: Columnar store of the EPW file.
+        parameters: Resolved ReportParameters.
+        statistics: EPWStatistics of the file, computed when None.
+    Returns:
+        A dictionary of each name of REPORT_SECTIONS to its result.
+    """
+    p = parameters
+    statistics = statistics or EPWStatistics.from_store(store)
+    colors = colorset_colors(p.colorset)
+    data = store.to_collection(FIELDS[p.hourly_selected], p.data_unit)
+    psy_figure, percentages, _ = psychrometric_chart(
+        store, colors, p.psy_strategy, p.psy_draw_polygons,
+        store.to_collection(FIELDS[p.psy_selected], p.data_unit), p.data_unit == 'IP',
+        p.psy_clo_value, p.psy_met_value, p.psy_air)
+    field = FIELDS[p.temp_bin_field]
+    distribution = store_histogram(store, field, AnalysisPeriod(*p.temp_bin_period),
+                                   bin_edges(p.min_val_bin, p.max_val_bin, p.steps), p.data_unit)
+    return {
+        'periodic': periodic_analysis(data, colors, p.period,
+                                      statistics.annual(FIELDS[p.hourly_selected], p.data_unit)),
+        'conditional': conditional_analysis(
+            store, p.data_unit, colors, p.period,
+            [Threshold(FIELDS[p.hourly_selected], p.threshold_min, p.threshold_max)]
+            + [Threshold(FIELDS[name], minimum, maximum) for name, minimum, maximum in p.conditions]),
+        'psychrometric': {'figure': psy_figure, 'strategies_percentages': percentages},
+        'windrose': windrose_figures(WindRoseEngine(store), p.windrose_period, colors, p.data_unit),
+        'sunpath': sunpath(store, colorset_colors(p.colorset, p.sunpath_switch and p.sunpath_selected is None),
+                           p.sunpath_selected, p.data_unit),
+        'degree_days': degree_days_analysis(
+            DegreeDayEngine.from_store(store, p.dd_st_hour, p.dd_end_hour, p.data_unit),
+            p.degree_days_heat_base, p.degree_days_cool_base, p.unit),
+        'temperature_bins': temperature_bins_analysis(distribution, p.temp_bin_field,
+                                                      store.unit(field, p.data_unit)),
+    }
+
+
+def report_context(parameters: ReportParameters, city: str, country: str,
+                   results: Dict[str, Any]) -> Dict[str, Any]:
+    """Collect the values quoted in the text of the report (see epwviz.report.build_report).
+    Args:
+        parameters: Resolved ReportParameters.
+        city: City of the EPW file.
+        country: Country of the EPW file.
+        results: Result of each section of REPORT_SECTIONS.
+    Returns:
+        The context of the report.
+    """
+    p = parameters
+    periodic, conditional = results['periodic'], results['conditional']
+    degree_days, temperature_bins = results['degree_days'], results['temperature_bins']
+    return {
+        'city': city, 'country': country,
+        'hourly_selected': p.hourly_selected, 'ave_val': periodic['ave_val'], 'var_unit': periodic['unit'],
+        'min_value': periodic['min_value'], 'max_value': periodic['max_value'],
+        'threshold_min': p.threshold_min, 'threshold_max': p.threshold_max,
+        'met_num_hours': conditional['met_num_hours'],
+        'unmet_num_hours': conditional['unmet_num_hours'],
+        'psy_clo_value': p.psy_clo_value, 'psy_met_value': p.psy_met_value,
+        'strategies_percentages': results['psychrometric']['strategies_percentages'],
+        'data_unit': p.data_unit, 'unit': p.unit,
+        'degree_days_heat_base': p.degree_days_heat_base,
+        'degree_days_cool_base': p.degree_days_cool_base,
+        'dd_st_hour': p.dd_st_hour, 'dd_end_hour': p.dd_end_hour,
+        'heating_total': round(degree_days['heating_total'], 0),
+        'cooling_total': round(degree_days['cooling_total'], 0),
+        'min_val_bin': p.min_val_bin, 'max_val_bin': p.max_val_bin,
+        'bin_field': p.temp_bin_field, 'bin_unit': temperature_bins['field_unit'],
+        'Maximum_bin': temperature_bins['Maximum_bin'],
+        'Minimum_bin': temperature_bins['Minimum_bin'],
+    }
+
+
+def report_figures(results: Dict[str, Any]) -> Dict[str, Figure]:
+    """Get each figure of the report (see REPORT_FIGURES) from the section results."""
+    return {name: get_figure(results[section]) for name, (section, get_figure) in REPORT_FIGURES.items()}
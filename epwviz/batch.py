@@ -0,0 +1,213 @@
+"""Headless batch generation of the dashboard report for a directory of EPW files.
+
+Usage:
+    python -m epwviz.batch INPUT_DIR OUTPUT_DIR [--params PARAMS.json] [--workers N]
+
+Each EPW file of INPUT_DIR gets a folder in OUTPUT_DIR holding its Word
+report and the PNG image of every figure of the report. Stations are
+processed on a process pool, one station per job. The parameter file is a
+JSON object overriding the fields of ReportParameters, eg.
+``{"data_unit": "IP", "psy_clo_value": 0.5, "degree_days_heat_base": 65}``;
+``--print-params`` writes the defaults. Progress is recorded after every
+station in OUTPUT_DIR/progress.json, so an interrupted run resumes where it
+stopped: stations already done with the same file content and parameters
+are skipped, failed ones are tried again.
+"""
+import argparse
+import json
+import os
+import pathlib
+import sys
+import time
+import traceback
+from concurrent.futures import as_completed
+from typing import Dict, List, Sequence, Tuple, Union
+
+from .analysis import ReportParameters, report_context, report_figures, report_results
+from .cache import content_hash
+from .export import render_png
+from .report import build_report
+from .sections import fingerprint
+from .stats import EPWStatistics
+from .store import EPWStore
+from .workers import process_pool
+
+# Default number of worker processes, overridable through the environment
+DEFAULT_WORKERS = int(os.environ.get('EPWVIZ_BATCH_WORKERS', os.cpu_count() or 1))
+
+# Name of the progress file of an output folder
+PROGRESS_FILE = 'progress.json'
+
+
+def load_parameters(path: Union[str, pathlib.Path] = None) -> ReportParameters:
+    """Read a JSON parameter file into ReportParameters.
+    Args:
+        path: Path of the parameter file. The defaults are used when None.
+    Returns:
+        Validated ReportParameters.
+    """
+    values = {} if path is None else json.loads(pathlib.Path(path).read_text())
+    unknown = set(values) - set(ReportParameters._fields)
+    if unknown:
+        raise ValueError(f'Unknown parameters: {", ".join(sorted(unknown))}.')
+    for name in ('period', 'windrose_period', 'temp_bin_period'):
+        if name in values:
+            values[name] = tuple(values[name])
+    if 'conditions' in values:
+        values['conditions'] = tuple(tuple(condition) for condition in values['conditions'])
+    return ReportParameters(**values).validate()
+
+
+def read_progress(output_dir: pathlib.Path) -> Dict[str, dict]:
+    """Read the progress file of an output folder, empty when there is none."""
+    path = output_dir / PROGRESS_FILE
+    if not path.is_file():
+        return {}
+    return json.loads(path.read_text())
+
+
+def write_progress(output_dir: pathlib.Path, progress: Dict[str, dict]) -> None:
+    """Write the progress file of an output folder under a temporary name, then move it in place."""
+    tmp_path = output_dir / f'.{PROGRESS_FILE}.{os.getpid()}'
+    tmp_path.write_text(json.dumps(progress, indent=2, sort_keys=True))
+    os.replace(tmp_path, output_dir / PROGRESS_FILE)
+
+
+def station_report(epw_path: str, output_dir: str, parameters: ReportParameters,
+                   data_dir: str = './data') -> Tuple[str, List[str]]:
+    """Generate the report and figures of one EPW file.
+    Args:
+        epw_path: Path of the EPW file.
+        output_dir: Folder receiving the report and the PNG figures.
+        parameters: ReportParameters, values left to None being derived from the file.
+        data_dir: Storage folder of the EPW store, statistics and solar table sidecars.
+    Returns:
+        A tuple with the path of the report and the paths of the figures.
+    """
+    epw_bytes = pathlib.Path(epw_path).read_bytes()
+    store = EPWStore.open(epw_bytes, content_hash(epw_bytes), data_dir)
+    statistics = EPWStatistics.open(store, data_dir)
+    resolved = parameters.resolve(store, statistics)
+    results = report_results(store, resolved, statistics)
+    metadata = store.metadata
+    context = report_context(resolved, metadata['city'], metadata['country'], results)
+
+    output_dir = pathlib.Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    images, figure_paths = {}, []
+    for name, figure in report_figures(results).items():
+        images[name] = render_png(figure.to_dict())
+        figure_path = output_dir / f'{name}.png'
+        figure_path.write_bytes(images[name])
+        figure_paths.append(str(figure_path))
+
+    report_path = output_dir / f'WeatherAnalysis-{pathlib.Path(epw_path).stem}.docx'
+    report_path.write_bytes(build_report(context, images))
+    return str(report_path), figure_paths
+
+
+def _station_job(epw_path: str, output_dir: str, parameters: ReportParameters,
+                 data_dir: str) -> dict:
+    """Run station_report, returning its outcome as a progress entry rather than raising."""
+    start = time.perf_counter()
+    try:
+        report, _ = station_report(epw_path, output_dir, parameters, data_dir)
+        entry = {'status': 'done', 'report': report}
+    except Exception as error:
+        entry = {'status': 'failed', 'error': f'{type(error).__name__}: {error}',
+                 'traceback': traceback.format_exc()}
+    entry['seconds'] = round(time.perf_counter() - start, 2)
+    return entry
+
+
+def run_batch(input_dir: Union[str, pathlib.Path], output_dir: Union[str, pathlib.Path],
+              parameters: ReportParameters = ReportParameters(), workers: int = DEFAULT_WORKERS,
+              data_dir: Union[str, pathlib.Path] = './data', force: bool = False,
+              log=print) -> Dict[str, dict]:
+    """Generate the report of every EPW file of a folder.
+    Args:
+        input_dir: Folder of the EPW files.
+        output_dir: Folder receiving one sub folder per EPW file and the progress file.
+        parameters: ReportParameters applied to every file.
+        workers: Number of worker processes.
+        data_dir: Storage folder of the sidecar files.
+        force: Process every file again, ignoring the recorded progress.
+        log: Function called with a line of text as each station finishes.
+    Returns:
+        The progress of every station, keyed by the name of its EPW file.
+    """
+    input_dir, output_dir = pathlib.Path(input_dir), pathlib.Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    progress = {} if force else read_progress(output_dir)
+    parameters_key = fingerprint(parameters._asdict())
+
+    pending, skipped = [], 0
+    for epw_path in sorted(input_dir.glob('*.epw')):
+        epw_hash = content_hash(epw_path.read_bytes())
+        entry = progress.get(epw_path.name, {})
+        if entry.get('status') == 'done' and entry.get('hash') == epw_hash \
+                and entry.get('parameters') == parameters_key and pathlib.Path(entry['report']).is_file():
+            skipped += 1
+            continue
+        pending.append((epw_path, epw_hash))
+
+    total = len(pending)
+    log(f'{total} station(s) to process, {skipped} already done, {workers} worker(s)')
+    if not pending:
+        return progress
+
+    with process_pool(max(1, min(workers, total))) as pool:
+        futures = {pool.submit(_station_job, str(epw_path), str(output_dir / epw_path.stem),
+                               parameters, str(data_dir)): (epw_path, epw_hash)
+                   for epw_path, epw_hash in pending}
+        for done, future in enumerate(as_completed(futures), 1):
+            epw_path, epw_hash = futures[future]
+            entry = future.result()
+            entry.update(hash=epw_hash, parameters=parameters_key)
+            progress[epw_path.name] = entry
+            write_progress(output_dir, progress)
+            log(f'[{done}/{total}] {epw_path.name}: {entry["status"]} in {entry["seconds"]}s'
+                + (f' ({entry["error"]})' if entry['status'] == 'failed' else ''))
+    return progress
+
+
+def main(argv: Sequence[str] = None) -> int:
+    """Command line entry point, returning the exit status."""
+    parser = argparse.ArgumentParser(
+        prog='python -m epwviz.batch',
+        description='Generate the weather analysis report of every EPW file of a folder.')
+    parser.add_argument('input_dir', nargs='?', help='Folder of the EPW files.')
+    parser.add_argument('output_dir', nargs='?', help='Folder receiving the reports and figures.')
+    parser.add_argument('--params', help='JSON file overriding the report parameters.')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help='Number of worker processes (default: %(default)s).')
+    parser.add_argument('--data-dir', default='./data',
+                        help='Storage folder of the sidecar files (default: %(default)s).')
+    parser.add_argument('--force', action='store_true',
+                        help='Process every file again, ignoring the recorded progress.')
+    parser.add_argument('--print-params', action='store_true',
+                        help='Print the parameters as JSON and exit.')
+    args = parser.parse_args(argv)
+
+    try:
+        parameters = load_parameters(args.params)
+    except (OSError, ValueError, TypeError) as error:
+        parser.error(f'invalid parameter file: {error}')
+    if args.print_params:
+        print(json.dumps(parameters._asdict(), indent=2))
+        return 0
+    if args.input_dir is None or args.output_dir is None:
+        parser.error('input_dir and output_dir are required')
+    if not pathlib.Path(args.input_dir).is_dir():
+        parser.error(f'{args.input_dir} is not a folder')
+
+    progress = run_batch(args.input_dir, args.output_dir, parameters, args.workers,
+                         args.data_dir, args.force)
+    failed = sorted(name for name, entry in progress.items() if entry['status'] == 'failed')
+    if failed:
+        print(f'{len(failed)} station(s) failed: {", ".join(failed)}', file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,485 @@
+"""Benchmark suite timing every dashboard section.
+
+Usage:
+    python -m epwviz.benchmark [--repeat N] [--sections NAME ...] [--output PATH] [--compare BASELINE.json]
+
+Each section of SECTIONS is timed on three inputs (see build_cases):
+
+-   sample: assets/sample.epw.
+-   subhourly: the sample interpolated to SUBHOURLY_TIMESTEP rows per hour.
+-   multi-year: DEFAULT_YEARS synthetic consecutive years built from the
+    sample (leap years included), analysed one after the other, the way a
+    series of actual meteorological year files would be.
+
+The computation and the construction of the figures of a section are timed
+separately. For the report, the figure phase is the rendering of the PNG
+images and the assembly of the Word document. Every phase runs on a new
+EPWStore, so the conversions and collections cached by a store are counted,
+while module level caches (strategy polygons, wet bulb table, solar tables)
+are warm after the first repeat; the first, min and median times of each
+phase are recorded. Results are written as JSON with the commit they were
+measured on, and --compare reports the ratio of each median to the one of a
+previous result file, exiting with 1 when a phase is slower than the
+threshold.
+"""
+import argparse
+import calendar
+import json
+import os
+import pathlib
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+from ladybug.analysisperiod import AnalysisPeriod
+from ladybug.datacollection import HourlyContinuousCollection
+from ladybug.legend import LegendParameters
+from ladybug.psychchart import PsychrometricChart
+
+from .analysis import (ANNUAL_PERIOD, DERIVED_PSYCHROMETRICS, FIELDS, MONTH_NAMES,
+                       PSYCHROMETRIC_STRATEGIES, WINDROSE_FIGURES, ReportParameters,
+                       colorset_colors, conditional_analysis, degree_days_analysis,
+                       derived_psychrometrics_analysis, hourly_data_figure, line_plot_figure, pair_plot_figure, report_context, report_figures,
+                       report_results, strategy_label_figure, temperature_bins_analysis,
+                       thermal_sensation_analysis)
+from .cache import content_hash
+from .conditions import Condition, ConditionResult, Threshold
+from .degreedays import DegreeDayEngine
+from .export import render_png
+from .histogram import bin_edges, store_histogram, store_joint_histogram
+from .psychrometrics import store_psychrometrics
+from .report import build_report
+from .solar import solar_table, sunpath_figure
+from .stats import EPWStatistics
+from .store import HEADER_LINES, EPWStore
+from .strategies import chart_points, strategy_polygons
+from .thermal import store_thermal_sensation
+from .windrose import WindRoseEngine, wind_rose_figure, wind_rose_small_multiples
+
+# EPW file of the sample case
+SAMPLE_EPW = pathlib.Path(__file__).resolve().parent.parent / 'assets' / 'sample.epw'
+
+# Number of timed runs of each phase, overridable through the environment
+DEFAULT_REPEAT = int(os.environ.get('EPWVIZ_BENCH_REPEAT', 3))
+
+# Number of years of the multi-year case, overridable through the environment
+DEFAULT_YEARS = int(os.environ.get('EPWVIZ_BENCH_YEARS', 3))
+
+# Rows per hour of the subhourly case
+SUBHOURLY_TIMESTEP = 4
+
+# First year of the multi-year case, a leap year
+FIRST_YEAR = 2016
+
+# Median ratio to the baseline above which --compare reports a regression
+REGRESSION_THRESHOLD = 1.2
+
+# Index of the first weather field of an EPW row, after the date, time and uncertainty flags
+FIRST_VALUE_FIELD = 6
+
+
+def _epw_rows(text: str) -> tuple:
+    """Split the content of an EPW file into its header lines and the fields of each row."""
+    lines = text.splitlines()
+    return lines[:HEADER_LINES], [line.split(',') for line in lines[HEADER_LINES:] if line.strip()]
+
+
+def _epw_text(header: List[str], rows: List[List[str]]) -> str:
+    """Join header lines and rows of fields back into the content of an EPW file."""
+    return '\n'.join(header + [','.join(row) for row in rows]) + '\n'
+
+
+def subhourly_epw(text: str, timestep: int = SUBHOURLY_TIMESTEP) -> str:
+    """Interpolate an hourly EPW file to several rows per hour.
+    Args:
+        text: Content of an hourly EPW file.
+        timestep: Number of rows per hour of the new file.
+    Returns:
+        The content of the subhourly EPW file.
+    """
+    header, rows = _epw_rows(text)
+    values = np.array([row[FIRST_VALUE_FIELD:] for row in rows], dtype=np.float64)
+    # values are interpolated towards the next hour, wrapping around at the end of the year
+    source = np.arange(len(rows) + 1)
+    target = np.arange(len(rows) * timestep) / timestep
+    closed = np.vstack([values, values[:1]])
+    values = np.column_stack([np.interp(target, source, column) for column in closed.T])
+
+    new_rows = []
+    for i, row_values in enumerate(values):
+        row = list(rows[i // timestep][:FIRST_VALUE_FIELD])
+        row[4] = str((i % timestep + 1) * 60 // timestep)
+        new_rows.append(row + [f'{v:.6g}' for v in row_values])
+    periods = header[HEADER_LINES - 1].split(',')
+    periods[2] = str(timestep)
+    header = header[:HEADER_LINES - 1] + [','.join(periods)]
+    return _epw_text(header, new_rows)
+
+
+def year_epw(text: str, year: int) -> str:
+    """Derive the file of another year from an hourly EPW file.
+
+    The temperatures are offset by a value drawn from the year, and the
+    29th of February is a copy of the 28th in leap years.
+
+    Args:
+        text: Content of an hourly EPW file of a non leap year.
+        year: Year of the new file.
+    Returns:
+        The content of the EPW file of the year.
+    """
+    header, rows = _epw_rows(text)
+    offset = np.random.default_rng(year).normal(0, 1)
+    is_leap_year = calendar.isleap(year)
+    new_rows = []
+    for row in rows:
+        row = [str(year)] + row[1:]
+        # dry bulb and dew point temperatures
+        for i in (6, 7):
+            row[i] = f'{float(row[i]) + offset:.1f}'
+        new_rows.append(row)
+        if is_leap_year and row[1] == '2' and row[2] == '28':
+            new_rows.append(row[:2] + ['29'] + row[3:])
+    leap = header[4].split(',')
+    leap[1] = 'Yes' if is_leap_year else 'No'
+    header = header[:4] + [','.join(leap)] + header[5:]
+    return _epw_text(header, new_rows)
+
+
+def build_cases(years: int = DEFAULT_YEARS, timestep: int = SUBHOURLY_TIMESTEP,
+                sample: pathlib.Path = SAMPLE_EPW) -> Dict[str, List[str]]:
+    """Get the EPW contents of each benchmark case, keyed by case name."""
+    text = pathlib.Path(sample).read_text()
+    return {
+        'sample': [text],
+        'subhourly': [subhourly_epw(text, timestep)],
+        'multi-year': [year_epw(text, FIRST_YEAR + i) for i in range(years)],
+    }
+
+
+class Benchmark(NamedTuple):
+    """Computation of a section and the construction of its figures from the result.
+
+    compute is called with a new EPWStore and the content of its EPW file,
+    figure with the same store and the result of compute.
+    """
+    compute: Callable[[EPWStore, str], Any]
+    figure: Optional[Callable[[EPWStore, Any], Any]] = None
+
+
+# Legend colors of every figure
+COLORS = colorset_colors('original')
+
+# Thresholds of the conditional analysis: comfortable, not too humid and sheltered hours
+CONDITIONS = (Threshold('dry_bulb_temperature', 18, 24), Threshold('relative_humidity', None, 60),
+              Threshold('wind_speed', None, 5))
+
+
+def _parsing(store: EPWStore, text: str) -> EPWStore:
+    return EPWStore.from_text(text)
+
+
+def _unit_conversion(store: EPWStore, text: str) -> list:
+    return [store.field(field, 'IP') for field in FIELDS.values()]
+
+
+def _statistics(store: EPWStore, text: str) -> EPWStatistics:
+    return EPWStatistics.from_store(store)
+
+
+def _periodic(store: EPWStore, text: str) -> HourlyContinuousCollection:
+    return store.to_collection('dry_bulb_temperature')
+
+
+def _periodic_figure(store: EPWStore, data: HourlyContinuousCollection) -> list:
+    return [hourly_data_figure(plot_type, data, COLORS)
+            for plot_type in ('Hourly Plot', 'Mean Daily Plot', 'Line Plot')] + [
+        line_plot_figure(store, FIELDS['Dry Bulb Temperature'], 'SI', COLORS)]
+
+
+def _conditional(store: EPWStore, text: str) -> ConditionResult:
+    return Condition(CONDITIONS).evaluate(store, ANNUAL_PERIOD)
+
+
+def _conditional_figure(store: EPWStore, result: ConditionResult) -> dict:
+    return conditional_analysis(store, 'SI', COLORS, ANNUAL_PERIOD, CONDITIONS)
+
+
+def _psychrometrics(store: EPWStore, text: str):
+    return store_psychrometrics(store)
+
+
+def _psychrometrics_figure(store: EPWStore, derived) -> dict:
+    return derived_psychrometrics_analysis(derived, store, list(DERIVED_PSYCHROMETRICS), 'SI', COLORS)
+
+
+def _thermal_sensation(store: EPWStore, text: str):
+    return store_thermal_sensation(store)
+
+
+def _thermal_sensation_figure(store: EPWStore, thermal_sensation) -> dict:
+    return thermal_sensation_analysis(store, thermal_sensation, COLORS)
+
+
+def _strategies(store: EPWStore, text: str):
+    chart = PsychrometricChart(store.to_collection('dry_bulb_temperature'),
+                               store.to_collection('relative_humidity'),
+                               legend_parameters=LegendParameters(colors=COLORS))
+    polygons = strategy_polygons(0.7, 1.1, 0.1, False)
+    x, y = chart_points(chart)
+    evaluation = polygons.evaluate(x, y, store.field('dry_bulb_temperature'),
+                                   store.field('global_horizontal_radiation'), store.timestep)
+    return chart, polygons, evaluation
+
+
+def _strategies_figure(store: EPWStore, result) -> list:
+    chart, polygons, evaluation = result
+    figure = chart.plot(data=store.to_collection('dry_bulb_temperature'), polygon_pmv=polygons.pmv,
+                        strategies=PSYCHROMETRIC_STRATEGIES['Comfort'], title='PSYCHROMETRIC CHART',
+                        show_title=True, solar_data=store.to_collection('global_horizontal_radiation'))
+    return [figure, strategy_label_figure(evaluation.labels, store.timestep)]
+
+
+def _windrose(store: EPWStore, text: str):
+    engine = WindRoseEngine(store)
+    period = AnalysisPeriod(*ANNUAL_PERIOD)
+    histograms = engine.histograms(period, [field for field, _ in WINDROSE_FIGURES.values()])
+    return histograms, engine.histograms(period, ['wind_speed'], by_month=True)['wind_speed']
+
+
+def _windrose_figure(store: EPWStore, result) -> list:
+    histograms, by_month = result
+    figures = [wind_rose_figure(*histograms[field], COLORS, title)
+               for field, title in WINDROSE_FIGURES.values()]
+    return figures + [wind_rose_small_multiples(*by_month, COLORS, MONTH_NAMES)]
+
+
+def _sunpath(store: EPWStore, text: str):
+    return solar_table(*store.coordinates, timestep=store.timestep, is_leap_year=store.is_leap_year)
+
+
+def _sunpath_figure(store: EPWStore, table):
+    return sunpath_figure(table, store.coordinates, COLORS, values=store.field('dry_bulb_temperature'),
+                          name='Dry Bulb Temperature', unit='C', title='Dry Bulb Temperature')
+
+
+def _degree_days(store: EPWStore, text: str) -> DegreeDayEngine:
+    engine = DegreeDayEngine.from_store(store)
+    bases = np.linspace(0, 40, 201)
+    engine.degree_days(bases, bases)
+    return engine
+
+
+def _degree_days_figure(store: EPWStore, engine: DegreeDayEngine) -> dict:
+    return degree_days_analysis(engine, 18, 24, 'C', bases=(0, 40))
+
+
+def _binning(store: EPWStore, text: str):
+    return store_histogram(store, 'dry_bulb_temperature', AnalysisPeriod(*ANNUAL_PERIOD),
+                           bin_edges(0, 40, 2))
+
+
+def _binning_figure(store: EPWStore, distribution) -> dict:
+    return temperature_bins_analysis(distribution, 'Dry Bulb Temperature', 'C')
+
+
+def _pair_plots(store: EPWStore, text: str):
+    return store_joint_histogram(store, 'dry_bulb_temperature', 'relative_humidity')
+
+
+def _pair_plots_figure(store: EPWStore, joint):
+    return pair_plot_figure(joint, 'Dry Bulb Temperature', 'Relative Humidity')
+
+
+def _report(store: EPWStore, text: str):
+    parameters = ReportParameters().resolve(store)
+    results = report_results(store, parameters)
+    metadata = store.metadata
+    return results, report_context(parameters, metadata['city'], metadata['country'], results)
+
+
+def _report_figure(store: EPWStore, result) -> bytes:
+    results, context = result
+    images = {name: render_png(figure.to_dict()) for name, figure in report_figures(results).items()}
+    return build_report(context, images)
+
+
+# Benchmark of each section, in the order of the dashboard
+SECTIONS: Dict[str, Benchmark] = {
+    'parsing': Benchmark(_parsing),
+    'unit_conversion': Benchmark(_unit_conversion),
+    'statistics': Benchmark(_statistics),
+    'periodic': Benchmark(_periodic, _periodic_figure),
+    'conditional': Benchmark(_conditional, _conditional_figure),
+    'derived_psychrometrics': Benchmark(_psychrometrics, _psychrometrics_figure),
+    'thermal_sensation': Benchmark(_thermal_sensation, _thermal_sensation_figure),
+    'psychrometric_strategies': Benchmark(_strategies, _strategies_figure),
+    'windrose': Benchmark(_windrose, _windrose_figure),
+    'sunpath': Benchmark(_sunpath, _sunpath_figure),
+    'degree_days': Benchmark(_degree_days, _degree_days_figure),
+    'binning': Benchmark(_binning, _binning_figure),
+    'pair_plots': Benchmark(_pair_plots, _pair_plots_figure),
+    'report': Benchmark(_report, _report_figure),
+}
+
+
+def _summary(times: List[float]) -> Dict[str, float]:
+    """Get the first, min and median of the times of a phase, in seconds."""
+    return {'first': round(times[0], 6), 'min': round(min(times), 6),
+            'median': round(statistics.median(times), 6)}
+
+
+def time_section(benchmark: Benchmark, inputs: Sequence[tuple],
+                 repeat: int = DEFAULT_REPEAT) -> Dict[str, Dict[str, float]]:
+    """Time the phases of a section over the EPW files of a case.
+    Args:
+        benchmark: Benchmark of the section.
+        inputs: Tuples of the parsed store and the content of each EPW file.
+        repeat: Number of timed runs.
+    Returns:
+        A dictionary of each phase ('compute' and, when the section has
+        figures, 'figure') to its times, summed over the files of the case.
+    """
+    times = {'compute': []}
+    if benchmark.figure is not None:
+        times['figure'] = []
+    for _ in range(repeat):
+        totals = dict.fromkeys(times, 0.)
+        for parsed, text in inputs:
+            # a new store, so that its conversion and collection caches are cold
+            store = EPWStore(parsed.array, parsed.header_lines, parsed.epw_hash)
+            start = time.perf_counter()
+            result = benchmark.compute(store, text)
+            totals['compute'] += time.perf_counter() - start
+            if benchmark.figure is not None:
+                start = time.perf_counter()
+                benchmark.figure(store, result)
+                totals['figure'] += time.perf_counter() - start
+        for phase, total in totals.items():
+            times[phase].append(total)
+    return {phase: _summary(phase_times) for phase, phase_times in times.items()}
+
+
+def _commit() -> Optional[str]:
+    """Get the commit of the working tree, marked '-dirty' when it has changes."""
+    root = pathlib.Path(__file__).resolve().parent.parent
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short=12', 'HEAD'], cwd=root, check=True,
+                                capture_output=True, text=True).stdout.strip()
+        status = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=root,
+                                check=True, capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return f'{commit}-dirty' if status else commit
+
+
+def run_benchmarks(sections: Sequence[str] = tuple(SECTIONS), repeat: int = DEFAULT_REPEAT,
+                   years: int = DEFAULT_YEARS, cases: Sequence[str] = None, log=print) -> Dict[str, Any]:
+    """Time sections on every benchmark case.
+    Args:
+        sections: Names of the sections of SECTIONS to time.
+        repeat: Number of timed runs of each phase.
+        years: Number of years of the multi-year case.
+        cases: Names of the cases to run, all of them when None.
+        log: Function called with a line of text as each section finishes.
+    Returns:
+        The results, with the environment they were measured in and the
+        times of each case, section and phase.
+    """
+    results = {
+        'commit': _commit(), 'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(), 'numpy': np.__version__,
+        'platform': platform.platform(), 'repeat': repeat, 'cases': {}}
+    for case, texts in build_cases(years).items():
+        if cases is not None and case not in cases:
+            continue
+        inputs = [(EPWStore.from_text(text, content_hash(text.encode())), text) for text in texts]
+        results['cases'][case] = {
+            'files': len(texts), 'rows': sum(len(parsed) for parsed, _ in inputs),
+            'timestep': inputs[0][0].timestep, 'sections': {}}
+        for name in sections:
+            section = time_section(SECTIONS[name], inputs, repeat)
+            results['cases'][case]['sections'][name] = section
+            log(f'{case:<11} {name:<25} ' + '  '.join(
+                f'{phase} {values["median"]:8.3f}s' for phase, values in section.items()))
+    return results
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any],
+            threshold: float = REGRESSION_THRESHOLD, log=print) -> List[str]:
+    """Compare the median times of two benchmark results.
+    Args:
+        results: Current results of run_benchmarks.
+        baseline: Earlier results of run_benchmarks.
+        threshold: Ratio of the medians above which a phase is a regression.
+        log: Function called with the comparison of each phase.
+    Returns:
+        The phases slower than the threshold, as 'case/section/phase'.
+    """
+    regressions = []
+    log(f'compared to {baseline.get("commit")} ({baseline.get("timestamp")})')
+    for case, case_results in results['cases'].items():
+        for name, section in case_results['sections'].items():
+            for phase, values in section.items():
+                try:
+                    before = baseline['cases'][case]['sections'][name][phase]['median']
+                except KeyError:
+                    continue
+                ratio = values['median'] / before if before > 0 else float('inf')
+                key = f'{case}/{name}/{phase}'
+                slower = ratio > threshold
+                if slower:
+                    regressions.append(key)
+                log(f'{key:<50} {before:8.3f}s -> {values["median"]:8.3f}s  x{ratio:.2f}'
+                    + ('  REGRESSION' if slower else ''))
+    return regressions
+
+
+def main(argv: Sequence[str] = None) -> int:
+    """Command line entry point, returning the exit status."""
+    parser = argparse.ArgumentParser(
+        prog='python -m epwviz.benchmark',
+        description='Time the computation and the figures of every dashboard section.')
+    parser.add_argument('--sections', nargs='+', choices=list(SECTIONS), default=list(SECTIONS),
+                        help='Sections to time (default: all).')
+    parser.add_argument('--cases', nargs='+', choices=['sample', 'subhourly', 'multi-year'],
+                        help='Inputs to time the sections on (default: all).')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT,
+                        help='Number of timed runs of each phase (default: %(default)s).')
+    parser.add_argument('--years', type=int, default=DEFAULT_YEARS,
+                        help='Number of years of the multi-year case (default: %(default)s).')
+    parser.add_argument('--output', help='JSON file receiving the results '
+                                         '(default: benchmark-<commit>.json).')
+    parser.add_argument('--compare', help='JSON results of an earlier run to compare with.')
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD,
+                        help='Ratio of the medians reported as a regression (default: %(default)s).')
+    args = parser.parse_args(argv)
+    if args.repeat < 1 or args.years < 1:
+        parser.error('--repeat and --years must be at least 1')
+
+    baseline = None
+    if args.compare:
+        try:
+            baseline = json.loads(pathlib.Path(args.compare).read_text())
+        except (OSError, ValueError) as error:
+            parser.error(f'invalid baseline file: {error}')
+
+    results = run_benchmarks(args.sections, args.repeat, args.years, args.cases)
+    output = pathlib.Path(args.output or f'benchmark-{results["commit"] or "results"}.json')
+    output.write_text(json.dumps(results, indent=2))
+    print(f'results written to {output}')
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f'{len(regressions)} phase(s) slower than x{args.threshold}: {", ".join(regressions)}',
+                  file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,124 @@
+"""Shared, content-addressed cache of parsed EPW objects.
+
+Parsing an EPW file into ladybug data collections is the most expensive step
+of every dashboard rerun. The cache below keeps one parsed object per distinct
+file content (keyed by the SHA-256 of its bytes) for every session served by
+the process and evicts the least recently used entries once a memory cap is
+exceeded.
+"""
+import hashlib
+import os
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict
+
+# Default memory cap of the EPW cache, overridable through the environment
+DEFAULT_MAX_MB = float(os.environ.get('EPWVIZ_EPW_CACHE_MB', 512))
+
+# Approximate size of a boxed Python number held in a data collection
+_VALUE_NBYTES = 24
+
+
+def content_hash(data: bytes) -> str:
+    """Get the SHA-256 hex digest used to identify an EPW file.
+    Args:
+        data: Raw bytes of the file.
+    Returns:
+        A 64 character hexadecimal string.
+    """
+    return hashlib.sha256(data).hexdigest()
+
+
+def epw_nbytes(epw) -> int:
+    """Estimate the memory held by a fully loaded ladybug EPW object.
+    Args:
+        epw: A ladybug EPW object with its data loaded.
+    Returns:
+        Approximate size in bytes.
+    """
+    total = sys.getsizeof(epw)
+    for collection in getattr(epw, '_data', []):
+        values = getattr(collection, '_values', collection)
+        total += sys.getsizeof(values) + len(values) * _VALUE_NBYTES
+    return total
+
+
+class EPWCache:
+    """Thread-safe LRU cache of parsed EPW objects bounded by memory.
+
+    Streamlit serves every session from threads of a single process, so one
+    instance of this class is shared by all users. Concurrent requests for the
+    same key wait for the first parse instead of parsing the file again.
+
+    Args:
+        max_bytes: Memory cap for all cached entries. The most recently used
+            entry is always kept even if it alone exceeds the cap.
+        sizeof: Function estimating the size of a cached value in bytes.
+    """
+
+    def __init__(self, max_bytes: float = DEFAULT_MAX_MB * 1024 ** 2,
+                 sizeof: Callable[[Any], int] = epw_nbytes):
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof
+        self._entries: 'OrderedDict[str, Any]' = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def nbytes(self) -> int:
+        """Total estimated size of the cached entries."""
+        return sum(self._sizes.values())
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def get(self, key: str, loader: Callable[[], Any]) -> Any:
+        """Get the cached value for a key, calling the loader on a miss.
+        Args:
+            key: Content hash of the file.
+            loader: A function without arguments that parses the file.
+        Returns:
+            The cached or freshly loaded value.
+        """
+        with self._lock:
+            if key in self._entries:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            # another session may have finished loading while we waited
+            with self._lock:
+                if key in self._entries:
+                    self.hits += 1
+                    self._entries.move_to_end(key)
+                    return self._entries[key]
+            value = loader()
+            size = self._sizeof(value)
+            with self._lock:
+                self.misses += 1
+                self._entries[key] = value
+                self._sizes[key] = size
+                self._evict()
+                self._key_locks.pop(key, None)
+        return value
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until the memory cap is met."""
+        while len(self._entries) > 1 and self.nbytes > self.max_bytes:
+            key, _ = self._entries.popitem(last=False)
+            self._sizes.pop(key, None)
+
+    def clear(self) -> None:
+        """Remove every cached entry."""
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
@@ -0,0 +1,122 @@
+"""Comparison of several EPW files, eg. a TMY file against future climate morphs and nearby stations.
+
+Files are loaded into memory-mapped EPWStore sidecars, the ones that were
+never parsed being parsed on a process pool, and every comparison reads the
+columns of the stores: no ladybug collection is built, so memory grows with
+the rows of the files only. The summary of each file (monthly means, degree
+days and thermal sensation shares) is computed on a thread pool, most of its
+work being NumPy operations that release the GIL.
+"""
+import os
+import pathlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, NamedTuple, Sequence, Union
+
+import numpy as np
+
+from .cache import content_hash
+from .degreedays import DegreeDayEngine
+from .store import EPWStore, FIELD_NAMES, _field_number, has_sidecar
+from .thermal import store_thermal_sensation
+from .workers import process_pool
+
+# Default number of workers loading and summarizing the files, overridable through the environment
+DEFAULT_WORKERS = int(os.environ.get('EPWVIZ_COMPARE_WORKERS', min(4, os.cpu_count() or 1)))
+
+
+class StationSummary(NamedTuple):
+    """Monthly figures of an EPW file compared with the other files.
+
+    monthly_means and annual_means map the column name of each summarized
+    field to its mean of every month and of the year. heating and cooling
+    are the monthly degree days of one base temperature, ts_shares the
+    percentage of the hours of the year in each thermal sensation category
+    (see epwviz.thermal.CATEGORIES).
+    """
+    monthly_means: Dict[str, np.ndarray]
+    annual_means: Dict[str, float]
+    heating: np.ndarray
+    cooling: np.ndarray
+    ts_shares: np.ndarray
+
+
+def _build_sidecar(epw_bytes: bytes, epw_hash: str, directory: str) -> str:
+    """Parse an EPW file into its sidecar files, in a worker process."""
+    EPWStore.open(epw_bytes, epw_hash, directory)
+    return epw_hash
+
+
+def load_stores(files: Sequence[bytes], directory: Union[str, pathlib.Path] = './data',
+                workers: int = DEFAULT_WORKERS) -> List[EPWStore]:
+    """Load the stores of several EPW files, parsing the new ones in parallel.
+    Args:
+        files: Raw content of each EPW file.
+        directory: Folder holding the sidecar files.
+        workers: Number of worker processes parsing the files without a sidecar.
+    Returns:
+        The memory-mapped EPWStore of each file, in the order of files.
+    """
+    hashes = [content_hash(epw_bytes) for epw_bytes in files]
+    missing = {epw_hash: epw_bytes for epw_hash, epw_bytes in zip(hashes, files)
+               if not has_sidecar(directory, epw_hash)}
+    if len(missing) > 1 and workers > 1:
+        with process_pool(min(workers, len(missing))) as pool:
+            # the stores of the parent process memory-map the sidecars written by the workers
+            list(pool.map(_build_sidecar, missing.values(), missing.keys(),
+                          [str(directory)] * len(missing)))
+    return [EPWStore.open(epw_bytes, epw_hash, directory) for epw_hash, epw_bytes in zip(hashes, files)]
+
+
+def monthly_means(store: EPWStore, fields: Sequence[Union[int, str]],
+                  unit_system: str = 'SI') -> Dict[str, np.ndarray]:
+    """Get the mean of every month of several fields of an EPW file.
+    Args:
+        store: Columnar store of the EPW file.
+        fields: EPW field numbers or column names.
+        unit_system: Either 'SI' or 'IP'.
+    Returns:
+        A dictionary of the column name of each field to its 12 monthly means.
+    """
+    months = store.months.astype(np.intp) - 1
+    counts = np.maximum(np.bincount(months, minlength=12), 1)
+    return {FIELD_NAMES[_field_number(field)]:
+            np.bincount(months, weights=store.field(field, unit_system), minlength=12) / counts
+            for field in fields}
+
+
+def summarize(store: EPWStore, fields: Sequence[Union[int, str]], heat_base: float, cool_base: float,
+              st_hour: int = 0, end_hour: int = 23, unit_system: str = 'SI') -> StationSummary:
+    """Compute the figures of an EPW file compared with the other files.
+    Args:
+        store: Columnar store of the EPW file.
+        fields: EPW field numbers or column names of the monthly means.
+        heat_base: Heating base temperature, in the unit of unit_system.
+        cool_base: Cooling base temperature, in the unit of unit_system.
+        st_hour: First hour of the degree days window.
+        end_hour: Last hour of the degree days window.
+        unit_system: Either 'SI' or 'IP'.
+    Returns:
+        A StationSummary.
+    """
+    degree_days = DegreeDayEngine.from_store(store, st_hour, end_hour, unit_system).degree_days(
+        [heat_base], [cool_base])
+    thermal_sensation = store_thermal_sensation(store)
+    return StationSummary(
+        monthly_means=monthly_means(store, fields, unit_system),
+        annual_means={FIELD_NAMES[_field_number(field)]: float(store.field(field, unit_system).mean())
+                      for field in fields},
+        heating=degree_days.monthly_heating[:, 0], cooling=degree_days.monthly_cooling[:, 0],
+        ts_shares=np.array(list(thermal_sensation.shares.values())))
+
+
+def summarize_stores(stores: Sequence[EPWStore], fields: Sequence[Union[int, str]], heat_base: float,
+                     cool_base: float, st_hour: int = 0, end_hour: int = 23, unit_system: str = 'SI',
+                     workers: int = DEFAULT_WORKERS) -> List[StationSummary]:
+    """Summarize several EPW files in parallel, see summarize.
+
+    Returns:
+        The StationSummary of each store, in the order of stores.
+    """
+    with ThreadPoolExecutor(max(1, min(workers, len(stores)))) as pool:
+        return list(pool.map(lambda store: summarize(store, fields, heat_base, cool_base, st_hour,
+                                                     end_hour, unit_system), stores))
@@ -0,0 +1,113 @@
+"""Met hours of conditions combining thresholds on several fields of an EPW file.
+
+A Condition is compiled once from its thresholds: the field of each one is
+resolved and open bounds are dropped, so evaluating it is a couple of
+vectorized comparisons per threshold over the columns of the store, combined
+in place into a single mask. The rows of the analysis period come from the
+cached masks of epwviz.periods, and the met hours of every month and hour of
+the day are counted with one bincount.
+"""
+from typing import List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from .store import EPWStore, FIELD_NAMES, STRING_FIELDS, _field_number
+
+
+class Threshold(NamedTuple):
+    """Range of values of a field, either bound being optional and included."""
+    field: Union[int, str]
+    minimum: Optional[float] = None
+    maximum: Optional[float] = None
+
+
+class ConditionResult(NamedTuple):
+    """Rows meeting a condition within an analysis period.
+
+    met and in_period are boolean masks with one value per timestep of the
+    file. met_table and period_table hold the hours of each month (rows) and
+    hour of the day (columns) meeting the condition and within the period.
+    """
+    met: np.ndarray
+    in_period: np.ndarray
+    met_table: np.ndarray
+    period_table: np.ndarray
+    timestep: int = 1
+
+    @property
+    def met_hours(self) -> float:
+        return self._hours(np.count_nonzero(self.met))
+
+    @property
+    def unmet_hours(self) -> float:
+        return self._hours(np.count_nonzero(self.in_period) - np.count_nonzero(self.met))
+
+    @property
+    def monthly(self) -> np.ndarray:
+        """Met hours of each month."""
+        return self.met_table.sum(axis=1)
+
+    @property
+    def hourly(self) -> np.ndarray:
+        """Met hours of each hour of the day."""
+        return self.met_table.sum(axis=0)
+
+    def _hours(self, rows: int) -> float:
+        """Convert a number of rows to hours, kept an integer for hourly files."""
+        return int(rows) if self.timestep == 1 else rows / self.timestep
+
+
+class Condition:
+    """Conjunction of thresholds on fields of an EPW file.
+
+    Args:
+        thresholds: Thresholds that every met row satisfies, in the unit
+            system the condition is evaluated in.
+    """
+
+    def __init__(self, thresholds: Sequence[Threshold]):
+        self.thresholds = tuple(Threshold(*threshold) for threshold in thresholds)
+        # (field number, operator, bound) of every bound set
+        self._comparisons: List[Tuple[int, np.ufunc, float]] = []
+        for threshold in self.thresholds:
+            field_number = _field_number(threshold.field)
+            if field_number in STRING_FIELDS or not 0 <= field_number < len(FIELD_NAMES):
+                raise ValueError(f'Field {threshold.field!r} cannot be used in a condition.')
+            if threshold.minimum is not None:
+                self._comparisons.append((field_number, np.greater_equal, float(threshold.minimum)))
+            if threshold.maximum is not None:
+                self._comparisons.append((field_number, np.less_equal, float(threshold.maximum)))
+
+    def mask(self, store: EPWStore, unit_system: str = 'SI') -> np.ndarray:
+        """Get a boolean mask of the rows of an EPW file meeting the condition."""
+        mask = np.ones(len(store), dtype=bool)
+        passed = np.empty(len(store), dtype=bool)
+        for field_number, operator, bound in self._comparisons:
+            operator(store.field(field_number, unit_system), bound, out=passed)
+            mask &= passed
+        return mask
+
+    def evaluate(self, store: EPWStore, analysis_period=None,
+                 unit_system: str = 'SI') -> ConditionResult:
+        """Get the rows of an EPW file meeting the condition within an analysis period.
+        Args:
+            store: Columnar store of the EPW file.
+            analysis_period: A ladybug AnalysisPeriod or its start month, day,
+                hour and end month, day, hour. The whole file when None.
+            unit_system: Either 'SI' or 'IP', the unit of the thresholds.
+        Returns:
+            A ConditionResult.
+        """
+        if analysis_period is None:
+            in_period = np.ones(len(store), dtype=bool)
+        else:
+            in_period = store.period_mask(analysis_period)
+        met = self.mask(store, unit_system)
+        met &= in_period
+        timestep = store.timestep
+        # month and hour of the day of every row, as a single bin of a 12 x 24 table
+        bins = (store.months.astype(np.intp) - 1) * 24 + store.hours
+        met_table, period_table = (
+            np.bincount(bins[rows], minlength=12 * 24).reshape(12, 24) / timestep
+            for rows in (met, in_period))
+        return ConditionResult(met, in_period, met_table, period_table, timestep)
@@ -0,0 +1,96 @@
+"""Degree days of any base temperature from sorted temperatures.
+
+The temperatures of an hour window are sorted once per month along with
+their prefix sums. The heating degree time of a base temperature is then the
+number of values below it times the base, minus the sum of those values,
+which only needs a binary search: HDD and CDD of any number of base
+temperatures are answered in O(log n) each, for every month at once.
+"""
+from typing import NamedTuple, Sequence
+
+import numpy as np
+
+from .store import EPWStore
+
+
+class DegreeDays(NamedTuple):
+    """Heating and cooling degree days of several base temperatures.
+
+    monthly_heating and monthly_cooling have one row per month and one column
+    per base temperature, heating and cooling hold the annual totals.
+    """
+    heat_bases: np.ndarray
+    cool_bases: np.ndarray
+    monthly_heating: np.ndarray
+    monthly_cooling: np.ndarray
+
+    @property
+    def heating(self) -> np.ndarray:
+        return self.monthly_heating.sum(axis=0)
+
+    @property
+    def cooling(self) -> np.ndarray:
+        return self.monthly_cooling.sum(axis=0)
+
+
+class DegreeDayEngine:
+    """Monthly heating and cooling degree days of a temperature series.
+
+    Args:
+        temperature: Temperature of each timestep.
+        months: Month (1-12) of each timestep.
+        timestep: Number of timesteps per hour.
+    """
+
+    def __init__(self, temperature: np.ndarray, months: np.ndarray, timestep: int = 1):
+        temperature = np.asarray(temperature, dtype=np.float64)
+        months = np.asarray(months, dtype=np.intp)
+        # one timestep is 1 / (24 * timestep) day
+        self.scale = 1 / (24 * timestep)
+        self._sorted, self._prefix = [], []
+        for month in range(1, 13):
+            values = np.sort(temperature[months == month])
+            self._sorted.append(values)
+            self._prefix.append(np.concatenate(([0.], np.cumsum(values))))
+
+    @classmethod
+    def from_store(cls, store: EPWStore, st_hour: int = 0, end_hour: int = 23,
+                   unit_system: str = 'SI') -> 'DegreeDayEngine':
+        """Build the engine of the dry bulb temperature of an hour window of an EPW file.
+        Args:
+            store: Columnar store of the EPW file.
+            st_hour: First hour of the window.
+            end_hour: Last hour of the window, before st_hour for windows
+                spanning midnight.
+            unit_system: Either 'SI' or 'IP', the unit of the base temperatures.
+        Returns:
+            A DegreeDayEngine.
+        """
+        mask = store.period_mask((1, 1, st_hour, 12, 31, end_hour))
+        return cls(store.field('dry_bulb_temperature', unit_system)[mask],
+                   store.months[mask], store.timestep)
+
+    def heating(self, bases: Sequence[float]) -> np.ndarray:
+        """Get the monthly heating degree days of base temperatures, as a (12, bases) array."""
+        bases = np.atleast_1d(np.asarray(bases, dtype=np.float64))
+        result = np.empty((12, len(bases)))
+        for month, (values, prefix) in enumerate(zip(self._sorted, self._prefix)):
+            below = np.searchsorted(values, bases, side='left')
+            result[month] = bases * below - prefix[below]
+        return result * self.scale
+
+    def cooling(self, bases: Sequence[float]) -> np.ndarray:
+        """Get the monthly cooling degree days of base temperatures, as a (12, bases) array."""
+        bases = np.atleast_1d(np.asarray(bases, dtype=np.float64))
+        result = np.empty((12, len(bases)))
+        for month, (values, prefix) in enumerate(zip(self._sorted, self._prefix)):
+            below = np.searchsorted(values, bases, side='right')
+            result[month] = (prefix[-1] - prefix[below]) - bases * (len(values) - below)
+        return result * self.scale
+
+    def degree_days(self, heat_bases: Sequence[float],
+                    cool_bases: Sequence[float]) -> DegreeDays:
+        """Get the heating and cooling degree days of several base temperatures."""
+        heat_bases = np.atleast_1d(np.asarray(heat_bases, dtype=np.float64))
+        cool_bases = np.atleast_1d(np.asarray(cool_bases, dtype=np.float64))
+        return DegreeDays(heat_bases, cool_bases, self.heating(heat_bases), self.cooling(cool_bases))
@@ -0,0 +1,56 @@
+"""Largest-Triangle-Three-Buckets downsampling of long time series.
+
+LTTB (Steinarsson, 2013) keeps the first and last points and, in each of
+the buckets splitting the points in between, the point forming the largest
+triangle with the point kept in the previous bucket and the average of the
+next bucket. Peaks and troughs survive, unlike with decimation or averaging,
+so a year of subhourly values drawn at one point per pixel looks like the
+full series. Buckets are processed in order, each with a few vectorized
+operations over its points.
+"""
+import os
+
+import numpy as np
+
+# Values drawn per line by default, about the width of a chart in pixels, overridable through the environment
+DEFAULT_POINTS = int(os.environ.get('EPWVIZ_LINE_POINTS', 1500))
+
+
+def lttb(y: np.ndarray, threshold: int, x: np.ndarray = None) -> np.ndarray:
+    """Get the indices of the points kept by LTTB.
+    Args:
+        y: Values of the series.
+        threshold: Number of points to keep.
+        x: Coordinates of the values, their indices when None.
+    Returns:
+        Sorted indices of the kept points, every index when the series has
+        no more than threshold points.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    count = len(y)
+    if threshold >= count or threshold < 3:
+        return np.arange(count)
+    x = np.arange(count, dtype=np.float64) if x is None else np.asarray(x, dtype=np.float64)
+
+    # threshold - 2 buckets between the first and the last point
+    edges = np.linspace(1, count - 1, threshold - 1).astype(np.intp)
+    # average of every bucket, from cumulative sums
+    x_sums, y_sums = np.concatenate(([0.], np.cumsum(x))), np.concatenate(([0.], np.cumsum(y)))
+    sizes = np.maximum(np.diff(edges), 1)
+    x_means = (x_sums[edges[1:]] - x_sums[edges[:-1]]) / sizes
+    y_means = (y_sums[edges[1:]] - y_sums[edges[:-1]]) / sizes
+    # the last bucket looks ahead at the last point
+    x_means = np.append(x_means[1:], x[-1])
+    y_means = np.append(y_means[1:], y[-1])
+
+    kept = np.empty(threshold, dtype=np.intp)
+    kept[0], kept[-1] = 0, count - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], max(edges[bucket + 1], edges[bucket] + 1)
+        # twice the area of the triangles, the factor does not change the largest one
+        areas = np.abs((x[previous] - x_means[bucket]) * (y[start:end] - y[previous])
+                       - (x[previous] - x[start:end]) * (y_means[bucket] - y[previous]))
+        previous = start + int(np.argmax(areas))
+        kept[bucket + 1] = previous
+    return kept
@@ -0,0 +1,82 @@
+"""In-memory, parallel PNG export of the dashboard figures.
+
+Figures are rendered to bytes by worker processes, each one keeping its own
+Kaleido renderer alive between jobs. Rendered images are kept keyed by the
+inputs the figure was built from, so a figure is only exported again once
+those inputs change.
+"""
+import os
+import time
+from concurrent.futures import as_completed
+from typing import Callable, Dict, Tuple
+
+import plotly.io as pio
+from plotly.graph_objects import Figure
+
+from .instrumentation import add_record
+from .workers import KeyedPool
+
+# Default number of worker processes, overridable through the environment
+DEFAULT_WORKERS = int(os.environ.get('EPWVIZ_EXPORT_WORKERS', min(4, os.cpu_count() or 1)))
+
+# Number of rendered images kept in memory
+DEFAULT_MAX_ENTRIES = 256
+
+
+def render_png(figure: dict) -> bytes:
+    """Render a figure to PNG bytes.
+
+    Kaleido starts its renderer on the first call and reuses it afterwards,
+    so workers of the pool only pay for its start once.
+
+    Args:
+        figure: Dictionary of a plotly figure (see Figure.to_dict).
+    Returns:
+        The content of the PNG image.
+    """
+    return pio.to_image(figure, format='png')
+
+
+class FigureExporter(KeyedPool):
+    """Export figures to PNG in a process pool and keep the rendered images.
+
+    Args:
+        max_workers: Number of worker processes.
+        max_entries: Number of rendered images kept.
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_WORKERS,
+                 max_entries: int = DEFAULT_MAX_ENTRIES):
+        super().__init__(max_workers, max_entries)
+
+    def export(self, figures: Dict[str, Tuple[str, Figure]],
+               progress: Callable[[int, int], None] = None) -> Dict[str, bytes]:
+        """Get the PNG images of several figures, rendering the missing ones in parallel.
+        Args:
+            figures: Dictionary of image name to a tuple with a hash of the
+                inputs of the figure and the figure itself.
+            progress: Optional function called with the number of finished and
+                total images each time an image is ready.
+        Returns:
+            Dictionary of image name to PNG bytes.
+        """
+        images, futures = {}, {}
+        start = time.perf_counter()
+        for name, (key, figure) in figures.items():
+            image = self.get(key)
+            if image is None:
+                futures[self.submit(key, render_png, figure.to_dict())] = name
+            else:
+                images[name] = image
+                add_record(name, 'export', True, 0.)
+
+        total = len(figures)
+        if progress is not None:
+            progress(len(images), total)
+        for future in as_completed(futures):
+            images[futures[future]] = future.result()
+            # images render in parallel, each one is timed from the start of the export
+            add_record(futures[future], 'export', False, time.perf_counter() - start)
+            if progress is not None:
+                progress(len(images), total)
+        return images
@@ -0,0 +1,139 @@
+"""Binned distributions of EPW fields.
+
+Values are binned with a single np.bincount over a combined (month, bin)
+index, which gives the monthly and the whole period distributions at once.
+Bins are closed on the right, (edges[i], edges[i + 1]], like pandas.cut.
+Joint distributions of two fields are binned the same way into a
+(month, x bin, y bin) cube.
+"""
+from typing import List, NamedTuple, Union
+
+import numpy as np
+from ladybug.analysisperiod import AnalysisPeriod
+
+from .store import EPWStore
+
+
+class Distribution(NamedTuple):
+    """Number of timesteps of a field within each value bin.
+
+    monthly holds the counts of each month with shape (12, bins) and counts
+    their sum. below and total are the number of timesteps at or below the
+    first edge and the number of timesteps in the period.
+    """
+    edges: np.ndarray
+    counts: np.ndarray
+    monthly: np.ndarray
+    below: int
+    total: int
+
+    @property
+    def cumulative(self) -> np.ndarray:
+        """Percentage of the timesteps at or below the upper edge of each bin."""
+        return (self.below + np.cumsum(self.counts)) / max(self.total, 1) * 100
+
+
+class JointDistribution(NamedTuple):
+    """Number of timesteps of each month within each (x bin, y bin) cell.
+
+    cube has shape (12, x bins, y bins). Edges cover the full range of the
+    values, the first bin including its lower edge.
+    """
+    x_edges: np.ndarray
+    y_edges: np.ndarray
+    cube: np.ndarray
+
+
+# Default number of bins of each axis of a joint distribution
+JOINT_BINS = 20
+
+
+def bin_edges(low: float, high: float, step: float) -> np.ndarray:
+    """Get evenly spaced bin edges from low up to high (included when on a step).
+
+    Raises a ValueError when high is below low or step is not positive.
+    """
+    if high < low:
+        raise ValueError(f'The maximum value {high:g} is below the minimum value {low:g}.')
+    if step <= 0:
+        raise ValueError(f'The bin width must be positive, not {step:g}.')
+    return np.arange(low, high + step / 2, step)
+
+
+def bin_labels(edges: np.ndarray, unit: str = '') -> List[str]:
+    """Get the label of each bin, eg. '18-20°C'."""
+    return [f'{a:g}-{b:g}{unit}' for a, b in zip(edges[:-1], edges[1:])]
+
+
+def histogram(values: np.ndarray, edges: np.ndarray, months: np.ndarray) -> Distribution:
+    """Count the values within each bin, per month.
+    Args:
+        values: Values of each timestep.
+        edges: Increasing bin edges.
+        months: Month (1-12) of each timestep.
+    Returns:
+        A Distribution.
+    """
+    values = np.asarray(values)
+    bins = len(edges) - 1
+    index = np.searchsorted(edges, values, side='left') - 1
+    inside = (index >= 0) & (index < bins)
+    monthly = np.bincount((np.asarray(months, dtype=np.intp)[inside] - 1) * bins + index[inside],
+                          minlength=12 * bins).reshape(12, bins)
+    return Distribution(edges=np.asarray(edges), counts=monthly.sum(axis=0), monthly=monthly,
+                        below=int(np.count_nonzero(values <= edges[0])), total=len(values))
+
+
+def store_histogram(store: EPWStore, field: Union[int, str], analysis_period: AnalysisPeriod,
+                    edges: np.ndarray, unit_system: str = 'SI') -> Distribution:
+    """Get the distribution of a field of an EPW file over an analysis period.
+    Args:
+        store: Columnar store of the EPW file.
+        field: An EPW field number or a column name.
+        analysis_period: Period of the distribution.
+        edges: Bin edges, in the unit of unit_system.
+        unit_system: Either 'SI' or 'IP'.
+    Returns:
+        A Distribution.
+    """
+    mask = store.period_mask(analysis_period)
+    return histogram(store.field(field, unit_system)[mask], edges, store.months[mask])
+
+
+def range_edges(values: np.ndarray, bins: int = JOINT_BINS) -> np.ndarray:
+    """Get evenly spaced edges covering the full range of some values."""
+    low, high = float(np.min(values)), float(np.max(values))
+    if high <= low:
+        high = low + 1
+    return np.linspace(low, high, bins + 1)
+
+
+def _range_index(values: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    """Get the bin of values within the range of edges, the first bin being closed."""
+    return np.clip(np.searchsorted(edges, values, side='left') - 1, 0, len(edges) - 2)
+
+
+def joint_histogram(x: np.ndarray, y: np.ndarray, months: np.ndarray,
+                    bins: int = JOINT_BINS) -> JointDistribution:
+    """Count the timesteps of each month within each cell of a 2-D grid of two fields.
+    Args:
+        x: Values of the first field at each timestep.
+        y: Values of the second field at each timestep.
+        months: Month (1-12) of each timestep.
+        bins: Number of bins of each axis, spanning the range of each field.
+    Returns:
+        A JointDistribution.
+    """
+    x_edges, y_edges = range_edges(x, bins), range_edges(y, bins)
+    nx, ny = len(x_edges) - 1, len(y_edges) - 1
+    index = ((np.asarray(months, dtype=np.intp) - 1) * nx + _range_index(x, x_edges)) * ny \
+        + _range_index(y, y_edges)
+    cube = np.bincount(index, minlength=12 * nx * ny).reshape(12, nx, ny)
+    return JointDistribution(x_edges, y_edges, cube)
+
+
+def store_joint_histogram(store: EPWStore, x_field: Union[int, str], y_field: Union[int, str],
+                          unit_system: str = 'SI', bins: int = JOINT_BINS) -> JointDistribution:
+    """Get the monthly joint distribution of two fields of an EPW file."""
+    return joint_histogram(store.field(x_field, unit_system), store.field(y_field, unit_system),
+                           store.months, bins)
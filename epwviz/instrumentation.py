@@ -0,0 +1,329 @@
+"""Opt-in latency, cache hit and memory instrumentation of dashboard reruns.
+
+A Recorder collects one Record per measured call of a rerun: the compute
+function of a section (a hit when its stored result is reused), a cached
+function (a hit when the cache answers without running its body), a
+figure export or a lap of the script drawing a part of the page. Memory is traced with tracemalloc while a recorder is
+recording, which slows every session of the process down, hence the opt-in;
+the memory figures of reruns of concurrent sessions overlap. Tracing is
+reference counted over the recorders of the process and stops with the last
+one, whether it is finished or dropped by an interrupted rerun.
+
+Measurements go to the recorder activated for the current thread (each
+Streamlit session runs its script in its own thread) and cost a context
+variable lookup when none is active. Records are added up in process-wide
+Metrics, which are rendered in the Prometheus text exposition format.
+"""
+import functools
+import os
+import pathlib
+import threading
+import time
+import tracemalloc
+import weakref
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+# Prefix of the name of every exported metric
+METRIC_PREFIX = 'epwviz'
+
+# Whether reruns are instrumented until a session turns it off, set through the environment
+DEFAULT_ENABLED = os.environ.get('EPWVIZ_INSTRUMENTATION', '0') not in ('', '0')
+
+# Optional file receiving the metrics after every instrumented rerun, eg. for the
+# textfile collector of the Prometheus node exporter
+METRICS_FILE = os.environ.get('EPWVIZ_METRICS_FILE')
+
+
+# Number of recorders tracing memory, and whether tracing was started for them
+_tracing_lock = threading.Lock()
+_tracing_count = 0
+_tracing_started = False
+
+
+def _acquire_tracing() -> None:
+    """Count a recorder tracing memory, starting tracemalloc unless it already runs."""
+    global _tracing_count, _tracing_started
+    with _tracing_lock:
+        if _tracing_count == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _tracing_started = True
+        _tracing_count += 1
+
+
+def _release_tracing() -> None:
+    """Stop counting a recorder, stopping tracemalloc with the last one if it was started for them."""
+    global _tracing_count, _tracing_started
+    with _tracing_lock:
+        _tracing_count -= 1
+        if _tracing_count == 0 and _tracing_started:
+            tracemalloc.stop()
+            _tracing_started = False
+
+
+class Record(NamedTuple):
+    """Measurement of one call.
+
+    allocated is the memory still allocated at the end of the call and peak
+    the highest memory allocated during the call, both in bytes relative to
+    its start, and None when memory is not traced. depth is the number of
+    measured calls the call is nested in.
+    """
+    name: str
+    kind: str
+    hit: bool
+    seconds: float
+    allocated: Optional[int] = None
+    peak: Optional[int] = None
+    depth: int = 0
+
+
+class Measurement:
+    """Mutable state of a call being measured. Set hit to False on a cache miss."""
+
+    def __init__(self):
+        self.hit = True
+        self.start_memory = None
+        # highest memory traced by the calls nested in this one
+        self.nested_peak = 0
+
+
+class Recorder:
+    """Records of the measured calls of one rerun, in the order the calls started.
+
+    Args:
+        trace_memory: Set to True to trace the memory allocated by each call.
+    """
+
+    def __init__(self, trace_memory: bool = True):
+        self.records: List[Record] = []
+        self._stack: List[Measurement] = []
+        self._release_tracing = None
+        if trace_memory:
+            _acquire_tracing()
+            # released by finish, or when the recorder of an interrupted rerun is collected
+            self._release_tracing = weakref.finalize(self, _release_tracing)
+        self._start = time.perf_counter()
+        self.seconds: Optional[float] = None
+        self._lap = None
+
+    @property
+    def tracing(self) -> bool:
+        """Whether memory is traced (possibly by another recorder of the process)."""
+        return tracemalloc.is_tracing()
+
+    @contextmanager
+    def measure(self, name: str, kind: str) -> Iterator[Measurement]:
+        """Measure the wall time and memory of a block of code."""
+        measurement = Measurement()
+        if self.tracing:
+            current, peak = tracemalloc.get_traced_memory()
+            if self._stack:
+                # the peak is reset for this call, keep the one of the calls it is nested in
+                self._stack[-1].nested_peak = max(self._stack[-1].nested_peak, peak)
+            tracemalloc.reset_peak()
+            measurement.start_memory = current
+        depth = len(self._stack)
+        # the record is filled in when the call ends, records stay in call order
+        index = len(self.records)
+        self.records.append(None)
+        self._stack.append(measurement)
+        start = time.perf_counter()
+        try:
+            yield measurement
+        finally:
+            seconds = time.perf_counter() - start
+            self._stack.pop()
+            allocated = peak = None
+            if measurement.start_memory is not None and self.tracing:
+                current, traced_peak = tracemalloc.get_traced_memory()
+                traced_peak = max(traced_peak, measurement.nested_peak)
+                allocated, peak = current - measurement.start_memory, traced_peak - measurement.start_memory
+                if self._stack:
+                    self._stack[-1].nested_peak = max(self._stack[-1].nested_peak, traced_peak)
+            self.records[index] = Record(name, kind, measurement.hit, seconds, allocated, peak, depth)
+
+    def lap(self, name: str) -> None:
+        """End the running lap and start a new one, recorded as a 'view'.
+
+        Laps time the consecutive parts of a script (eg. the code drawing each
+        section) without moving them into a with block. Call it at the top
+        level of the script only.
+        """
+        self._end_lap()
+        self._lap = self.measure(name, 'view')
+        self._lap.__enter__()
+
+    def _end_lap(self) -> None:
+        """End the running lap, if any."""
+        if self._lap is not None:
+            self._lap.__exit__(None, None, None)
+            self._lap = None
+
+    def add(self, name: str, kind: str, hit: bool, seconds: float) -> None:
+        """Add the record of a call measured elsewhere, eg. in a worker process."""
+        self.records.append(Record(name, kind, hit, seconds, depth=len(self._stack)))
+
+    def mark_miss(self) -> None:
+        """Note that the innermost measured call missed its cache."""
+        if self._stack:
+            self._stack[-1].hit = False
+
+    @property
+    def finished(self) -> bool:
+        return self.seconds is not None
+
+    def finish(self) -> 'Recorder':
+        """Stop the rerun, setting its total wall time, and release memory tracing."""
+        self._end_lap()
+        self.seconds = time.perf_counter() - self._start
+        if self._release_tracing is not None:
+            # a finalizer only runs once
+            self._release_tracing()
+        return self
+
+
+_active: ContextVar[Optional[Recorder]] = ContextVar('epwviz_recorder', default=None)
+
+
+def activate(recorder: Optional[Recorder]) -> None:
+    """Send the measurements of the current thread to a recorder, or stop measuring with None."""
+    _active.set(recorder)
+
+
+def active() -> Optional[Recorder]:
+    """Get the recorder of the current thread, None when nothing is measured."""
+    return _active.get()
+
+
+@contextmanager
+def measure(name: str, kind: str) -> Iterator[Measurement]:
+    """Measure a block of code with the active recorder, if any."""
+    recorder = _active.get()
+    if recorder is None:
+        yield Measurement()
+        return
+    with recorder.measure(name, kind) as measurement:
+        yield measurement
+
+
+def lap(name: str) -> None:
+    """Start a new lap of the active recorder, if any (see Recorder.lap)."""
+    recorder = _active.get()
+    if recorder is not None:
+        recorder.lap(name)
+
+
+def add_record(name: str, kind: str, hit: bool, seconds: float) -> None:
+    """Add the record of a call measured elsewhere to the active recorder, if any."""
+    recorder = _active.get()
+    if recorder is not None:
+        recorder.add(name, kind, hit, seconds)
+
+
+def instrument_cache(cache: Callable[[Callable], Callable], name: str = None) -> Callable[[Callable], Callable]:
+    """Wrap a caching decorator (eg. st.cache_data()) to record the hits and misses of a function.
+
+    Usage:
+        @instrument_cache(st.cache_data(max_entries=16))
+        def get_value(epw_hash: str, _store: EPWStore) -> ...
+
+    The body of the function marks the call as a miss when the cache runs
+    it. The signature, name and clear method of the cached function are kept.
+
+    Args:
+        cache: Caching decorator.
+        name: Name of the records, the name of the function by default.
+    Returns:
+        A decorator.
+    """
+    def decorator(func: Callable) -> Callable:
+        record_name = name or func.__name__
+
+        @functools.wraps(func)
+        def body(*args, **kwargs):
+            recorder = _active.get()
+            if recorder is not None:
+                recorder.mark_miss()
+            return func(*args, **kwargs)
+
+        cached = cache(body)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            recorder = _active.get()
+            if recorder is None:
+                return cached(*args, **kwargs)
+            with recorder.measure(record_name, 'cache'):
+                return cached(*args, **kwargs)
+
+        if hasattr(cached, 'clear'):
+            wrapper.clear = cached.clear
+        return wrapper
+    return decorator
+
+
+def _label(value: str) -> str:
+    """Escape a Prometheus label value."""
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Metrics:
+    """Totals of the records of every rerun of the process, safe to update from several sessions."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reruns = 0
+        self.rerun_seconds = 0.
+        self._calls: Dict[Tuple[str, str, str], int] = {}
+        self._seconds: Dict[Tuple[str, str], float] = {}
+        self._last: Dict[Tuple[str, str], Record] = {}
+
+    def add(self, recorder: Recorder) -> None:
+        """Add the records of a finished rerun."""
+        with self._lock:
+            self.reruns += 1
+            self.rerun_seconds += recorder.seconds or 0.
+            for record in recorder.records:
+                key = (record.kind, record.name)
+                result = 'hit' if record.hit else 'miss'
+                self._calls[key + (result,)] = self._calls.get(key + (result,), 0) + 1
+                self._seconds[key] = self._seconds.get(key, 0.) + record.seconds
+                self._last[key] = record
+
+    def to_prometheus(self) -> str:
+        """Render the metrics in the Prometheus text exposition format."""
+        p = METRIC_PREFIX
+        lines = []
+
+        def family(metric: str, kind: str, description: str, samples: List[Tuple[str, float]]) -> None:
+            lines.extend([f'# HELP {p}_{metric} {description}', f'# TYPE {p}_{metric} {kind}'])
+            lines.extend(f'{p}_{metric}{labels} {value!r}' for labels, value in samples)
+
+        with self._lock:
+            family('reruns_total', 'counter', 'Number of instrumented reruns.', [('', self.reruns)])
+            family('rerun_seconds_total', 'counter', 'Wall time of the instrumented reruns.',
+                   [('', round(self.rerun_seconds, 6))])
+            family('calls_total', 'counter', 'Number of calls of each section, cached function and export.',
+                   [(f'{{kind="{_label(kind)}",name="{_label(name)}",result="{result}"}}', count)
+                    for (kind, name, result), count in sorted(self._calls.items())])
+            family('call_seconds_total', 'counter', 'Wall time spent in each section, cached function and export.',
+                   [(f'{{kind="{_label(kind)}",name="{_label(name)}"}}', round(seconds, 6))
+                    for (kind, name), seconds in sorted(self._seconds.items())])
+            for metric, field, description in (
+                    ('last_call_seconds', 'seconds', 'Wall time of the last call.'),
+                    ('last_allocated_bytes', 'allocated', 'Memory still allocated after the last call.'),
+                    ('last_peak_bytes', 'peak', 'Highest memory allocated during the last call.')):
+                family(metric, 'gauge', description,
+                       [(f'{{kind="{_label(kind)}",name="{_label(name)}"}}', getattr(record, field))
+                        for (kind, name), record in sorted(self._last.items())
+                        if getattr(record, field) is not None])
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path: str) -> None:
+        """Write the metrics to a file under a temporary name, then move it in place."""
+        path = pathlib.Path(path)
+        tmp_path = path.with_name(f'.{path.name}.{os.getpid()}')
+        tmp_path.write_text(self.to_prometheus())
+        os.replace(tmp_path, path)
@@ -0,0 +1,156 @@
+"""Row masks of analysis periods over annual data.
+
+The rows of an annual EPW file only depend on its timestep and on whether
+it holds a leap year, so the time index of each (timestep, leap year) pair
+is built once and every analysis period is turned into the rows it selects
+with a few vectorized comparisons, instead of the per-step DateTime loop of
+AnalysisPeriod.hoys. Rows and masks are cached per period, so the sections
+using the same period share them.
+
+Rows match the ones ladybug selects, including its handling of overnight
+hours, periods across the new year, and the steps of the last hour of the
+day, which are only included when midnight is a possible hour.
+"""
+from functools import lru_cache
+from typing import NamedTuple, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from ladybug.analysisperiod import AnalysisPeriod
+from ladybug.datacollection import HourlyContinuousCollection, HourlyDiscontinuousCollection
+from ladybug.header import Header
+
+# Number of periods whose rows and masks are kept for each (timestep, leap year) pair
+CACHE_SIZE = 256
+
+# Start month, day, hour and end month, day, hour of a period
+Period = Tuple[int, int, int, int, int, int]
+
+# Period of a whole year, the defaults of AnalysisPeriod
+ANNUAL = (1, 1, 0, 12, 31, 23)
+
+
+class TimeIndex(NamedTuple):
+    """Month, day, day of the year, hour of the day and step within the hour of every row."""
+    month: np.ndarray
+    day: np.ndarray
+    day_of_year: np.ndarray
+    hour: np.ndarray
+    step: np.ndarray
+
+
+def _read_only(array: np.ndarray) -> np.ndarray:
+    array.flags.writeable = False
+    return array
+
+
+@lru_cache(maxsize=16)
+def time_index(timestep: int = 1, is_leap_year: bool = False) -> TimeIndex:
+    """Get the time index of the rows of annual data.
+    Args:
+        timestep: Number of rows per hour.
+        is_leap_year: Whether the data holds a leap year.
+    Returns:
+        A TimeIndex of read-only arrays.
+    """
+    days = 366 if is_leap_year else 365
+    rows = np.arange(days * 24 * timestep)
+    day_of_year = rows // (24 * timestep) + 1
+    month_days = np.array(AnalysisPeriod.NUMOFDAYSEACHMONTHLEAP if is_leap_year
+                          else AnalysisPeriod.NUMOFDAYSEACHMONTH)
+    month_starts = np.concatenate([[0], np.cumsum(month_days)[:-1]])
+    month = np.searchsorted(month_starts, day_of_year - 1, side='right')
+    return TimeIndex(*(_read_only(a.astype(np.int16)) for a in (
+        month, day_of_year - month_starts[month - 1], day_of_year,
+        rows // timestep % 24, rows % timestep)))
+
+
+def period_key(analysis_period: Union[AnalysisPeriod, Sequence[Optional[int]]]) -> Period:
+    """Get the (start month, day, hour, end month, day, hour) of an analysis period.
+
+    Values of a sequence left to None take the default of AnalysisPeriod.
+    """
+    if isinstance(analysis_period, AnalysisPeriod):
+        ap = analysis_period
+        return ap.st_month, ap.st_day, ap.st_hour, ap.end_month, ap.end_day, ap.end_hour
+    return tuple(default if v is None else int(v) for v, default in zip(analysis_period, ANNUAL))
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def period_rows(period: Period, timestep: int = 1, is_leap_year: bool = False) -> np.ndarray:
+    """Get the rows of annual data within an analysis period.
+    Args:
+        period: Start month, day, hour and end month, day, hour of the period.
+        timestep: Number of rows per hour.
+        is_leap_year: Whether the data holds a leap year.
+    Returns:
+        A read-only array of row numbers in the order of AnalysisPeriod.hoys,
+        ie. from the start of the period for periods across the new year.
+    """
+    ap = AnalysisPeriod(*period, timestep=timestep, is_leap_year=is_leap_year)
+    index = time_index(timestep, is_leap_year)
+    day_step = index.hour.astype(np.intp) * timestep + index.step
+    midnight = ap.st_hour == 0 or ap.is_overnight
+    if midnight:
+        # ladybug counts the steps after 23:00 as 23:00 when midnight is a possible hour
+        day_step = np.minimum(day_step, 23 * timestep)
+    st_step, end_step = ap.st_hour * timestep, ap.end_hour * timestep
+    if ap.is_overnight:
+        in_hours = (day_step >= st_step) | (day_step <= end_step)
+    else:
+        in_hours = (day_step >= st_step) & (day_step <= end_step)
+
+    # and adds the steps following a segment ending at 23:00, whatever the hours of the period
+    extra = timestep - 1 if midnight else 0
+
+    def segment(first: int, last: int, last_hour: int) -> np.ndarray:
+        """Rows within the hours of the period from step first to step last, at last_hour."""
+        rows = np.flatnonzero(in_hours[first:last + 1]) + first
+        if last_hour == 23 and extra:
+            rows = np.concatenate([rows, np.arange(last + 1, last + 1 + extra)])
+        return rows
+
+    start = int(round(ap.st_time.hoy * timestep))
+    end = int(round(ap.end_time.hoy * timestep))
+    if ap.is_reversed:
+        # from the start to the last hour of the year, then from the first hour to the end
+        rows = np.concatenate([segment(start, len(day_step) - timestep, 23),
+                               segment(0, end, ap.end_hour)])
+    else:
+        rows = segment(start, end, ap.end_hour)
+    return _read_only(rows)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def period_mask(period: Period, timestep: int = 1, is_leap_year: bool = False) -> np.ndarray:
+    """Get a read-only boolean mask of the rows of annual data within an analysis period."""
+    index = time_index(timestep, is_leap_year)
+    mask = np.zeros(len(index.hour), dtype=bool)
+    mask[period_rows(period, timestep, is_leap_year)] = True
+    return _read_only(mask)
+
+
+def filter_period(data: HourlyContinuousCollection, period: Sequence[int]):
+    """Filter an annual collection by an analysis period, like filter_by_analysis_period.
+
+    The values are picked with the cached rows of the period and, for
+    periods covering whole days, the collection is only built when the
+    period is not the whole year.
+
+    Args:
+        data: Annual HourlyContinuousCollection.
+        period: Start month, day, hour and end month, day, hour of the period.
+    Returns:
+        An HourlyContinuousCollection for periods covering whole days, an
+        HourlyDiscontinuousCollection otherwise.
+    """
+    data_ap = data.header.analysis_period
+    ap = AnalysisPeriod(*period, timestep=data_ap.timestep, is_leap_year=data_ap.is_leap_year)
+    rows = period_rows(period_key(ap), ap.timestep, ap.is_leap_year)
+    header = Header(data.header.data_type, data.header.unit, ap, data.header.metadata)
+    if ap.st_hour == 0 and ap.end_hour == 23:
+        if len(rows) == len(data) and not ap.is_reversed:
+            return data
+        return HourlyContinuousCollection(header, np.asarray(data.values)[rows].tolist())
+    datetimes = data.datetimes
+    return HourlyDiscontinuousCollection(header, np.asarray(data.values)[rows].tolist(),
+                                         [datetimes[i] for i in rows])
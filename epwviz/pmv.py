@@ -0,0 +1,147 @@
+"""Vectorized Fanger PMV/PPD and parameter sweeps.
+
+fanger_pmv mirrors ladybug_comfort.pmv.fanger_pmv on arrays: the iterative
+clothing surface temperature solve runs on every input combination at once,
+each element stopping at the same tolerance as the scalar function. Sweeps
+evaluate the full grid of several parameter ranges, in chunks spread over a
+process pool when the grid is large.
+"""
+import os
+from typing import Dict, NamedTuple, Sequence, Tuple, Union
+
+import numpy as np
+
+from .workers import process_pool
+
+# Inputs of the PMV model, in the order of fanger_pmv
+PARAMETERS = ('ta', 'tr', 'vel', 'rh', 'met', 'clo')
+
+# Default number of worker processes of a sweep, overridable through the environment
+DEFAULT_WORKERS = int(os.environ.get('EPWVIZ_PMV_WORKERS', 1))
+
+# Number of grid points evaluated by each job of a sweep
+CHUNK_SIZE = 100000
+
+# Convergence tolerance and maximum iterations of the clothing temperature solve
+EPSILON = 0.00015
+MAX_ITERATIONS = 150
+
+
+class PMVSweep(NamedTuple):
+    """PMV and PPD over the grid of a parameter sweep.
+
+    axes maps each swept parameter (with more than one value) to its values,
+    in the order of PARAMETERS, and pmv and ppd have one dimension per axis.
+    fixed holds the value of the other parameters.
+    """
+    axes: Dict[str, np.ndarray]
+    fixed: Dict[str, float]
+    pmv: np.ndarray
+    ppd: np.ndarray
+
+
+def ppd_from_pmv(pmv: np.ndarray) -> np.ndarray:
+    """Calculate the Percentage of People Dissatisfied (PPD) of PMV values."""
+    pmv = np.asarray(pmv, dtype=np.float64)
+    return 100.0 - 95.0 * np.exp(-0.03353 * pmv ** 4 - 0.2179 * pmv ** 2)
+
+
+def fanger_pmv(ta: np.ndarray, tr: np.ndarray, vel: np.ndarray, rh: np.ndarray,
+               met: np.ndarray, clo: np.ndarray, wme: float = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """Calculate PMV and PPD with Fanger's original equation on arrays of inputs.
+
+    Inputs are broadcast against each other. Combinations for which the
+    solve does not converge get a PMV of 0 and a PPD of 5, like ladybug.
+
+    Args:
+        ta: Air temperature [C]
+        tr: Mean radiant temperature [C]
+        vel: Relative air velocity [m/s]
+        rh: Relative humidity [%]
+        met: Metabolic rate [met]
+        clo: Clothing [clo]
+        wme: External work [met], normally around 0 when seated
+    Returns:
+        A tuple with the PMV and the PPD [%] arrays.
+    """
+    ta, tr, vel, rh, met, clo = (np.asarray(v, dtype=np.float64)
+                                 for v in np.broadcast_arrays(ta, tr, vel, rh, met, clo))
+    pa = rh * 10. * np.exp(16.6536 - 4030.183 / (ta + 235.))
+    icl = 0.155 * clo  # thermal insulation of the clothing in M2K/W
+    m = met * 58.15  # metabolic rate in W/m2
+    mw = m - wme * 58.15  # internal heat production in the human body
+    fcl = np.where(icl <= 0.078, 1 + 1.29 * icl, 1.05 + 0.645 * icl)
+    # heat transfer coefficient by forced convection
+    hcf = 12.1 * np.sqrt(vel)
+    taa = ta + 273.
+    tra = tr + 273.
+    tcla = taa + (35.5 - ta) / (3.5 * icl + 0.1)
+    p1 = icl * fcl
+    p2 = p1 * 3.96
+    p3 = p1 * 100.
+    p4 = p1 * taa
+    p5 = 308.7 - 0.028 * mw + (p2 * ((tra / 100.) ** 4))
+
+    xn = tcla / 100.
+    xf = tcla / 50.
+    hc = np.zeros_like(xn)
+    active = np.abs(xn - xf) > EPSILON
+    failed = np.zeros_like(active)
+    for _ in range(MAX_ITERATIONS + 1):
+        if not active.any():
+            break
+        xf[active] = (xf[active] + xn[active]) / 2.
+        hcn = 2.38 * np.abs(100.0 * xf[active] - taa[active]) ** 0.25
+        hc[active] = np.maximum(hcf[active], hcn)
+        xn[active] = (p5[active] + p4[active] * hc[active] - p2[active] * xf[active] ** 4) \
+            / (100. + p3[active] * hc[active])
+        active[active] = np.abs(xn[active] - xf[active]) > EPSILON
+    else:
+        failed = active
+
+    tcl = 100. * xn - 273.
+    hl1 = 3.05 * 0.001 * (5733. - (6.99 * mw) - pa)  # conduction through skin
+    hl2 = np.where(mw > 58.15, 0.42 * (mw - 58.15), 0)  # sweating
+    hl3 = 1.7 * 0.00001 * m * (5867. - pa)  # latent respiration
+    hl4 = 0.0014 * m * (34. - ta)  # dry respiration
+    hl5 = 3.96 * fcl * (xn ** 4 - (tra / 100.) ** 4)  # radiation
+    hl6 = fcl * hc * (tcl - ta)  # convection
+    ts = 0.303 * np.exp(-0.036 * m) + 0.028
+    pmv = ts * (mw - hl1 - hl2 - hl3 - hl4 - hl5 - hl6)
+    ppd = ppd_from_pmv(pmv)
+    return np.where(failed, 0.0, pmv), np.where(failed, 5.0, ppd)
+
+
+def _pmv_job(inputs: np.ndarray) -> np.ndarray:
+    """Evaluate stacked (6, n) PMV inputs and return the stacked (2, n) PMV and PPD."""
+    return np.stack(fanger_pmv(*inputs))
+
+
+def pmv_sweep(parameters: Dict[str, Union[float, Sequence[float]]],
+              workers: int = DEFAULT_WORKERS, chunk_size: int = CHUNK_SIZE) -> PMVSweep:
+    """Evaluate PMV and PPD over every combination of parameter values.
+    Args:
+        parameters: Dictionary with a value, or a sequence of values, for each
+            item of PARAMETERS.
+        workers: Number of worker processes. Grids larger than chunk_size are
+            split into chunks evaluated in parallel when above 1.
+        chunk_size: Number of grid points per job.
+    Returns:
+        A PMVSweep.
+    """
+    values = {name: np.atleast_1d(np.asarray(parameters[name], dtype=np.float64))
+              for name in PARAMETERS}
+    axes = {name: v for name, v in values.items() if len(v) > 1}
+    fixed = {name: float(v[0]) for name, v in values.items() if len(v) == 1}
+    shape = tuple(len(v) for v in axes.values())
+
+    grids = np.meshgrid(*values.values(), indexing='ij')
+    inputs = np.stack([grid.ravel() for grid in grids])
+    size = inputs.shape[1]
+    if workers > 1 and size > chunk_size:
+        chunks = [inputs[:, i:i + chunk_size] for i in range(0, size, chunk_size)]
+        with process_pool(workers) as pool:
+            result = np.concatenate(list(pool.map(_pmv_job, chunks)), axis=1)
+    else:
+        result = _pmv_job(inputs)
+    return PMVSweep(axes, fixed, result[0].reshape(shape), result[1].reshape(shape))
@@ -0,0 +1,253 @@
+"""Array-native psychrometrics of whole weather series.
+
+The functions mirror ladybug.psychrometrics but take and return NumPy arrays,
+so the derived properties of every timestep of a year are computed in a few
+array operations. The iterative dew point (Newton-Raphson) and wet bulb
+(bisection) solves run on all timesteps at once, each element stopping at the
+same tolerance and iteration as its scalar ladybug counterpart would.
+
+Wet bulb temperatures can also be read from a precomputed (dry bulb, relative
+humidity) table with bilinear interpolation, which is much faster for long
+series. The table is solved to TABLE_TOLERANCE, and interpolated values are
+within 0.05 C of the solver wherever the wet bulb temperature is at least
+1 C away from 0 C. Around 0 C the humidity ratio of ladybug switches from its
+ice to its water formula, which do not meet, so the wet bulb temperature
+jumps and interpolated values may differ from the solver by up to 0.75 C.
+"""
+from functools import lru_cache
+from typing import NamedTuple
+
+import numpy as np
+
+from .store import EPWStore
+
+# Default air pressure (Pa), the sea level pressure used by ladybug
+SEA_LEVEL_PRESSURE = 101325
+
+# Tolerance (C) and maximum iterations of the dew point and wet bulb solvers
+TOLERANCE = 0.1
+MAX_ITERATIONS = 100
+
+# Tolerance (C) of the wet bulb temperatures of the table
+TABLE_TOLERANCE = 1e-4
+
+# Dry bulb temperature (C) and relative humidity (%) grid of the wet bulb table
+TABLE_TEMPERATURES = np.arange(-60, 70.25, 0.25)
+TABLE_HUMIDITIES = np.arange(0, 100.5, 0.5)
+
+
+class Psychrometrics(NamedTuple):
+    """Derived psychrometric properties with one value per timestep.
+
+    Units are C for temperatures, kg water/kg air for the humidity ratio,
+    kJ/kg for the enthalpy and Pa for the saturated vapor pressure.
+    """
+    dew_point: np.ndarray
+    humid_ratio: np.ndarray
+    wet_bulb: np.ndarray
+    enthalpy: np.ndarray
+    saturated_vapor_pressure: np.ndarray
+
+
+def saturated_vapor_pressure(t_kelvin: np.ndarray) -> np.ndarray:
+    """Saturated vapor pressure (Pa) at dry bulb temperatures (K).
+
+    This accounts for the different behavior above and below the freezing point
+    of water, like ladybug.psychrometrics.saturated_vapor_pressure.
+    """
+    t = np.asarray(t_kelvin, dtype=np.float64)
+    ln_ice = -5.6745359E+03 / t + 6.3925247 - 9.677843E-03 * t + 6.2215701E-07 * t ** 2 \
+        + 2.0747825E-09 * t ** 3 - 9.484024E-13 * t ** 4 + 4.1635019 * np.log(t)
+    ln_water = -5.8002206E+03 / t + 1.3914993 - 4.8640239E-02 * t + 4.1764768E-05 * t ** 2 \
+        - 1.4452093E-08 * t ** 3 + 6.5459673 * np.log(t)
+    return np.exp(np.where(t <= 273.15, ln_ice, ln_water))
+
+
+def _d_ln_p_ws(db_temp: np.ndarray) -> np.ndarray:
+    """Derivative of the log of the saturated vapor pressure at temperatures (C)."""
+    t = np.asarray(db_temp, dtype=np.float64) + 273.15
+    ice = 5.6745359E+03 / t ** 2 - 9.677843E-03 + 2 * 6.2215701E-07 * t \
+        + 3 * 2.0747825E-09 * t ** 2 - 4 * 9.484024E-13 * t ** 3 + 4.1635019 / t
+    water = 5.8002206E+03 / t ** 2 - 4.8640239E-02 + 2 * 4.1764768E-05 * t \
+        - 3 * 1.4452093E-08 * t ** 2 + 6.5459673 / t
+    return np.where(t <= 273.15, ice, water)
+
+
+def humid_ratio_from_db_rh(db_temp: np.ndarray, rel_humid: np.ndarray,
+                           b_press: float = SEA_LEVEL_PRESSURE) -> np.ndarray:
+    """Humidity ratio (kg water/kg air) from dry bulb temperatures (C) and relative humidities (%)."""
+    p_w = saturated_vapor_pressure(np.asarray(db_temp) + 273.15) * (np.asarray(rel_humid) / 100)
+    return (p_w * 0.621945) / (b_press - p_w)
+
+
+def humid_ratio_from_db_wb(db_temp: np.ndarray, wb_temp: np.ndarray,
+                           b_press: float = SEA_LEVEL_PRESSURE) -> np.ndarray:
+    """Humidity ratio (kg water/kg air) from dry bulb and wet bulb temperatures (C)."""
+    db_temp, wb_temp = np.asarray(db_temp), np.asarray(wb_temp)
+    p_ws = saturated_vapor_pressure(wb_temp + 273.15)
+    p_ws_star = 0.621945 * p_ws / (b_press - p_ws)
+    above = ((2501. - 2.326 * wb_temp) * p_ws_star - 1.006 * (db_temp - wb_temp)) \
+        / (2501. + 1.86 * db_temp - 4.186 * wb_temp)
+    below = ((2830. - 0.24 * wb_temp) * p_ws_star - 1.006 * (db_temp - wb_temp)) \
+        / (2830. + 1.86 * db_temp - 2.1 * wb_temp)
+    return np.where(wb_temp >= 0, above, below)
+
+
+def enthalpy_from_db_hr(db_temp: np.ndarray, humid_ratio: np.ndarray,
+                        reference_temp: float = 0) -> np.ndarray:
+    """Enthalpy (kJ/kg) from dry bulb temperatures (C) and humidity ratios, floored at 0."""
+    correct_temp = np.asarray(db_temp) - reference_temp
+    enthalpy = 1.006 * correct_temp + np.asarray(humid_ratio) * (2501. + 1.86 * correct_temp)
+    return np.maximum(enthalpy, 0)
+
+
+def dew_point_from_db_rh(db_temp: np.ndarray, rel_humid: np.ndarray) -> np.ndarray:
+    """Dew point temperatures (C) from dry bulb temperatures (C) and relative humidities (%).
+
+    The Newton-Raphson solve of ladybug is run on all values at once. Values
+    stop changing once they converged, so results match the scalar function.
+    A relative humidity of 0 gives absolute zero (-273.15).
+    """
+    db_temp = np.asarray(db_temp, dtype=np.float64)
+    p_w = saturated_vapor_pressure(db_temp + 273.15) * (np.asarray(rel_humid) / 100)
+    dry = p_w <= 0
+    with np.errstate(divide='ignore'):
+        ln_vp = np.log(np.where(dry, 1, p_w))
+
+    td = db_temp.copy()
+    active = ~dry
+    for _ in range(MAX_ITERATIONS + 1):
+        if not active.any():
+            break
+        td_iter = td[active]
+        step = (np.log(saturated_vapor_pressure(td_iter + 273.15)) - ln_vp[active]) \
+            / _d_ln_p_ws(td_iter)
+        td[active] = td_iter - step
+        active[active] = np.abs(step) > TOLERANCE
+
+    return np.where(dry, -273.15, np.minimum(td, db_temp))
+
+
+def wet_bulb_from_db_rh(db_temp: np.ndarray, rel_humid: np.ndarray,
+                        b_press: float = SEA_LEVEL_PRESSURE,
+                        dew_point: np.ndarray = None, tolerance: float = TOLERANCE) -> np.ndarray:
+    """Wet bulb temperatures (C) from dry bulb temperatures (C) and relative humidities (%).
+
+    The bisection of ladybug is run on all values at once, between the dew
+    point and the dry bulb temperature.
+
+    Args:
+        db_temp: Dry bulb temperatures (C).
+        rel_humid: Relative humidities (%).
+        b_press: Air pressure (Pa).
+        dew_point: Optional dew point temperatures (C), when already computed.
+        tolerance: Width (C) of the bisection interval the solve stops at.
+    Returns:
+        Wet bulb temperatures (C).
+    """
+    db_temp = np.asarray(db_temp, dtype=np.float64)
+    humid_ratio = humid_ratio_from_db_rh(db_temp, rel_humid, b_press)
+    sup = db_temp.copy()
+    inf = dew_point_from_db_rh(db_temp, rel_humid) if dew_point is None \
+        else np.array(dew_point, dtype=np.float64)
+    wb_temp = (inf + sup) / 2
+
+    active = (sup - inf) > tolerance
+    for _ in range(MAX_ITERATIONS):
+        if not active.any():
+            break
+        guess = wb_temp[active]
+        too_humid = humid_ratio_from_db_wb(db_temp[active], guess, b_press) > humid_ratio[active]
+        sup[active] = np.where(too_humid, guess, sup[active])
+        inf[active] = np.where(too_humid, inf[active], guess)
+        wb_temp[active] = (sup[active] + inf[active]) / 2
+        active[active] = (sup[active] - inf[active]) > tolerance
+    return wb_temp
+
+
+class WetBulbTable:
+    """Wet bulb temperatures precomputed on a (dry bulb, relative humidity) grid.
+
+    Use wet_bulb_table to get a shared instance.
+
+    Args:
+        b_press: Air pressure (Pa) of the table.
+    """
+
+    def __init__(self, b_press: float = SEA_LEVEL_PRESSURE):
+        self.b_press = b_press
+        db, rh = np.meshgrid(TABLE_TEMPERATURES, TABLE_HUMIDITIES, indexing='ij')
+        self.values = wet_bulb_from_db_rh(db.ravel(), rh.ravel(), b_press,
+                                          tolerance=TABLE_TOLERANCE).reshape(db.shape)
+
+    def __call__(self, db_temp: np.ndarray, rel_humid: np.ndarray) -> np.ndarray:
+        """Interpolate the wet bulb temperatures (C) of dry bulb temperatures (C) and relative humidities (%).
+
+        Values outside of the grid are clamped to its edges.
+        """
+        x = _grid_position(np.asarray(db_temp, dtype=np.float64), TABLE_TEMPERATURES)
+        y = _grid_position(np.asarray(rel_humid, dtype=np.float64), TABLE_HUMIDITIES)
+        i, j = np.minimum(x.astype(np.intp), len(TABLE_TEMPERATURES) - 2), \
+            np.minimum(y.astype(np.intp), len(TABLE_HUMIDITIES) - 2)
+        fx, fy = x - i, y - j
+        v = self.values
+        return (v[i, j] * (1 - fx) + v[i + 1, j] * fx) * (1 - fy) \
+            + (v[i, j + 1] * (1 - fx) + v[i + 1, j + 1] * fx) * fy
+
+
+def _grid_position(values: np.ndarray, grid: np.ndarray) -> np.ndarray:
+    """Get the fractional index of values on an evenly spaced grid, clamped to the grid."""
+    return np.clip((values - grid[0]) / (grid[1] - grid[0]), 0, len(grid) - 1)
+
+
+@lru_cache(maxsize=8)
+def _wet_bulb_table(b_press: float) -> WetBulbTable:
+    return WetBulbTable(b_press)
+
+
+def wet_bulb_table(b_press: float = SEA_LEVEL_PRESSURE) -> WetBulbTable:
+    """Get the shared wet bulb table of an air pressure.
+
+    The table is cached by the pressure alone, however it is passed.
+    """
+    return _wet_bulb_table(float(b_press))
+
+
+def psychrometrics(db_temp: np.ndarray, rel_humid: np.ndarray,
+                   b_press: float = SEA_LEVEL_PRESSURE, fast: bool = False) -> Psychrometrics:
+    """Compute the derived psychrometric properties of series of air conditions.
+    Args:
+        db_temp: Dry bulb temperatures (C).
+        rel_humid: Relative humidities (%).
+        b_press: Air pressure (Pa).
+        fast: Set to True to interpolate wet bulb temperatures from a
+            WetBulbTable instead of solving for them.
+    Returns:
+        A Psychrometrics tuple.
+    """
+    db_temp = np.asarray(db_temp, dtype=np.float64)
+    rel_humid = np.asarray(rel_humid, dtype=np.float64)
+    dew_point = dew_point_from_db_rh(db_temp, rel_humid)
+    humid_ratio = humid_ratio_from_db_rh(db_temp, rel_humid, b_press)
+    if fast:
+        wet_bulb = wet_bulb_table(b_press)(db_temp, rel_humid)
+    else:
+        wet_bulb = wet_bulb_from_db_rh(db_temp, rel_humid, b_press, dew_point)
+    return Psychrometrics(
+        dew_point=dew_point,
+        humid_ratio=humid_ratio,
+        wet_bulb=wet_bulb,
+        enthalpy=enthalpy_from_db_hr(db_temp, humid_ratio),
+        saturated_vapor_pressure=saturated_vapor_pressure(db_temp + 273.15))
+
+
+def store_psychrometrics(store: EPWStore, fast: bool = False) -> Psychrometrics:
+    """Compute the derived psychrometric properties of every timestep of an EPW file.
+    Args:
+        store: Columnar store of the EPW file.
+        fast: Set to True to interpolate wet bulb temperatures from a table.
+    Returns:
+        A Psychrometrics tuple.
+    """
+    return psychrometrics(store.field('dry_bulb_temperature'),
+                          store.field('relative_humidity'), fast=fast)
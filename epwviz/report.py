@@ -0,0 +1,216 @@
+"""On-demand generation of the Word report of the dashboard.
+
+The report is assembled from plain values (numbers and strings) and the bytes
+of the exported figures, so that it can be built in a worker process without
+access to the Streamlit session. ReportBuilder runs the assembly in a process
+pool and keeps the finished documents keyed by the hash of their inputs, so
+downloading the same report again is instant.
+"""
+import io
+import os
+from concurrent.futures import Future
+from typing import Any, Dict
+
+from docx import Document
+from docx.shared import Inches
+
+from .workers import KeyedPool
+
+# Names of the figures of the report
+REPORT_IMAGES = ('hourly_data', 'Daily_data', 'Line_data', 'conditional_hourly_data',
+                 'psy_main', 'windrose', 'windrose-temp', 'windrose-dir', 'windrose-diff',
+                 'Sunpath', 'CDD_HDD', 'temp-bins')
+
+# Default number of worker processes, overridable through the environment
+DEFAULT_WORKERS = int(os.environ.get('EPWVIZ_REPORT_WORKERS', 1))
+
+# Number of finished reports kept in memory
+DEFAULT_MAX_ENTRIES = 32
+
+
+def build_report(context: Dict[str, Any], images: Dict[str, bytes]) -> bytes:
+    """Assemble the Word report of the dashboard.
+    Args:
+        context: Values quoted in the text of the report (see the dashboard for
+            the expected keys).
+        images: PNG bytes of each figure in REPORT_IMAGES.
+    Returns:
+        The content of the .docx file.
+    """
+    c = context
+    unit = c['unit']
+    var_unit = c['var_unit']
+    hourly_selected = c['hourly_selected']
+
+    def add_figure(name, width, height):
+        document.add_picture(io.BytesIO(images[name]), width=Inches(width), height=Inches(height))
+
+    document = Document()
+
+    x = 2
+    h_res = x
+    w_res = 3*x
+
+    document.add_heading(f'Weather Analysis for {c["city"]} ', level= 0)
+
+    p1 = document.add_paragraph('This report outlines the Weather Analysis for ')
+    p1.add_run(f'{c["city"]}').bold = True
+    p1.add_run(' located in ')
+    p1.add_run(f'{c["country"]}').bold = True
+    p1.add_run(' in the following sections: ')
+
+    document.add_paragraph('Periodic Weather Data Analysis', style='List Number')
+    p2 = document.add_paragraph('The following graphs illustrate the ')
+    p2.add_run(f'{hourly_selected}').bold = True
+    p2.add_run(f' variable for the selected period in which the average {hourly_selected} is {c["ave_val"]}{var_unit} for the year,'
+               f' and ranges from {c["min_value"]}{var_unit} up to {c["max_value"]}{var_unit} (Figure 1).'
+               f' Figure 2 and Figure 3 show the mean daily values and {hourly_selected} variation per day.')
+
+    add_figure('hourly_data', w_res, h_res)
+    document.add_paragraph(f'Figure 1. Hourly {hourly_selected} Analysis', style='Caption')
+
+    add_figure('Daily_data', w_res, h_res)
+    document.add_paragraph(f'Figure 2. Mean Daily {hourly_selected} Analysis', style='Caption')
+
+    add_figure('Line_data', w_res, h_res)
+    document.add_paragraph(f'Figure 3. Average/Range {hourly_selected} Analysis', style='Caption')
+
+    document.add_paragraph(f'Conditional Hourly Data: {hourly_selected}', style='List Number')
+    p3 = document.add_paragraph('Below graph plots the given thresholds between')
+    p3.add_run(f' {c["threshold_min"]}{var_unit}').bold= True
+    p3.add_run(' and ')
+    p3.add_run(f'{c["threshold_max"]}{var_unit}').bold = True
+    p3.add_run(f' for {hourly_selected}. Additionally, the number of met hours within the given range is {c["met_num_hours"]}hrs and unmet hours is {c["unmet_num_hours"]}hrs.')
+
+    add_figure('conditional_hourly_data', w_res, h_res)
+    document.add_paragraph(f'Figure 4. Hourly Conditional Analysis of {hourly_selected}', style='Caption')
+
+    document.add_paragraph('Psychrometric Chart', style='List Number')
+    document.add_paragraph('A psychrometric chart can be used in two different ways.'
+                                ' The first is done by plotting multiple data points, that represent'
+                                ' the air conditions at a specific time, on the chart. Then, overlaying'
+                                ' an area that identifies the “comfort zone.” The comfort zone is defined '
+                                'as the range within occupants are satisfied with the surrounding thermal '
+                                'conditions. After plotting the air conditions and overlaying the comfort '
+                                'zone, it becomes possible to see how passive design strategies can extend '
+                                'the comfort zone.')
+
+    add_figure('psy_main', w_res, h_res*2)
+    document.add_paragraph('Figure 5. Psychrometric Chart Analysis', style='Caption')
+
+    document.add_paragraph(f'The chart above depicts the hourly distribution of the outdoor air condition throughout the year associated with hourly relative humidty and humidity ratio.'
+                                f' In particular, having a Clothing Level of {c["psy_clo_value"]} and Metabloic Rate of {c["psy_met_value"]}'
+                                ' resulted in the following statistics:')
+    strategies_percentages = c['strategies_percentages']
+    if strategies_percentages is not None:
+        document.add_paragraph(f'{strategies_percentages[5]}% of the time is in comfortable range without the need of any passive/active strategies.', style = 'List Bullet')
+        document.add_paragraph(f'{strategies_percentages[0]}% of the time, internal heat gains can improve the environmental condition to meet the comfortable range.', style = 'List Bullet')
+        document.add_paragraph(f'{strategies_percentages[1]}% of the time, occupants can use fans (assuming 1m/s (2.23mph) of air velocity around the occupant) to reduce the temperature and improve thermal comfort.', style = 'List Bullet')
+        document.add_paragraph(f'{strategies_percentages[2]}% of the time, thermal massing and night ventilation allow the possibility to maintain the heat during the day and release it during the night to reduce the temperature passively.', style = 'List Bullet')
+        document.add_paragraph(f'{strategies_percentages[3]}% of the time, passive solar heat gains can increase the temperature as an additional potential. Noting that it assumes a 50W/m2 outdoor solar flux (W/m2) that is needed to raise the temperature of a theoretical building by 1 degree Celsius and can maintain its temperature for 8 hours.', style = 'List Bullet')
+        document.add_paragraph(f'{strategies_percentages[4]}% of the time, evaporative cooling strategy has the opportunity to cool down the building while increasing the relative humidity.', style = 'List Bullet')
+
+    document.add_paragraph('Wind Rose Diagrams', style='List Number')
+    document.add_paragraph('Wind roses are graphical charts that characterize the speed and direction'
+                           ' of winds at a location. Presented in a circular format, the length of each'
+                           ' "spoke" around the circle indicates the amount of time that the wind blows'
+                           ' from a particular direction. Colors along the spokes indicate categories'
+                           ' of wind speed. Additionally, the other diagrams plot the correlation between the wind direction and'
+                           ' Dry Bulb Temperature, Direct/Diffuse Solar Radiation which is helpful to understand'
+                           ' the possibilities of utilizing natural ventilation and shading strategies.')
+
+    add_figure('windrose', 4.2, 3)
+    document.add_paragraph('Figure 6. Wind Direction vs. Dry Bulb Temperature', style='Caption')
+    add_figure('windrose-temp', 4.2, 3)
+    document.add_paragraph('Figure 7. Wind Rose vs. Wind Direction', style='Caption')
+    add_figure('windrose-dir', 4.2, 3)
+    document.add_paragraph('Figure 8. Wind Rose vs. Direct Solar Radiation', style='Caption')
+    add_figure('windrose-diff', 4.2, 3)
+    document.add_paragraph('Figure 9. Wind Rose vs. Diffuse Solar Radiation', style='Caption')
+
+    document.add_paragraph('Sunpath Diagram', style='List Number')
+    document.add_paragraph('Solar charts and sun path diagrams have been devised as visual'
+                           'aids so that the solar position can be easily and quickly established'
+                           'for any hour in any day, to provide a valuable tool for designers and planners.'
+                           'A separate sun path diagram is required for each latitude.'
+                           ' Additionally, plotting one of the environmental variables on the sunpath diagram'
+                           ' can help to understand its variation across the sun position.')
+
+    add_figure('Sunpath', 4.2, 3)
+    document.add_paragraph('Figure 10. Sunpath Diagram', style='Caption')
+
+    document.add_paragraph('Cooling/Heating Degree Days/Hours', style='List Number')
+    if c['data_unit'] == 'SI':
+        document.add_paragraph('Degree days is another way of combining time and temperature, but it has different implications for heating and cooling than does design temperature.'
+                            ' Heating degree days (HDD) – This is the number that tells you'
+                        'how long a location stays below a special temperature called the base'
+                        'temperature.'
+                        'For example, the most commonly used base temperature for heating is 18°C.'
+                        'So if the temperature at your house is 12°C for one hour, you just'
+                        ' accumulated 6 degree hours. If the temperature is 15°C for the next hour'
+                        ', you’ve got another 3 degree hours and 9 degree hours total.'
+                        'To find the number of degree days, you divide it by 24,'
+                        ' so you’ve got one degree day in this example.'
+                        'You can do that for every hour of the year to find the total and then divide by 24.'
+                        ' Or you can use the average temperature for each day to get degree days directly.'
+                        'Same principle as for heating degree days applies to Cooling degree days (CDD) but '
+                        'with a different base temperature which is typically set as 24°C by default.')
+    elif c['data_unit'] == 'IP':
+        document.add_paragraph('Degree days is another way of combining time and temperature, but it has different implications for heating and cooling than does design temperature.'
+                            ' Heating degree days (HDD) – This is the number that tells you'
+                        'how long a location stays below a special temperature called the base'
+                        'temperature.'
+                        'For example, the most commonly used base temperature for heating is 64.40°F.'
+                        'So if the temperature at your house is 54.40°F for one hour, you just'
+                        ' accumulated 10 degree hours. If the temperature is 59.40°F for the next hour'
+                        ', you’ve got another 5 degree hours and 15 degree hours total.'
+                        'To find the number of degree days, you divide it by 24,'
+                        ' so you’ve got 0.625 degree day in this example.'
+                        'You can do that for every hour of the year to find the total and then divide by 24.'
+                        ' Or you can use the average temperature for each day to get degree days directly.'
+                        'Same principle as for heating degree days but usually'
+                        'with a different base temperature which is here set as 75.20°F by default.')
+
+    document.add_paragraph(f'Choosing {c["degree_days_heat_base"]}°{unit} and {c["degree_days_cool_base"]}°{unit} as heating and cooling base temperatures, respectively, from hour {c["dd_st_hour"]}a.m. until {c["dd_end_hour"]}p.m.,'
+                           f' the total HEATING DEGREE DAYS and COOLING DEGREE DAYS are respetively {c["heating_total"]} and {c["cooling_total"]} in {c["city"]}')
+    add_figure('CDD_HDD', w_res, h_res*1.5)
+    document.add_paragraph('Figure 11. Cooling/Heating Degree Days', style='Caption')
+
+    document.add_paragraph('Distributed Temperature Plot', style='List Number')
+    p4 = document.add_paragraph('To better understand the outdoor temperature levels, the figure below divides the'
+                           f' {c["bin_field"].lower()} into sequential bins from the minimum value of {c["min_val_bin"]}{c["bin_unit"]} up to the maximum value of {c["max_val_bin"]}{c["bin_unit"]}'
+                           f' where the highest and lowest intensities are')
+    p4.add_run(f' {c["Maximum_bin"]} and ').bold= True
+    p4.add_run(f'{c["Minimum_bin"]}').bold= True
+    p4.add_run(' respectively')
+
+    add_figure('temp-bins', w_res, h_res*1.5)
+    document.add_paragraph('Figure 12. Temperature Ranges', style='Caption')
+
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+class ReportBuilder(KeyedPool):
+    """Build reports in a process pool and keep the finished documents.
+
+    Args:
+        max_workers: Number of worker processes.
+        max_entries: Number of finished reports kept.
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_WORKERS,
+                 max_entries: int = DEFAULT_MAX_ENTRIES):
+        super().__init__(max_workers, max_entries)
+
+    def submit(self, key: str, context: Dict[str, Any], images: Dict[str, bytes]) -> Future:
+        """Start building a report unless it is already built or being built.
+        Args:
+            key: Hash of the inputs of the report.
+            context: Values quoted in the text of the report.
+            images: PNG bytes of each figure in REPORT_IMAGES.
+        Returns:
+            A future whose result is the content of the .docx file.
+        """
+        return super().submit(key, build_report, context, images)
@@ -0,0 +1,120 @@
+"""Registry of lazily evaluated dashboard sections.
+
+Every section of the dashboard registers the function computing its figures
+and numbers. The parameters of that function are the inputs of the section:
+on each rerun the current inputs are bound to the section and the function
+only runs again when the section is needed (visible, or read by the report)
+and its inputs differ from the ones used for the stored result. Following the
+Streamlit caching convention, parameters whose name starts with an underscore
+(eg. ``_store``) are passed to the function but left out of the comparison,
+so a hashable key such as the EPW content hash must accompany them.
+"""
+import hashlib
+import inspect
+from typing import Any, Callable, Dict, Iterable, List, MutableMapping, NamedTuple, Tuple
+
+from .instrumentation import measure
+
+# Key of the session state entry holding the results of every section
+STATE_KEY = '_epwviz_sections'
+
+
+class Section(NamedTuple):
+    """A dashboard section and the function computing it."""
+    name: str
+    title: str
+    compute: Callable[..., Any]
+    inputs: Tuple[str, ...]
+
+
+def fingerprint(inputs: Dict[str, Any]) -> str:
+    """Get a digest of the hashed inputs of a section.
+    Args:
+        inputs: Keyword arguments of the compute function.
+    Returns:
+        A hexadecimal digest. Arguments starting with an underscore are ignored.
+    """
+    hashed = sorted((k, repr(v)) for k, v in inputs.items() if not k.startswith('_'))
+    return hashlib.sha256(repr(hashed).encode()).hexdigest()
+
+
+class SectionRegistry:
+    """Lazily computed sections of the dashboard.
+
+    Args:
+        titles: Ordered dictionary of section name to its displayed title.
+        state: Mapping persisting results between reruns (st.session_state).
+    """
+
+    def __init__(self, titles: Dict[str, str], state: MutableMapping):
+        self.titles = dict(titles)
+        self._sections: Dict[str, Section] = {}
+        self._bound: Dict[str, Dict[str, Any]] = {}
+        self._visible = set(self.titles)
+        if STATE_KEY not in state:
+            state[STATE_KEY] = {}
+        self._results: Dict[str, Tuple[str, Any]] = state[STATE_KEY]
+        # names of the sections computed during this rerun
+        self.computed: List[str] = []
+
+    def register(self, name: str) -> Callable:
+        """Decorator registering the compute function of a section."""
+        assert name in self.titles, f'Unknown section {name}.'
+
+        def decorator(func: Callable) -> Callable:
+            inputs = tuple(inspect.signature(func).parameters)
+            self._sections[name] = Section(name, self.titles[name], func, inputs)
+            return func
+        return decorator
+
+    def set_visible(self, names: Iterable[str]) -> None:
+        """Set the sections displayed on the page."""
+        self._visible = set(names)
+
+    def is_visible(self, name: str) -> bool:
+        """Check whether a section is displayed on the page."""
+        return name in self._visible
+
+    def bind(self, name: str, **inputs) -> None:
+        """Set the inputs of a section for the current rerun.
+
+        Nothing is computed until the result of the section is requested.
+        """
+        section = self._sections[name]
+        missing = set(section.inputs) - set(inputs)
+        assert not missing, f'Missing inputs for section {name}: {sorted(missing)}.'
+        self._bound[name] = inputs
+
+    def key(self, name: str) -> str:
+        """Get the fingerprint of the inputs bound to a section.
+
+        The fingerprint identifies the result of the section without
+        computing it (eg. to look up outputs derived from that result).
+        """
+        return fingerprint(self._bound[name])
+
+    def result(self, name: str) -> Any:
+        """Get the result of a section, computing it only if its inputs changed.
+        Args:
+            name: Name of a registered section with bound inputs.
+        Returns:
+            Whatever the compute function of the section returns.
+        """
+        inputs = self._bound[name]
+        key = fingerprint(inputs)
+        with measure(name, 'section') as measurement:
+            stored = self._results.get(name)
+            if stored is not None and stored[0] == key:
+                return stored[1]
+            measurement.hit = False
+            value = self._sections[name].compute(**inputs)
+        self._results[name] = (key, value)
+        self.computed.append(name)
+        return value
+
+    def invalidate(self, name: str = None) -> None:
+        """Drop the stored result of one section or of all sections."""
+        if name is None:
+            self._results.clear()
+        else:
+            self._results.pop(name, None)
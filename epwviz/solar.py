@@ -0,0 +1,280 @@
+"""Vectorized solar positions and persisted per-location sun tables.
+
+sun_positions evaluates the NOAA solar geometry of ladybug's
+Sunpath.calculate_sun_from_date_time on arrays of dates and hours. The sun
+altitude and azimuth of every timestep of a year only depend on the location,
+so they are computed once per (latitude, longitude, time zone, timestep, leap
+year) and saved as a sidecar in the storage folder, next to the EPW sidecars.
+The sunpath figure, its data overlays and any analysis by sun position read
+the same table.
+"""
+import hashlib
+import math
+import os
+import pathlib
+from typing import List, NamedTuple, Sequence, Tuple, Union
+
+import numpy as np
+import plotly.graph_objects as go
+from ladybug.analysisperiod import AnalysisPeriod
+from ladybug.color import Color
+from plotly.graph_objects import Figure
+
+from .uploads import content_path
+
+# Year ladybug gives to dates of non leap and leap years, and the number of
+# days from 01-01-1900 to the first day of that year
+YEARS = {False: (2017, 42734), True: (2016, 42368)}
+
+# Dates of the sun curves of the sunpath figure (equinox, solstices and the
+# 21st of other months) and the minutes between their points
+CURVE_DATES = ((3, 21), (6, 21), (12, 21), (1, 21), (2, 21), (4, 21), (5, 21))
+CURVE_STEP = 5
+
+MONTH_NAMES = ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec')
+
+
+class SolarTable(NamedTuple):
+    """Sun position at every timestep of a year.
+
+    month, day and hour (decimal, in local standard time) give the time of
+    each row and altitude and azimuth the position of the sun in degrees.
+    """
+    month: np.ndarray
+    day: np.ndarray
+    hour: np.ndarray
+    altitude: np.ndarray
+    azimuth: np.ndarray
+
+    @property
+    def is_up(self) -> np.ndarray:
+        """Whether the sun is above the horizon at each timestep."""
+        return self.altitude > 0
+
+
+def sun_positions(latitude: float, longitude: float, time_zone: float, day_of_year: np.ndarray,
+                  hour: np.ndarray, is_leap_year: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+    """Calculate the sun altitude and azimuth of arrays of times.
+
+    This is a vectorized Sunpath.calculate_sun_from_date_time of ladybug,
+    without daylight saving time.
+
+    Args:
+        latitude: Latitude of the location in degrees.
+        longitude: Longitude of the location in degrees.
+        time_zone: Time zone of the location in hours.
+        day_of_year: Day of the year (0 for January 1st) of each time.
+        hour: Decimal hour of the day of each time, in local standard time.
+        is_leap_year: Whether the times are in a leap year.
+    Returns:
+        A tuple with the altitude and azimuth arrays in degrees.
+    """
+    day_of_year = np.asarray(day_of_year, dtype=np.float64)
+    hour = np.asarray(hour, dtype=np.float64)
+    lat = math.radians(latitude)
+
+    # solar geometry
+    _, days_before = YEARS[is_leap_year]
+    julian_day = days_before + day_of_year + 2 + 2415018.5 \
+        + np.round(np.round(hour * 60) / 1440.0, 2) - time_zone / 24
+    jc = (julian_day - 2451545) / 36525
+    mean_long = (280.46646 + jc * (36000.76983 + jc * 0.0003032)) % 360
+    mean_anom = 357.52911 + jc * (35999.05029 - 0.0001537 * jc)
+    eccent = 0.016708634 - jc * (0.000042037 + 0.0000001267 * jc)
+    eq_of_ctr = np.sin(np.radians(mean_anom)) * (1.914602 - jc * (0.004817 + 0.000014 * jc)) \
+        + np.sin(np.radians(2 * mean_anom)) * (0.019993 - 0.000101 * jc) \
+        + np.sin(np.radians(3 * mean_anom)) * 0.000289
+    app_long = mean_long + eq_of_ctr - 0.00569 - 0.00478 * np.sin(np.radians(125.04 - 1934.136 * jc))
+    mean_obliq = 23 + (26 + ((21.448 - jc * (46.815 + jc * (0.00059 - jc * 0.001813)))) / 60) / 60
+    obliq = mean_obliq + 0.00256 * np.cos(np.radians(125.04 - 1934.136 * jc))
+    sol_dec = np.arcsin(np.sin(np.radians(obliq)) * np.sin(np.radians(app_long)))
+    var_y = np.tan(np.radians(obliq / 2)) ** 2
+    eq_of_time = 4 * np.degrees(
+        var_y * np.sin(2 * np.radians(mean_long))
+        - 2 * eccent * np.sin(np.radians(mean_anom))
+        + 4 * eccent * var_y * np.sin(np.radians(mean_anom)) * np.cos(2 * np.radians(mean_long))
+        - 0.5 * var_y ** 2 * np.sin(4 * np.radians(mean_long))
+        - 1.25 * eccent ** 2 * np.sin(2 * np.radians(mean_anom)))
+
+    # solar time in minutes and hour angle in degrees
+    sol_time = ((hour * 60 + eq_of_time + 4 * longitude - 60 * time_zone) % 1440) / 60 * 60
+    hour_angle = np.where(sol_time < 0, sol_time / 4 + 180, sol_time / 4 - 180)
+    zenith = np.arccos(np.clip(
+        math.sin(lat) * np.sin(sol_dec)
+        + math.cos(lat) * np.cos(sol_dec) * np.cos(np.radians(hour_angle)), -1, 1))
+    altitude = 90 - np.degrees(zenith)
+
+    # approximate atmospheric refraction
+    with np.errstate(divide='ignore', invalid='ignore'):
+        tan_alt = np.tan(np.radians(altitude))
+        refraction = np.select(
+            [altitude > 85, altitude > 5, altitude > -0.575],
+            [0, 58.1 / tan_alt - 0.07 / tan_alt ** 3 + 0.000086 / tan_alt ** 5,
+             1735 + altitude * (-518.2 + altitude * (103.4 + altitude * (-12.79 + altitude * 0.711)))],
+            -20.772 / tan_alt)
+        altitude = altitude + refraction / 3600
+
+        az_init = (math.sin(lat) * np.cos(zenith) - np.sin(sol_dec)) / (math.cos(lat) * np.sin(zenith))
+        az_angle = np.degrees(np.arccos(az_init))
+    azimuth = np.where(hour_angle > 0, (az_angle + 180) % 360, (540 - az_angle) % 360)
+    # perfect solar noon, where ladybug hits a math domain error
+    azimuth = np.where(np.isnan(azimuth), 180, azimuth)
+    return altitude, azimuth
+
+
+def solar_table(latitude: float, longitude: float, time_zone: float, timestep: int = 1,
+                is_leap_year: bool = False) -> SolarTable:
+    """Calculate the sun position at every timestep of a year.
+    Args:
+        latitude: Latitude of the location in degrees.
+        longitude: Longitude of the location in degrees.
+        time_zone: Time zone of the location in hours.
+        timestep: Number of timesteps per hour.
+        is_leap_year: Whether the year is a leap year.
+    Returns:
+        A SolarTable.
+    """
+    ap = AnalysisPeriod(timestep=timestep, is_leap_year=is_leap_year)
+    moys = np.asarray(ap.moys)
+    # minutes of the year to day of year and hour
+    day_of_year, minute = np.divmod(moys, 1440)
+    month = np.searchsorted(np.cumsum(ap._num_of_days_each_month), day_of_year, side='right') + 1
+    first_day = np.concatenate(([0], np.cumsum(ap._num_of_days_each_month)))[month - 1]
+    hour = minute / 60
+    altitude, azimuth = sun_positions(latitude, longitude, time_zone, day_of_year, hour, is_leap_year)
+    return SolarTable(month.astype(np.int8), (day_of_year - first_day + 1).astype(np.int8),
+                      hour, altitude, azimuth)
+
+
+def location_key(latitude: float, longitude: float, time_zone: float, timestep: int = 1,
+                 is_leap_year: bool = False) -> str:
+    """Get the name of the solar table sidecar of a location."""
+    key = repr((round(latitude, 6), round(longitude, 6), float(time_zone), timestep, is_leap_year))
+    return 'sun-' + hashlib.sha256(key.encode()).hexdigest()[:32]
+
+
+def open_solar_table(latitude: float, longitude: float, time_zone: float, timestep: int = 1,
+                     is_leap_year: bool = False,
+                     directory: Union[str, pathlib.Path] = './data') -> SolarTable:
+    """Load the solar table of a location, computing and saving it if needed.
+
+    Tables are written under a temporary name and moved in place, so
+    concurrent sessions never read a partially written file.
+
+    Args:
+        latitude: Latitude of the location in degrees.
+        longitude: Longitude of the location in degrees.
+        time_zone: Time zone of the location in hours.
+        timestep: Number of timesteps per hour.
+        is_leap_year: Whether the year is a leap year.
+        directory: Folder holding the sidecar files.
+    Returns:
+        A SolarTable.
+    """
+    key = location_key(latitude, longitude, time_zone, timestep, is_leap_year)
+    path = content_path(directory, key, '.npz')
+    if path.is_file():
+        # mark the table as recently used for evict_stale_files
+        os.utime(path)
+        with np.load(path) as arrays:
+            return SolarTable(*(arrays[name] for name in SolarTable._fields))
+
+    table = solar_table(latitude, longitude, time_zone, timestep, is_leap_year)
+    directory = pathlib.Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    tmp_path = directory / f'.{key}.{os.getpid()}.npz'
+    np.savez(tmp_path, **table._asdict())
+    os.replace(tmp_path, path)
+    return table
+
+
+def _sun_curve(latitude: float, longitude: float, time_zone: float,
+               month: int, day: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Get the positions of the sun above the horizon along one day, sorted by azimuth."""
+    ap = AnalysisPeriod()
+    day_of_year = sum(ap._num_of_days_each_month[:month - 1]) + day - 1
+    hour = np.arange(0, 24, CURVE_STEP / 60)
+    altitude, azimuth = sun_positions(latitude, longitude, time_zone,
+                                      np.full(len(hour), day_of_year), hour)
+    order = np.argsort(azimuth[altitude > 0])
+    return altitude[altitude > 0][order], azimuth[altitude > 0][order]
+
+
+def _hex(color: Color) -> str:
+    return '#%02x%02x%02x' % (color.r, color.g, color.b)
+
+
+def sunpath_figure(table: SolarTable, coordinates: Tuple[float, float, float],
+                   colors: Sequence[Color], values: np.ndarray = None, name: str = None,
+                   unit: str = None, title: str = None) -> Figure:
+    """Draw a sunpath from a solar table the way ladybug_charts draws a ladybug Sunpath.
+    Args:
+        table: SolarTable of the location.
+        coordinates: Latitude, longitude and time zone of the location.
+        colors: Colors of the legend.
+        values: Optional values of a field at every timestep of the table, to
+            color the sun positions with.
+        name: Name of the field of values.
+        unit: Unit of the values.
+        title: Optional title of the figure.
+    Returns:
+        A plotly figure.
+    """
+    up = table.is_up
+    r = 90 * np.cos(np.radians(table.altitude[up]))
+    month_names = np.array(MONTH_NAMES)[table.month[up] - 1]
+    customdata: List[np.ndarray] = [table.day[up], month_names, np.floor(table.hour[up]),
+                                    table.altitude[up], table.azimuth[up]]
+    hovertemplate = ('month: %{customdata[1]}<br>day: %{customdata[0]:.0f}'
+                     '<br>hour: %{customdata[2]:.0f}:00'
+                     '<br>sun altitude: %{customdata[3]:.2f}°deg'
+                     '<br>sun azimuth: %{customdata[4]:.2f}°deg<br>')
+
+    fig = go.Figure()
+    # altitude circles
+    for i in range(10):
+        fig.add_trace(go.Scatterpolar(
+            r=[90 * math.cos(math.radians(i * 10))] * 361, theta=list(range(361)), mode='lines',
+            line_color='silver', line_width=1,
+            hovertemplate=f'Altitude circle<br>{i * 10}°deg', name=''))
+
+    # analemma
+    if values is None:
+        line_color = _hex(colors[-1])
+        marker = dict(color=line_color, size=3, line_width=0)
+    else:
+        line_color = '#8c8e91'
+        vals = np.asarray(values)[up]
+        var_range = [5 * math.floor(vals.min() / 5), 5 * math.ceil(vals.max() / 5)]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            size = np.nan_to_num(((vals - vals.min()) / vals.max()) + 1, nan=1.0) * 4
+        marker = dict(color=vals, size=size, line_width=0, colorscale=[_hex(c) for c in colors],
+                      cmin=var_range[0], cmax=var_range[1],
+                      colorbar=dict(thickness=10, title=f'{unit}<br>  '))
+        customdata.append(vals)
+        hovertemplate += f'<br><b>{name}: %{{customdata[5]:.2f}}{unit}</b>'
+    fig.add_trace(go.Scatterpolar(
+        r=r, theta=table.azimuth[up], mode='markers', marker=marker,
+        customdata=np.stack(customdata, axis=-1), hovertemplate=hovertemplate, name=''))
+
+    # equinox, solstices and the 21st of other months
+    for month, day in CURVE_DATES:
+        altitude, azimuth = _sun_curve(*coordinates, month, day)
+        fig.add_trace(go.Scatterpolar(
+            r=90 * np.cos(np.radians(altitude)), theta=azimuth, mode='markers',
+            marker=dict(color=line_color, size=2.5), customdata=altitude,
+            hovertemplate='<br>sun altitude: %{customdata:.2f}°deg'
+                          '<br>sun azimuth: %{theta:.2f}°deg<br>', name=''))
+
+    fig.update_layout(
+        showlegend=False,
+        polar=dict(radialaxis=dict(tickfont_size=10, visible=False),
+                   angularaxis=dict(tickfont_size=10, rotation=90, direction='clockwise')),
+        autosize=False,
+        template='plotly_white',
+        title_x=0.5,
+        dragmode=False,
+        margin=dict(l=20, r=20, t=33, b=20),
+        title={'text': title, 'y': 1, 'x': 0.5, 'xanchor': 'center', 'yanchor': 'top'}
+        if title else None)
+    return fig
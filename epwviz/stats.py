@@ -0,0 +1,266 @@
+"""Persisted monthly and annual statistics of every field of an EPW file.
+
+Usage:
+    python -m epwviz.stats [PATH ...] [--data-dir DIR] [--country NAME] [--range COLUMN LOW HIGH]
+
+The minimum, maximum, mean and percentiles of every weather field, over the
+year and over each month, are computed in one vectorized pass over the
+columns of an EPWStore and saved as a small JSON sidecar named after the
+content hash of the file, next to the store sidecars. The statistics are
+kept in SI units: unit conversions are increasing affine functions, so the
+IP statistics are the converted SI ones.
+
+The sidecars also describe the station of each file, so the stations of a
+storage folder are listed and filtered by reading those small files only.
+The command line computes the statistics of the EPW files (or folders of EPW
+files) given as PATH and prints the stations of the storage folder.
+"""
+import argparse
+import json
+import os
+import pathlib
+import sys
+from typing import Dict, Iterable, List, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from ladybug.epw import EPWFields
+
+from .cache import content_hash
+from .store import EPWStore, FIELD_NAMES, NUMERIC_FIELDS, TIME_FIELDS, _field_number
+from .units import convert_values
+from .uploads import content_path
+
+# Percentiles computed for every field
+PERCENTILES = (1, 5, 25, 50, 75, 95, 99)
+
+# Names of the statistics, in the order they are stored
+STATISTICS = ('min', 'max', 'mean') + tuple(f'p{q}' for q in PERCENTILES)
+
+# Fields with statistics: every numeric field but the date and time
+STATISTICS_FIELDS = tuple(FIELD_NAMES[i] for i in NUMERIC_FIELDS if i not in TIME_FIELDS)
+
+# Suffix of the statistics sidecar of an EPW file
+SIDECAR_SUFFIX = '.stats.json'
+
+# Version of the statistics sidecars, sidecars of other versions are rebuilt
+SIDECAR_VERSION = 2
+
+# Statistics listed for every station by default
+STATION_COLUMNS = ('dry_bulb_temperature.mean', 'dry_bulb_temperature.min', 'dry_bulb_temperature.max',
+                   'relative_humidity.mean', 'wind_speed.mean', 'global_horizontal_radiation.mean')
+
+
+def _statistics(values: np.ndarray) -> np.ndarray:
+    """Get the STATISTICS of the columns of a (rows, fields) array, as a (statistics, fields) array."""
+    if not len(values):
+        return np.full((len(STATISTICS), values.shape[1]), np.nan)
+    return np.vstack([values.min(axis=0), values.max(axis=0), values.mean(axis=0),
+                      np.percentile(values, PERCENTILES, axis=0)])
+
+
+class EPWStatistics:
+    """Monthly and annual statistics of the fields of an EPW file, in SI units.
+
+    Args:
+        station: Content hash, location and time settings of the file (hash,
+            city, country, source, latitude, longitude, time_zone, timestep,
+            is_leap_year and rows).
+        annual: Array of the annual STATISTICS of STATISTICS_FIELDS, with one
+            row per statistic and one column per field.
+        monthly: Array of the statistics of every month, with an extra last
+            axis of 12 months. Months without data hold NaN.
+    """
+
+    def __init__(self, station: dict, annual: np.ndarray, monthly: np.ndarray):
+        self.station = station
+        self.annual_values = np.asarray(annual, dtype=np.float64)
+        self.monthly_values = np.asarray(monthly, dtype=np.float64)
+
+    @classmethod
+    def from_store(cls, store: EPWStore) -> 'EPWStatistics':
+        """Compute the statistics of an EPW file."""
+        values = np.column_stack([store.array[name] for name in STATISTICS_FIELDS]).astype(np.float64)
+        months = np.asarray(store.months)
+        monthly = np.stack([_statistics(values[months == month]) for month in range(1, 13)], axis=-1)
+        latitude, longitude, time_zone = store.coordinates
+        metadata = store.metadata
+        station = {'hash': store.epw_hash, 'city': metadata['city'], 'country': metadata['country'],
+                   'source': metadata['source'], 'latitude': latitude, 'longitude': longitude,
+                   'time_zone': time_zone, 'timestep': store.timestep,
+                   'is_leap_year': store.is_leap_year, 'rows': len(store)}
+        return cls(station, _statistics(values), monthly)
+
+    @classmethod
+    def load(cls, path: Union[str, pathlib.Path]) -> 'EPWStatistics':
+        """Read a statistics sidecar."""
+        return cls(*cls._arrays(json.loads(pathlib.Path(path).read_text())))
+
+    @staticmethod
+    def _arrays(data: dict) -> tuple:
+        """Get the station, annual and monthly statistics of the content of a sidecar."""
+        return (data['station'],
+                [[data['annual'][name][statistic] for name in STATISTICS_FIELDS] for statistic in STATISTICS],
+                [[data['monthly'][name][statistic] for name in STATISTICS_FIELDS] for statistic in STATISTICS])
+
+    @classmethod
+    def open(cls, store: EPWStore, directory: Union[str, pathlib.Path] = './data') -> 'EPWStatistics':
+        """Load the statistics of an EPW file, computing and saving them if needed.
+        Args:
+            store: Columnar store of the EPW file, with its epw_hash.
+            directory: Folder holding the sidecar files.
+        Returns:
+            EPWStatistics.
+        """
+        path = content_path(directory, store.epw_hash, SIDECAR_SUFFIX)
+        if path.is_file():
+            data = json.loads(path.read_text())
+            if data.get('version') == SIDECAR_VERSION:
+                # mark the statistics as recently used for evict_stale_files
+                os.utime(path)
+                return cls(*cls._arrays(data))
+        statistics = cls.from_store(store)
+        statistics.save(directory)
+        return statistics
+
+    def save(self, directory: Union[str, pathlib.Path] = './data') -> pathlib.Path:
+        """Write the statistics sidecar under a temporary name, then move it in place."""
+        epw_hash = self.station['hash']
+        assert epw_hash, 'An EPW hash is required to save statistics.'
+        directory = pathlib.Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        data = {'version': SIDECAR_VERSION, 'station': self.station, 'annual': {}, 'monthly': {}}
+        for column, name in enumerate(STATISTICS_FIELDS):
+            data['annual'][name] = dict(zip(STATISTICS, np.round(self.annual_values[:, column], 6).tolist()))
+            data['monthly'][name] = dict(zip(STATISTICS, np.round(self.monthly_values[:, column], 6).tolist()))
+        path = content_path(directory, epw_hash, SIDECAR_SUFFIX)
+        tmp_path = directory / f'.{epw_hash}.{os.getpid()}{SIDECAR_SUFFIX}'
+        tmp_path.write_text(json.dumps(data))
+        os.replace(tmp_path, path)
+        return path
+
+    def _convert(self, field: Union[int, str], values: np.ndarray, unit_system: str) -> np.ndarray:
+        epw_field = EPWFields.field_by_number(_field_number(field))
+        return convert_values(values, epw_field.name.name, epw_field.unit, unit_system)[0]
+
+    def annual(self, field: Union[int, str], unit_system: str = 'SI') -> Dict[str, float]:
+        """Get the annual statistics of a field.
+        Args:
+            field: An EPW field number or a column name.
+            unit_system: Either 'SI' or 'IP'.
+        Returns:
+            A dictionary of each name of STATISTICS to its value.
+        """
+        column = STATISTICS_FIELDS.index(FIELD_NAMES[_field_number(field)])
+        return dict(zip(STATISTICS, self._convert(field, self.annual_values[:, column], unit_system).tolist()))
+
+    def monthly(self, field: Union[int, str], statistic: str = 'mean', unit_system: str = 'SI') -> np.ndarray:
+        """Get a statistic of a field for every month.
+        Args:
+            field: An EPW field number or a column name.
+            statistic: One of STATISTICS.
+            unit_system: Either 'SI' or 'IP'.
+        Returns:
+            An array of 12 values.
+        """
+        column = STATISTICS_FIELDS.index(FIELD_NAMES[_field_number(field)])
+        return self._convert(field, self.monthly_values[STATISTICS.index(statistic), column], unit_system)
+
+    def value(self, field: Union[int, str], statistic: str = 'mean', unit_system: str = 'SI') -> float:
+        """Get an annual statistic of a field."""
+        return self.annual(field, unit_system)[statistic]
+
+
+def station_table(directory: Union[str, pathlib.Path] = './data',
+                  columns: Sequence[str] = STATION_COLUMNS) -> pd.DataFrame:
+    """List the stations whose statistics are saved in a storage folder.
+    Args:
+        directory: Storage folder.
+        columns: Annual SI statistics listed for each station, as 'field.statistic'.
+    Returns:
+        A DataFrame indexed by the content hash of each EPW file, with its
+        station and the requested statistics.
+    """
+    rows = []
+    for path in sorted(pathlib.Path(directory).glob(f'*{SIDECAR_SUFFIX}')):
+        data = json.loads(path.read_text())
+        row = dict(data['station'])
+        for column in columns:
+            name, statistic = column.split('.')
+            row[column] = data['annual'][name][statistic]
+        rows.append(row)
+    return pd.DataFrame(rows, columns=['hash', 'city', 'country', 'source', 'latitude', 'longitude',
+                                       'time_zone', 'timestep', 'is_leap_year', 'rows', *columns]
+                        ).set_index('hash')
+
+
+def filter_stations(table: pd.DataFrame, country: str = None,
+                    ranges: Dict[str, Tuple[float, float]] = None) -> pd.DataFrame:
+    """Keep the stations of a country and within ranges of values.
+    Args:
+        table: A station_table.
+        country: Country of the stations to keep, case insensitive.
+        ranges: Column of the table to the lowest and highest value kept, bounds included.
+    Returns:
+        The rows of the table matching every filter.
+    """
+    mask = np.ones(len(table), dtype=bool)
+    if country:
+        mask &= (table['country'].str.lower() == country.lower()).to_numpy()
+    for column, (low, high) in (ranges or {}).items():
+        mask &= table[column].between(low, high).to_numpy()
+    return table[mask]
+
+
+def _epw_paths(paths: Iterable[str]) -> List[pathlib.Path]:
+    """Get the EPW files given directly or found in the given folders."""
+    found = []
+    for path in map(pathlib.Path, paths):
+        found.extend(sorted(path.glob('*.epw')) if path.is_dir() else [path])
+    return found
+
+
+def main(argv: Sequence[str] = None) -> int:
+    """Command line entry point, returning the exit status."""
+    parser = argparse.ArgumentParser(
+        prog='python -m epwviz.stats',
+        description='Compute the statistics of EPW files and list the stations of the storage folder.')
+    parser.add_argument('paths', nargs='*', help='EPW files or folders of EPW files to add.')
+    parser.add_argument('--data-dir', default='./data',
+                        help='Storage folder of the sidecar files (default: %(default)s).')
+    parser.add_argument('--column', action='append', dest='columns',
+                        help='Annual statistic to list, as field.statistic (default: a summary).')
+    parser.add_argument('--country', help='Only list the stations of this country.')
+    parser.add_argument('--range', nargs=3, action='append', default=[], metavar=('COLUMN', 'LOW', 'HIGH'),
+                        help='Only list the stations whose COLUMN is between LOW and HIGH.')
+    parser.add_argument('--sort', help='Column to sort the stations by.')
+    args = parser.parse_args(argv)
+
+    columns = args.columns or list(STATION_COLUMNS)
+    for column, *_ in args.range:
+        if column not in columns and column not in ('latitude', 'longitude', 'time_zone'):
+            columns.append(column)
+    for column in columns:
+        name, _, statistic = column.partition('.')
+        if name not in STATISTICS_FIELDS or statistic not in STATISTICS:
+            parser.error(f'unknown statistic {column}, expected field.statistic with a statistic of '
+                         f'{", ".join(STATISTICS)}')
+
+    for path in _epw_paths(args.paths):
+        epw_bytes = path.read_bytes()
+        EPWStatistics.open(EPWStore.open(epw_bytes, content_hash(epw_bytes), args.data_dir), args.data_dir)
+
+    table = filter_stations(station_table(args.data_dir, columns), args.country,
+                            {column: (float(low), float(high)) for column, low, high in args.range})
+    if args.sort:
+        table = table.sort_values(args.sort)
+    table = table.drop(columns=['source', 'timestep', 'is_leap_year', 'rows'])
+    # the start of the hash is enough to tell the files apart
+    table.index = table.index.str[:12]
+    with pd.option_context('display.max_rows', None, 'display.width', 200):
+        print(table.to_string())
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,325 @@
+"""Columnar, memory-mapped store of EPW weather data.
+
+An EPW file is parsed once into a NumPy structured array with one column per
+numeric EPW field and persisted as a ``.npy`` sidecar (plus a small JSON file
+holding the header lines) named after the content hash of the file. Later
+loads memory-map the sidecar, so field access returns zero-copy views and
+ladybug data collections are only built when a ladybug chart needs one.
+"""
+import json
+import os
+import pathlib
+from typing import Dict, List, Sequence, Tuple, Union
+
+import numpy as np
+from ladybug.analysisperiod import AnalysisPeriod
+from ladybug.datacollection import HourlyContinuousCollection
+from ladybug.epw import EPWFields
+from ladybug.header import Header
+
+from .periods import TimeIndex, period_key, period_mask, time_index
+from .units import convert_values
+from .uploads import content_path
+
+# Number of fields in the body of an EPW file
+NUM_FIELDS = 35
+
+# Fields holding text rather than numbers (Uncertainty Flags)
+STRING_FIELDS = (5,)
+
+# Fields holding the date and time of each row
+TIME_FIELDS = (0, 1, 2, 3, 4)
+
+# Column names of the structured array, derived from the EPW field data types
+FIELD_NAMES = tuple(
+    EPWFields.field_by_number(i).name.name.lower().replace(' ', '_')
+    for i in range(NUM_FIELDS))
+
+NUMERIC_FIELDS = tuple(i for i in range(NUM_FIELDS) if i not in STRING_FIELDS)
+
+STORE_DTYPE = np.dtype([
+    (FIELD_NAMES[i], np.int16 if i in TIME_FIELDS else np.float64)
+    for i in NUMERIC_FIELDS])
+
+# Number of header lines preceding the data rows
+HEADER_LINES = 8
+
+# Version of the layout of the sidecar files, sidecars of other versions are rebuilt
+SIDECAR_VERSION = 2
+
+
+def _field_number(field: Union[int, str]) -> int:
+    """Get the EPW field number from either a field number or a column name."""
+    if isinstance(field, str):
+        return FIELD_NAMES.index(field)
+    return int(field)
+
+
+def has_sidecar(directory: Union[str, pathlib.Path], epw_hash: str) -> bool:
+    """Whether the sidecar files of an EPW file exist and have the current SIDECAR_VERSION."""
+    array_path = content_path(directory, epw_hash, '.npy')
+    header_path = content_path(directory, epw_hash, '.json')
+    if not (array_path.is_file() and header_path.is_file()):
+        return False
+    try:
+        return json.loads(header_path.read_text()).get('version') == SIDECAR_VERSION
+    except ValueError:
+        return False
+
+
+def parse_epw_text(text: str) -> Tuple[np.ndarray, List[str]]:
+    """Parse the content of an EPW file into a structured array.
+
+    Values of point-in-time weather fields are shifted by one step the same
+    way ladybug does, so that the first value is at midnight of the first
+    day. The date and time fields are kept as they are in the file.
+
+    Args:
+        text: The full content of an EPW file.
+    Returns:
+        A tuple with two items:
+        -   A structured array with one row per timestep and one column per
+            numeric field (see STORE_DTYPE).
+        -   The header lines of the file.
+    """
+    lines = text.splitlines()
+    header = lines[:HEADER_LINES]
+    body = [line for line in lines[HEADER_LINES:] if line.strip()]
+
+    raw = np.loadtxt(body, delimiter=',', usecols=NUMERIC_FIELDS,
+                     dtype=np.float64, ndmin=2)
+
+    array = np.empty(raw.shape[0], dtype=STORE_DTYPE)
+    for column, field_number in enumerate(NUMERIC_FIELDS):
+        values = raw[:, column]
+        if (field_number not in TIME_FIELDS
+                and EPWFields.field_by_number(field_number).name.point_in_time):
+            values = np.roll(values, 1)
+        array[FIELD_NAMES[field_number]] = values
+    return array, header
+
+
+class EPWStore:
+    """Columnar view over the hourly data of one EPW file.
+
+    Args:
+        array: Structured array as returned by parse_epw_text.
+        header_lines: The eight header lines of the EPW file.
+        epw_hash: Content hash of the EPW file.
+    """
+
+    def __init__(self, array: np.ndarray, header_lines: List[str], epw_hash: str = None):
+        self._array = array
+        self.header_lines = list(header_lines)
+        self.epw_hash = epw_hash
+        self._converted: Dict[Tuple[int, str], Tuple[np.ndarray, str]] = {}
+        self._collections: Dict[Tuple[int, str], HourlyContinuousCollection] = {}
+
+    @classmethod
+    def from_text(cls, text: str, epw_hash: str = None) -> 'EPWStore':
+        """Parse the content of an EPW file without persisting it."""
+        array, header = parse_epw_text(text)
+        return cls(array, header, epw_hash)
+
+    @classmethod
+    def open(cls, epw_bytes: bytes, epw_hash: str,
+             directory: Union[str, pathlib.Path] = './data') -> 'EPWStore':
+        """Load the store of an EPW file, building its sidecar if needed.
+        Args:
+            epw_bytes: Raw content of the EPW file. It is only parsed when the
+                sidecar does not exist yet.
+            epw_hash: Content hash of the EPW file, used to name the sidecar.
+            directory: Folder holding the sidecar files.
+        Returns:
+            An EPWStore whose array is memory-mapped from the sidecar.
+        """
+        array_path = content_path(directory, epw_hash, '.npy')
+        header_path = content_path(directory, epw_hash, '.json')
+
+        if has_sidecar(directory, epw_hash):
+            # mark the sidecar as recently used for evict_stale_files
+            os.utime(array_path)
+        else:
+            text = epw_bytes.decode('utf-8', errors='replace')
+            cls.from_text(text, epw_hash).save(directory)
+
+        array = np.load(array_path, mmap_mode='r')
+        header = json.loads(header_path.read_text())['header']
+        return cls(array, header, epw_hash)
+
+    def save(self, directory: Union[str, pathlib.Path] = './data') -> pathlib.Path:
+        """Write the sidecar files of this store.
+
+        Files are written under a temporary name and moved in place, so
+        concurrent sessions never memory-map a partially written array.
+
+        Args:
+            directory: Folder to write the sidecar files into.
+        Returns:
+            Path to the written array file.
+        """
+        assert self.epw_hash, 'An epw_hash is required to save an EPWStore.'
+        directory = pathlib.Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        array_path = content_path(directory, self.epw_hash, '.npy')
+        header_path = content_path(directory, self.epw_hash, '.json')
+
+        tmp_array = directory / f'.{self.epw_hash}.{os.getpid()}.npy'
+        np.save(tmp_array, np.asarray(self._array))
+        os.replace(tmp_array, array_path)
+
+        tmp_header = directory / f'.{self.epw_hash}.{os.getpid()}.json'
+        tmp_header.write_text(json.dumps({'header': self.header_lines, 'version': SIDECAR_VERSION}))
+        os.replace(tmp_header, header_path)
+        return array_path
+
+    @property
+    def array(self) -> np.ndarray:
+        """The underlying structured array."""
+        return self._array
+
+    def __len__(self) -> int:
+        return len(self._array)
+
+    @property
+    def metadata(self) -> dict:
+        """Metadata dictionary matching the one ladybug puts on EPW headers."""
+        location = self.header_lines[0].strip().split(',')
+        return {
+            'source': location[4],
+            'country': location[3],
+            'city': location[1].replace('\\', ' ').replace('/', ' '),
+            'time-zone': float(location[8])
+        }
+
+    @property
+    def coordinates(self) -> Tuple[float, float, float]:
+        """Latitude, longitude and time zone of the location of the file."""
+        location = self.header_lines[0].strip().split(',')
+        return float(location[6]), float(location[7]), float(location[8])
+
+    @property
+    def is_leap_year(self) -> bool:
+        """Boolean noting whether the file holds a leap year."""
+        leap_dl_sav = self.header_lines[4].strip().split(',')
+        return len(leap_dl_sav) > 1 and leap_dl_sav[1].strip() == 'Yes'
+
+    @property
+    def timestep(self) -> int:
+        """Number of rows per hour."""
+        hours = 8784 if self.is_leap_year else 8760
+        return max(1, len(self._array) // hours)
+
+    @property
+    def analysis_period(self) -> AnalysisPeriod:
+        """Annual analysis period matching the rows of the file."""
+        return AnalysisPeriod(timestep=self.timestep, is_leap_year=self.is_leap_year)
+
+    @property
+    def time_index(self) -> TimeIndex:
+        """Month, day, day of the year, hour and step of every row of an annual file."""
+        return time_index(self.timestep, self.is_leap_year)
+
+    @property
+    def months(self) -> np.ndarray:
+        """Month (1-12) of every row, from the time index of annual files.
+
+        Files holding more (or fewer) rows than a year read the month column
+        of the file.
+        """
+        index = self.time_index
+        if len(index.month) == len(self._array):
+            return index.month
+        return np.asarray(self._array['month'])
+
+    @property
+    def hours(self) -> np.ndarray:
+        """Hour of the day (0-23) of every row, counted from the first row."""
+        index = self.time_index
+        if len(index.hour) == len(self._array):
+            return index.hour
+        return np.arange(len(self._array)) // self.timestep % 24
+
+    def period_mask(self, analysis_period: Union[AnalysisPeriod, Sequence[int]]) -> np.ndarray:
+        """Get a boolean mask of the rows within an analysis period.
+
+        Masks are computed once per period, timestep and leap year and shared
+        by every store and section (see epwviz.periods).
+
+        Args:
+            analysis_period: A ladybug AnalysisPeriod or its start month, day,
+                hour and end month, day, hour. The timestep and leap year of
+                an AnalysisPeriod are ignored in favor of the ones of the file.
+        Returns:
+            A read-only boolean array with one value per timestep.
+        """
+        mask = period_mask(period_key(analysis_period), self.timestep, self.is_leap_year)
+        if len(mask) == len(self._array):
+            return mask
+        # files holding more (or fewer) rows than a year, only the first year is selected
+        resized = np.zeros(len(self._array), dtype=bool)
+        rows = min(len(mask), len(resized))
+        resized[:rows] = mask[:rows]
+        return resized
+
+    def field(self, field: Union[int, str], unit_system: str = 'SI') -> np.ndarray:
+        """Get the values of a field as a read-only array.
+
+        SI values are zero-copy views of the store. Values in other unit
+        systems are converted once and cached for the life of the store.
+
+        Args:
+            field: An EPW field number (0-34) or a column name from FIELD_NAMES.
+            unit_system: Either 'SI' or 'IP'.
+        Returns:
+            A one dimensional array with one value per timestep.
+        """
+        field_number = _field_number(field)
+        if field_number in STRING_FIELDS:
+            raise ValueError(
+                f'Field {FIELD_NAMES[field_number]} is not numeric and is not stored.')
+        key = (field_number, unit_system)
+        if key not in self._converted:
+            epw_field = EPWFields.field_by_number(field_number)
+            values, unit = convert_values(
+                self._array[FIELD_NAMES[field_number]], epw_field.name.name,
+                epw_field.unit, unit_system)
+            values.flags.writeable = False
+            self._converted[key] = values, unit
+        return self._converted[key][0]
+
+    def unit(self, field: Union[int, str], unit_system: str = 'SI') -> str:
+        """Get the unit of a field in the requested unit system."""
+        field_number = _field_number(field)
+        epw_field = EPWFields.field_by_number(field_number)
+        if field_number in STRING_FIELDS:
+            return epw_field.unit
+        return convert_values(
+            (), epw_field.name.name, epw_field.unit, unit_system)[1]
+
+    def header(self, field: Union[int, str], unit_system: str = 'SI') -> Header:
+        """Get a ladybug header for a field, as EPW would create it."""
+        epw_field = EPWFields.field_by_number(_field_number(field))
+        return Header(data_type=epw_field.name, unit=self.unit(field, unit_system),
+                      analysis_period=self.analysis_period,
+                      metadata=self.metadata)
+
+    def to_collection(self, field: Union[int, str],
+                      unit_system: str = 'SI') -> HourlyContinuousCollection:
+        """Get a ladybug data collection for a field.
+
+        Collections are built on first request and reused afterwards. They are
+        shared, so callers must duplicate them before any modification.
+
+        Args:
+            field: An EPW field number (0-34) or a column name from FIELD_NAMES.
+            unit_system: Either 'SI' or 'IP'.
+        Returns:
+            An HourlyContinuousCollection.
+        """
+        key = (_field_number(field), unit_system)
+        if key not in self._collections:
+            self._collections[key] = HourlyContinuousCollection(
+                self.header(field, unit_system),
+                self.field(field, unit_system).tolist())
+        return self._collections[key]
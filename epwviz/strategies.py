@@ -0,0 +1,207 @@
+"""Passive strategy polygons of the psychrometric chart and their evaluation.
+
+The polygons of the comfort zone and of the passive strategies only depend on
+the comfort parameters and on the unit system of the chart, so their geometry
+is built once per (clo, met, air speed, unit system) with ladybug_comfort and
+kept. Evaluating which hours fall in which polygon is then a single vectorized
+even-odd ray casting over all the edges of all the polygons, which also gives
+each hour the label of the first strategy that makes it comfortable.
+"""
+from functools import lru_cache
+from typing import Dict, NamedTuple, Optional, Tuple
+
+import numpy as np
+from ladybug.psychchart import PsychrometricChart
+from ladybug_comfort.chart.polygonpmv import PolygonPMV
+from ladybug_comfort.parameter.pmv import PMVParameter
+
+# Strategies in the order their label is given to an hour in several polygons
+STRATEGIES = ('comfort', 'internal_heat', 'passive_solar', 'fan_use', 'night_flush',
+              'evaporative_cooling')
+
+# Label of each value of the per-hour label array (0 when no strategy applies)
+STRATEGY_LABELS = ('None', 'Comfort', 'Capture internal heat', 'Passive solar heating',
+                   'Occupant use of fans', 'Mass + Night Ventilation', 'Evaporative Cooling')
+
+# Assumptions of the strategies, matching the text of the report
+BALANCE_TEMPERATURE = 12.8
+FAN_AIR_SPEED = 1.0
+SOLAR_HEAT_CAPACITY = 50
+TIME_CONSTANT = 8
+
+# Tolerance used to join the lines of a polygon
+TOLERANCE = 0.01
+
+
+class StrategyEvaluation(NamedTuple):
+    """Hours within the comfort and strategy polygons.
+
+    membership maps each item of STRATEGIES to a boolean array with one value
+    per hour, labels holds the index in STRATEGY_LABELS of every hour and
+    shares the percentage of hours within each polygon.
+    """
+    membership: Dict[str, np.ndarray]
+    labels: np.ndarray
+    shares: Dict[str, float]
+
+
+def polygon_vertices(polygon: Optional[tuple]) -> Optional[np.ndarray]:
+    """Get the vertices of a ladybug strategy polygon as an (n, 2) array."""
+    if polygon is None:
+        return None
+    joined = PolygonPMV._lines_to_polygon(polygon, TOLERANCE)
+    return np.array([(pt.x, pt.y) for pt in joined.vertices])
+
+
+def points_in_polygons(x: np.ndarray, y: np.ndarray,
+                       polygons: Dict[str, Optional[np.ndarray]]) -> Dict[str, np.ndarray]:
+    """Test which points lie within each of several polygons in one pass.
+
+    The edges of all polygons are stacked and crossed with a horizontal ray
+    from every point at once. A point is inside a polygon when the ray crosses
+    an odd number of its edges.
+
+    Args:
+        x: X coordinate of each point.
+        y: Y coordinate of each point.
+        polygons: Dictionary of name to (n, 2) vertices, or None for polygons
+            that do not exist (no point is inside them).
+    Returns:
+        Dictionary of name to a boolean array with one value per point.
+    """
+    x, y = np.asarray(x)[:, None], np.asarray(y)[:, None]
+    names = [name for name, vertices in polygons.items() if vertices is not None]
+    result = {name: np.zeros(len(x), dtype=bool) for name in polygons}
+    if not names:
+        return result
+
+    starts = np.concatenate([polygons[name] for name in names])
+    ends = np.concatenate([np.roll(polygons[name], -1, axis=0) for name in names])
+    owner = np.repeat(np.arange(len(names)), [len(polygons[name]) for name in names])
+    x1, y1, x2, y2 = starts[:, 0], starts[:, 1], ends[:, 0], ends[:, 1]
+
+    straddles = (y1 > y) != (y2 > y)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x_cross = x1 + (y - y1) * (x2 - x1) / (y2 - y1)
+    crossings = (straddles & (x <= x_cross)).astype(np.int32)
+
+    # number of crossed edges per point and polygon
+    first_edge = np.concatenate(([0], np.cumsum(np.bincount(owner))[:-1]))
+    counts = np.add.reduceat(crossings, first_edge, axis=1)
+    for i, name in enumerate(names):
+        result[name] = counts[:, i] % 2 == 1
+    return result
+
+
+class StrategyPolygons:
+    """Comfort and strategy polygons for one set of comfort parameters.
+
+    Use strategy_polygons to get a shared instance.
+
+    Args:
+        clo_value: Clothing level.
+        met_rate: Metabolic rate.
+        air_speed: Air speed in m/s.
+        use_ip: Set to True for charts in IP units.
+    """
+
+    def __init__(self, clo_value: float, met_rate: float, air_speed: float, use_ip: bool):
+        # the chart geometry does not depend on its data, only on its units
+        chart = PsychrometricChart(0, 50, use_ip=use_ip)
+        comfort_parameter = PMVParameter(10, humid_ratio_upper=0.03, humid_ratio_lower=0)
+        self.pmv = PolygonPMV(chart, rad_temperature=None, met_rate=[met_rate],
+                              clo_value=[clo_value], air_speed=[air_speed],
+                              comfort_parameter=comfort_parameter)
+        pmv = self.pmv
+        self.vertices = {
+            'comfort': polygon_vertices(pmv.merged_comfort_polygon),
+            'internal_heat': polygon_vertices(pmv.internal_heat_polygon(BALANCE_TEMPERATURE)),
+            'fan_use': polygon_vertices(pmv.fan_use_polygon(FAN_AIR_SPEED)),
+            'night_flush': polygon_vertices(pmv.night_flush_polygon()),
+            'evaporative_cooling': polygon_vertices(pmv.evaporative_cooling_polygon()),
+        }
+        # hours above the comfort polygon cannot be passively heated
+        self.max_comfort_y = pmv.merged_comfort_polygon[0][0].y
+        self._passive_solar: Dict[float, Optional[np.ndarray]] = {}
+
+    def passive_solar_vertices(self, max_temperature_delta: float) -> Optional[np.ndarray]:
+        """Get the passive solar polygon supporting a temperature delta."""
+        key = round(float(max_temperature_delta), 6)
+        if key not in self._passive_solar:
+            self._passive_solar[key] = polygon_vertices(
+                self.pmv.passive_solar_polygon(max_temperature_delta))
+        return self._passive_solar[key]
+
+    def max_passive_solar_delta(self, temperature: np.ndarray, y: np.ndarray,
+                                comfort: np.ndarray, irradiance: np.ndarray,
+                                timestep: int = 1) -> float:
+        """Get the largest temperature delta passive solar heating can overcome.
+
+        This is a vectorized PolygonPMV.evaluate_passive_solar, weighting the
+        irradiance of the last TIME_CONSTANT hours before each timestep.
+
+        Args:
+            temperature: Dry bulb temperature of each timestep in C.
+            y: Y coordinate of each timestep on the chart.
+            comfort: Whether each timestep is in the comfort polygon.
+            irradiance: Irradiance of each timestep in W/m2.
+            timestep: Number of timesteps per hour.
+        Returns:
+            The temperature delta in C (20 if no timestep can be heated).
+        """
+        balance = max(BALANCE_TEMPERATURE, 5)
+        window = TIME_CONSTANT * timestep
+        weights = (np.arange(window) + 1) / TIME_CONSTANT
+        irradiance = np.asarray(irradiance, dtype=np.float64)
+        solar_heat = np.zeros(len(irradiance))
+        if len(irradiance) > window:
+            windows = np.lib.stride_tricks.sliding_window_view(irradiance, window)
+            solar_heat[window:] = windows[:len(irradiance) - window] @ weights
+
+        delta = balance - temperature
+        heated = (~comfort) & (y <= self.max_comfort_y) & (temperature <= balance) \
+            & (solar_heat > SOLAR_HEAT_CAPACITY * delta)
+        return float(delta[heated].max()) if heated.any() else 20.0
+
+    def evaluate(self, x: np.ndarray, y: np.ndarray, temperature: np.ndarray,
+                 irradiance: np.ndarray, timestep: int = 1) -> StrategyEvaluation:
+        """Evaluate the hours of a psychrometric chart against every polygon.
+        Args:
+            x: X coordinate of each data point of the chart.
+            y: Y coordinate of each data point of the chart.
+            temperature: Dry bulb temperature of each data point in C.
+            irradiance: Global horizontal irradiance of each data point in W/m2.
+            timestep: Number of data points per hour.
+        Returns:
+            A StrategyEvaluation.
+        """
+        vertices = dict(self.vertices)
+        comfort = points_in_polygons(x, y, {'comfort': vertices['comfort']})['comfort']
+        delta = self.max_passive_solar_delta(temperature, y, comfort, irradiance, timestep)
+        vertices['passive_solar'] = self.passive_solar_vertices(delta)
+        del vertices['comfort']
+
+        membership = points_in_polygons(x, y, vertices)
+        membership['comfort'] = comfort
+        membership = {name: membership[name] for name in STRATEGIES}
+
+        labels = np.zeros(len(x), dtype=np.int8)
+        for i, name in reversed(list(enumerate(STRATEGIES, start=1))):
+            labels[membership[name]] = i
+        total = max(len(x), 1)
+        shares = {name: round(float(inside.sum()) / total * 100, 2)
+                  for name, inside in membership.items()}
+        return StrategyEvaluation(membership, labels, shares)
+
+
+@lru_cache(maxsize=64)
+def strategy_polygons(clo_value: float, met_rate: float, air_speed: float,
+                      use_ip: bool) -> StrategyPolygons:
+    """Get the shared strategy polygons of a set of comfort parameters."""
+    return StrategyPolygons(clo_value, met_rate, air_speed, use_ip)
+
+
+def chart_points(chart: PsychrometricChart) -> Tuple[np.ndarray, np.ndarray]:
+    """Get the coordinates of the data points of a psychrometric chart as arrays."""
+    points = np.array([(pt.x, pt.y) for pt in chart.data_points])
+    return points[:, 0], points[:, 1]
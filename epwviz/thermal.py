@@ -0,0 +1,103 @@
+"""Vectorized outdoor thermal sensation of an EPW file.
+
+The Thermal Sensation index of Givoni and Noguchi (as implemented by
+ladybug_comfort.ts) is a linear function of the weather, so it is computed
+for every timestep of a year in a handful of NumPy operations. The shares of
+each sensation category are counted in a single np.bincount over a combined
+(month, hour, category) index, which gives the annual, monthly and
+hour-of-day breakdowns at once.
+"""
+from typing import Dict, NamedTuple
+
+import numpy as np
+
+from .store import EPWStore
+
+# Sensation categories from -3 to 3, as returned by
+# ladybug_comfort.ts.thermal_sensation_effect_category
+CATEGORIES = ('verycold', 'quitecold', 'cold', 'comfort', 'hot', 'quitehot', 'veryhot')
+
+# Ground temperature [C] assumed by the dashboard
+DEFAULT_GROUND_TEMPERATURE = 20
+
+
+class ThermalSensation(NamedTuple):
+    """Thermal sensation of every timestep and its category shares.
+
+    Shares are percentages of the timesteps of the year, of each month and of
+    each hour of the day respectively, with one column per item of CATEGORIES.
+    """
+    categories: np.ndarray
+    shares: Dict[str, float]
+    monthly: np.ndarray
+    hourly: np.ndarray
+
+
+def thermal_sensation(ta: np.ndarray, ws: np.ndarray, rh: np.ndarray, sr: np.ndarray,
+                      tground: float = DEFAULT_GROUND_TEMPERATURE) -> np.ndarray:
+    """Calculate the Thermal Sensation (TS) of arrays of weather conditions.
+    Args:
+        ta: Air temperature [C]
+        ws: Wind speed [m/s]
+        rh: Relative humidity [%]
+        sr: Solar radiation [Wh/m2]
+        tground: Ground temperature [C]
+    Returns:
+        Array of thermal sensation values [unitless].
+    """
+    return 1.7 + 0.1118 * np.asarray(ta) + 0.0019 * np.asarray(sr) \
+        - 0.322 * np.asarray(ws) - 0.0073 * np.asarray(rh) + 0.0054 * tground
+
+
+def thermal_sensation_category(ts: np.ndarray) -> np.ndarray:
+    """Get the category (-3 to 3) of an array of thermal sensation values.
+
+    Categories are one unit wide, from Cold for 3 <= ts < 4 up to Very hot
+    for ts >= 7, matching ladybug_comfort.ts.thermal_sensation_effect_category.
+    """
+    return np.clip(np.floor(ts) - 4, -3, 3).astype(np.int8)
+
+
+def category_counts(categories: np.ndarray, months: np.ndarray,
+                    hours: np.ndarray) -> np.ndarray:
+    """Count the timesteps of each category per month and hour of the day.
+    Args:
+        categories: Category (-3 to 3) of each timestep.
+        months: Month (1-12) of each timestep.
+        hours: Hour of the day (0-23) of each timestep.
+    Returns:
+        An integer array of shape (12, 24, 7).
+    """
+    n = len(CATEGORIES)
+    index = ((np.asarray(months, dtype=np.intp) - 1) * 24
+             + np.asarray(hours, dtype=np.intp)) * n + (categories + 3)
+    return np.bincount(index, minlength=12 * 24 * n).reshape(12, 24, n)
+
+
+def _percent(counts: np.ndarray) -> np.ndarray:
+    """Normalize counts along the last axis to percentages rounded like the dashboard."""
+    totals = counts.sum(axis=-1, keepdims=True)
+    return np.round(counts / np.maximum(totals, 1) * 100, 2)
+
+
+def store_thermal_sensation(store: EPWStore,
+                            tground: float = DEFAULT_GROUND_TEMPERATURE) -> ThermalSensation:
+    """Compute the thermal sensation of an EPW file and its category shares.
+    Args:
+        store: Columnar store of the EPW file.
+        tground: Ground temperature [C].
+    Returns:
+        A ThermalSensation tuple.
+    """
+    ts = thermal_sensation(store.field('dry_bulb_temperature'), store.field('wind_speed'),
+                           store.field('relative_humidity'),
+                           store.field('global_horizontal_radiation'), tground)
+    categories = thermal_sensation_category(ts)
+    counts = category_counts(categories, store.months, store.hours)
+
+    annual = _percent(counts.sum(axis=(0, 1)))
+    return ThermalSensation(
+        categories=categories,
+        shares=dict(zip(CATEGORIES, annual.tolist())),
+        monthly=_percent(counts.sum(axis=1)),
+        hourly=_percent(counts.sum(axis=0)))
@@ -0,0 +1,76 @@
+"""Table-driven SI to IP conversion of EPW fields.
+
+Each EPW data type maps to the IP unit used by the dashboard and a linear
+conversion (``ip = si * scale + offset``) so that a whole series, of any
+length, is converted in one NumPy operation.
+"""
+from typing import Dict, NamedTuple, Tuple
+
+import numpy as np
+
+UNIT_SYSTEMS = ('SI', 'IP')
+
+
+class Conversion(NamedTuple):
+    """Linear conversion from the EPW (SI) unit to an IP unit."""
+    unit: str
+    scale: float = 1.0
+    offset: float = 0.0
+
+
+# IP conversion of the EPW fields keyed by data type name
+IP_CONVERSIONS: Dict[str, Conversion] = {
+    # C > F
+    'Dry Bulb Temperature': Conversion('F', 9 / 5, 32),
+    'Dew Point Temperature': Conversion('F', 9 / 5, 32),
+    # %
+    'Relative Humidity': Conversion('%'),
+    # Pa > inHg
+    'Atmospheric Station Pressure': Conversion('inHg', 0.0002953),
+    # Wh/m2 > kBtu/ft2
+    'Extraterrestrial Horizontal Radiation': Conversion('kBtu/ft2', 3.15459),
+    'Extraterrestrial Direct Normal Radiation': Conversion('kBtu/ft2', 3.15459),
+    'Global Horizontal Radiation': Conversion('kBtu/ft2', 3.15459),
+    'Direct Normal Radiation': Conversion('kBtu/ft2', 3.15459),
+    'Diffuse Horizontal Radiation': Conversion('kBtu/ft2', 3.15459),
+    # W/m2 > Btu/ft2
+    'Horizontal Infrared Radiation Intensity': Conversion('Btu/ft2', 0.317),
+    # lux > fc or cd/m2 > cd/ft2
+    'Global Horizontal Illuminance': Conversion('cd/ft2', 1 / 10.7639),
+    'Diffuse Horizontal Illuminance': Conversion('cd/ft2', 1 / 10.7639),
+    'Direct Normal Illuminance': Conversion('cd/ft2', 1 / 10.7639),
+    'Zenith Luminance': Conversion('cd/ft2', 1 / 10.7639),
+    # degrees
+    'Wind Direction': Conversion('degrees'),
+    # m/s > mph
+    'Wind Speed': Conversion('mph', 2.23694),
+    # tenths
+    'Total Sky Cover': Conversion('tenths'),
+    # derived psychrometrics (see epwviz.psychrometrics)
+    'Wet Bulb Temperature': Conversion('F', 9 / 5, 32),
+    'Enthalpy': Conversion('Btu/lb', 0.429923),
+    'Pressure': Conversion('inHg', 0.0002953),
+}
+
+
+def convert_values(values: np.ndarray, data_type: str, unit: str,
+                   unit_system: str = 'SI') -> Tuple[np.ndarray, str]:
+    """Convert a series of EPW values to the requested unit system.
+    Args:
+        values: Values in the EPW (SI) unit.
+        data_type: Name of the data type of the values (eg. 'Wind Speed').
+        unit: The EPW (SI) unit of the values.
+        unit_system: Either 'SI' or 'IP'.
+    Returns:
+        A tuple with the converted values and their unit. Values are returned
+        unchanged for SI or for data types without an IP conversion.
+    """
+    assert unit_system in UNIT_SYSTEMS, \
+        f'unit_system must be one of {UNIT_SYSTEMS}. Got {unit_system}.'
+    values = np.asarray(values, dtype=np.float64)
+    conversion = IP_CONVERSIONS.get(data_type)
+    if unit_system == 'SI' or conversion is None:
+        return values, unit
+    if conversion.scale == 1 and conversion.offset == 0:
+        return values, conversion.unit
+    return values * conversion.scale + conversion.offset, conversion.unit
@@ -0,0 +1,100 @@
+"""In-memory parsing of uploaded EPW files and bounded upload storage.
+
+Uploads are parsed straight from the bytes held by Streamlit. Whatever has to
+be written to disk (the columnar sidecars of EPWStore) is named after the
+content hash of the file, so sessions uploading different files with the same
+name never overwrite each other. The storage folder is kept within a size and
+age budget by evict_stale_files.
+"""
+import os
+import pathlib
+import time
+from collections import defaultdict
+from typing import Iterable, Union
+
+from ladybug.epw import EPW
+
+# Default storage budget of the upload folder, overridable through the environment
+DEFAULT_MAX_MB = float(os.environ.get('EPWVIZ_UPLOAD_DIR_MB', 1024))
+DEFAULT_MAX_AGE_HOURS = float(os.environ.get('EPWVIZ_UPLOAD_MAX_AGE_HOURS', 24 * 7))
+
+
+def epw_from_bytes(epw_bytes: bytes) -> EPW:
+    """Parse the content of an EPW file without touching the file system.
+    Args:
+        epw_bytes: Raw content of the EPW file.
+    Returns:
+        A ladybug EPW object with all of its data loaded.
+    """
+    text = epw_bytes.decode('utf-8', errors='replace').replace('\r\n', '\n')
+    # ladybug drops the last line, expecting it to be the trailing newline
+    if not text.endswith('\n'):
+        text += '\n'
+    return EPW.from_file_string(text)
+
+
+def content_path(directory: Union[str, pathlib.Path], epw_hash: str,
+                 suffix: str) -> pathlib.Path:
+    """Get the content-addressed path of a file derived from an EPW file.
+    Args:
+        directory: Storage folder.
+        epw_hash: Content hash of the EPW file.
+        suffix: File extension including the dot (eg. '.npy').
+    Returns:
+        Path of the file.
+    """
+    return pathlib.Path(directory) / f'{epw_hash}{suffix}'
+
+
+def evict_stale_files(directory: Union[str, pathlib.Path] = './data',
+                      max_bytes: float = DEFAULT_MAX_MB * 1024 ** 2,
+                      max_age: float = DEFAULT_MAX_AGE_HOURS * 3600,
+                      keep: Iterable[str] = ()) -> int:
+    """Delete files of the storage folder that exceed its age or size budget.
+
+    Files are grouped by the content hash they are named after, so all the
+    files of one EPW are removed together. Groups that were not used for
+    longer than max_age are removed first, then the least recently used
+    groups until the folder fits in max_bytes.
+
+    Args:
+        directory: Storage folder.
+        max_bytes: Size budget of the folder.
+        max_age: Maximum time in seconds since a group was last used.
+        keep: Content hashes that must not be removed (eg. the files in use).
+    Returns:
+        Number of deleted files.
+    """
+    directory = pathlib.Path(directory)
+    if not directory.is_dir():
+        return 0
+
+    groups = defaultdict(list)
+    for path in directory.iterdir():
+        if path.is_file():
+            groups[path.name.lstrip('.').split('.')[0]].append(path)
+
+    def _last_used(paths):
+        return max(path.stat().st_mtime for path in paths)
+
+    def _size(paths):
+        return sum(path.stat().st_size for path in paths)
+
+    keep = set(keep)
+    now = time.time()
+    total = sum(_size(paths) for paths in groups.values())
+    deleted = 0
+    for key, paths in sorted(groups.items(), key=lambda item: _last_used(item[1])):
+        if key in keep:
+            continue
+        if now - _last_used(paths) <= max_age and total <= max_bytes:
+            break
+        for path in paths:
+            try:
+                size = path.stat().st_size
+                path.unlink()
+            except OSError:  # in use by another process or already removed
+                continue
+            total -= size
+            deleted += 1
+    return deleted
@@ -0,0 +1,241 @@
+"""Shared wind rose binning of EPW fields.
+
+Wind directions are binned into compass sectors once per analysis period.
+Any number of overlay fields (wind speed, temperature, radiation, ...) is then
+binned against those sectors in a single np.bincount over a combined
+(field, group, direction, value bin) index, where groups split the period into
+small multiples such as months or seasons. Figures are drawn from the
+resulting histograms the same way ladybug_charts draws a ladybug WindRose.
+"""
+from typing import Dict, List, NamedTuple, Sequence, Tuple, Union
+
+import numpy as np
+import plotly.graph_objects as go
+from ladybug.analysisperiod import AnalysisPeriod
+from ladybug.color import Color, ColorRange
+from ladybug.datatype.speed import Speed
+from ladybug.epw import EPWFields
+from plotly.graph_objects import Figure
+from plotly.subplots import make_subplots
+
+from .periods import period_key
+from .store import EPWStore, _field_number
+
+# Number of compass sectors of a wind rose
+DIRECTIONS = 16
+
+# Width of a sector in degrees, sectors are centered on their direction
+SECTOR = 360 / DIRECTIONS
+
+DIRECTION_LABELS = ('North', 'N-N-E', 'N-E', 'E-N-E', 'East', 'E-S-E', 'S-E', 'S-S-E',
+                    'South', 'S-S-W', 'S-W', 'W-S-W', 'West', 'W-N-W', 'N-W', 'N-N-W')
+
+# Number of value bins, matching the default ladybug legend
+SEGMENT_COUNT = 11
+
+
+class WindRoseHistogram(NamedTuple):
+    """Frequency of the values of a field per wind direction.
+
+    frequency holds the percentage of the timesteps of each group that fall in
+    each (direction, value bin), with shape (groups, DIRECTIONS, bins). edges
+    holds the bins + 1 value edges, the last one being infinite.
+    """
+    frequency: np.ndarray
+    edges: np.ndarray
+    unit: str
+
+
+def direction_index(wind_direction: np.ndarray) -> np.ndarray:
+    """Get the compass sector (0 for North, clockwise) of each wind direction in degrees."""
+    wind_direction = np.asarray(wind_direction, dtype=np.float64)
+    return (np.floor((wind_direction + SECTOR / 2) / SECTOR).astype(np.intp)) % DIRECTIONS
+
+
+def value_range(values: np.ndarray, is_speed: bool = False) -> Tuple[float, float]:
+    """Get the range of values covered by the legend of a wind rose.
+
+    Like ladybug, calm (zero) values are left out of the range of speed data.
+    """
+    values = np.asarray(values)
+    if is_speed:
+        values = values[values > 0]
+    return (float(values.min()), float(values.max())) if len(values) else (0.0, 0.0)
+
+
+def value_edges(low: float, high: float, segment_count: int = SEGMENT_COUNT) -> np.ndarray:
+    """Get the value bin edges a ladybug legend would use for a range of values.
+
+    Edges are evenly spaced from the minimum to the maximum value, rounded to
+    two decimals, and followed by an infinite edge.
+    """
+    return np.append(np.round(np.linspace(low, high, segment_count), 2), np.inf)
+
+
+def bin_histograms(directions: np.ndarray, overlays: Sequence[np.ndarray],
+                   edges: Sequence[np.ndarray], groups: np.ndarray = None,
+                   group_count: int = 1) -> List[np.ndarray]:
+    """Count the timesteps of several fields per group, direction and value bin.
+
+    Like ladybug_charts, value bins are closed on the right, (edges[i], edges[i + 1]],
+    so values at or below the first edge (eg. calm hours or night hours of
+    radiation) are not counted in any bin.
+
+    Args:
+        directions: Compass sector of each timestep (see direction_index).
+        overlays: Values of each field at each timestep.
+        edges: Value bin edges of each field.
+        groups: Optional group (0 to group_count - 1) of each timestep.
+        group_count: Number of groups.
+    Returns:
+        One integer array of shape (group_count, DIRECTIONS, bins) per field.
+    """
+    if groups is None:
+        groups = np.zeros(len(directions), dtype=np.intp)
+    base = groups * DIRECTIONS + directions
+    sizes = [group_count * DIRECTIONS * (len(e) - 1) for e in edges]
+    offsets = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+    # uncounted values go to one extra slot past the last field
+    discard = int(sum(sizes))
+
+    index = []
+    for values, field_edges, offset in zip(overlays, edges, offsets):
+        bins = len(field_edges) - 1
+        value_bin = np.searchsorted(field_edges, values, side='left') - 1
+        index.append(np.where(value_bin >= 0, offset + base * bins + value_bin, discard))
+
+    counts = np.bincount(np.concatenate(index), minlength=discard + 1)
+    return [counts[offset:offset + size].reshape(group_count, DIRECTIONS, -1)
+            for offset, size in zip(offsets, sizes)]
+
+
+def _is_speed(field: Union[int, str]) -> bool:
+    """Check whether an EPW field holds speed data."""
+    return isinstance(EPWFields.field_by_number(_field_number(field)).name, Speed)
+
+
+class WindRoseEngine:
+    """Wind rose histograms of the fields of one EPW file.
+
+    The sector of every timestep is computed once per analysis period and
+    reused by every overlay field and unit system.
+
+    Args:
+        store: Columnar store of the EPW file.
+    """
+
+    def __init__(self, store: EPWStore):
+        self.store = store
+        self._periods: Dict[Tuple, Tuple[np.ndarray, np.ndarray]] = {}
+
+    def _period(self, analysis_period: AnalysisPeriod) -> Tuple[np.ndarray, np.ndarray]:
+        """Get the row mask and the sector of every row of an analysis period."""
+        key = period_key(analysis_period)
+        if key not in self._periods:
+            mask = self.store.period_mask(key)
+            self._periods[key] = mask, direction_index(self.store.field('wind_direction')[mask])
+        return self._periods[key]
+
+    def histograms(self, analysis_period: AnalysisPeriod, fields: Sequence[Union[int, str]],
+                   unit_system: str = 'SI',
+                   by_month: bool = False) -> Dict[Union[int, str], WindRoseHistogram]:
+        """Get the wind rose histograms of several fields in one pass.
+        Args:
+            analysis_period: Period of the wind rose.
+            fields: EPW field numbers or column names of the overlay fields.
+            unit_system: Either 'SI' or 'IP'.
+            by_month: Set to True to get one histogram per month (12 groups)
+                instead of one for the whole period.
+        Returns:
+            Dictionary of field to its WindRoseHistogram.
+        """
+        mask, directions = self._period(analysis_period)
+        overlays = [self.store.field(field, unit_system)[mask] for field in fields]
+        edges = [value_edges(*value_range(values, _is_speed(field)))
+                 for values, field in zip(overlays, fields)]
+        if by_month:
+            groups = self.store.months[mask].astype(np.intp) - 1
+            counts = bin_histograms(directions, overlays, edges, groups, 12)
+            totals = np.bincount(groups, minlength=12)[:, None, None]
+        else:
+            counts = bin_histograms(directions, overlays, edges)
+            totals = np.full((1, 1, 1), len(directions))
+        return {
+            field: WindRoseHistogram(count / np.maximum(totals, 1) * 100, field_edges,
+                                     self.store.unit(field, unit_system))
+            for field, count, field_edges in zip(fields, counts, edges)}
+
+
+def bin_colors(edges: np.ndarray, colors: Sequence[Color]) -> List[str]:
+    """Get the color of each value bin the way ladybug_charts colors a wind rose."""
+    bins = len(edges) - 1
+    if len(colors) < SEGMENT_COUNT:
+        color_range = ColorRange(colors=colors, domain=[edges[0], edges[-2] + 1])
+        colors = [color_range.color(value) for value in edges[:bins]]
+    return ['#%02x%02x%02x' % (color.r, color.g, color.b) for color in colors[:bins]]
+
+
+def wind_rose_figure(frequency: np.ndarray, edges: np.ndarray, unit: str,
+                     colors: Sequence[Color], title: str = None, group: int = 0) -> Figure:
+    """Draw one wind rose from a histogram.
+    Args:
+        frequency: The frequency array of a WindRoseHistogram.
+        edges: The value bin edges of the histogram.
+        unit: Unit of the values.
+        colors: Colors of the legend.
+        title: Optional title of the figure.
+        group: Group of the histogram to draw.
+    Returns:
+        A plotly figure.
+    """
+    theta = np.arange(DIRECTIONS) * SECTOR
+    fig = go.Figure()
+    for i, color in enumerate(bin_colors(edges, colors)):
+        fig.add_trace(go.Barpolar(
+            r=frequency[group, :, i], theta=theta, name=f'{edges[i]} - {edges[i + 1]} {unit}',
+            marker_color=color, text=DIRECTION_LABELS,
+            hovertemplate='frequency: %{r:.2f}%<br>direction: %{theta:.2f}° deg<br>'))
+
+    fig.update_layout(
+        autosize=True,
+        polar_angularaxis_rotation=90,
+        polar_angularaxis_direction='clockwise',
+        dragmode=False,
+        margin=dict(l=20, r=20, t=55, b=20),
+        title={'text': title, 'y': 1, 'x': 0.5, 'xanchor': 'center', 'yanchor': 'top'}
+        if title else None)
+    return fig
+
+
+def wind_rose_small_multiples(frequency: np.ndarray, edges: np.ndarray, unit: str,
+                              colors: Sequence[Color], titles: Sequence[str],
+                              cols: int = 4) -> Figure:
+    """Draw one wind rose per group of a histogram on a grid of polar subplots.
+    Args:
+        frequency: The frequency array of a WindRoseHistogram with one group
+            per title.
+        edges: The value bin edges of the histogram.
+        unit: Unit of the values.
+        colors: Colors of the legend.
+        titles: Title of each subplot (eg. the month names).
+        cols: Number of columns of the grid.
+    Returns:
+        A plotly figure.
+    """
+    rows = -(-len(titles) // cols)
+    fig = make_subplots(rows=rows, cols=cols, subplot_titles=list(titles),
+                        specs=[[{'type': 'polar'}] * cols] * rows)
+    theta = np.arange(DIRECTIONS) * SECTOR
+    bin_colors_ = bin_colors(edges, colors)
+    for group in range(len(titles)):
+        for i, color in enumerate(bin_colors_):
+            fig.add_trace(go.Barpolar(
+                r=frequency[group, :, i], theta=theta, name=f'{edges[i]} - {edges[i + 1]} {unit}',
+                marker_color=color, legendgroup=str(i), showlegend=group == 0,
+                hovertemplate='frequency: %{r:.2f}%<br>direction: %{theta:.2f}° deg<br>'),
+                row=group // cols + 1, col=group % cols + 1)
+
+    fig.update_polars(angularaxis_rotation=90, angularaxis_direction='clockwise',
+                      angularaxis_showticklabels=False, radialaxis_showticklabels=False)
+    fig.update_layout(dragmode=False, height=300 * rows, margin=dict(l=20, r=20, t=55, b=20))
+    return fig
@@ -0,0 +1,111 @@
+"""Process pools running the slow, session independent work of the dashboard.
+
+KeyedPool runs jobs in worker processes and keeps their results keyed by a
+hash of their inputs, so a job is only run once however many sessions ask
+for it. It backs the report builder and the figure exporter.
+"""
+import multiprocessing
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+
+# Modules of the jobs run in worker processes, imported once by the fork server
+WORKER_MODULES = ['epwviz.compare', 'epwviz.export', 'epwviz.pmv', 'epwviz.report']
+
+
+def process_pool(max_workers: int) -> ProcessPoolExecutor:
+    """Create a process pool suitable for the dashboard.
+
+    The Streamlit server is multithreaded, and a child forked from it could
+    inherit a lock held by another thread and deadlock. Workers are started
+    from a fork server instead, where the platform has one, and spawned
+    otherwise. Job functions must live in importable modules, like the
+    epwviz ones, which the fork server imports once for all its workers.
+
+    Such workers import the __main__ module of the parent again, from its
+    file unless it has a module spec. Streamlit installs the dashboard script
+    as a __main__ module without a spec, so the script declares one for the
+    workers not to run the dashboard.
+    """
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('forkserver')
+        context.set_forkserver_preload(WORKER_MODULES)
+    else:
+        context = multiprocessing.get_context('spawn')
+    return ProcessPoolExecutor(max_workers, mp_context=context)
+
+
+class KeyedPool:
+    """Run jobs in a process pool and keep their results.
+
+    One instance is shared by every session of the dashboard. Requests for a
+    job that is already running wait for the same future. Worker processes are
+    only started when the first job is submitted.
+
+    Args:
+        max_workers: Number of worker processes.
+        max_entries: Number of results kept, least recently used results are
+            dropped first.
+    """
+
+    def __init__(self, max_workers: int, max_entries: int):
+        self.max_workers = max_workers
+        self.max_entries = max_entries
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._results: 'OrderedDict[str, Any]' = OrderedDict()
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Get the result of a finished job, or None if it did not run yet."""
+        with self._lock:
+            if key in self._results:
+                self._results.move_to_end(key)
+                return self._results[key]
+        return None
+
+    def pending(self, key: str) -> Optional[Future]:
+        """Get the future of a running job, or None if there is none."""
+        with self._lock:
+            return self._pending.get(key)
+
+    def submit(self, key: str, func: Callable, *args) -> Future:
+        """Run a job unless its result is already kept or it is already running.
+        Args:
+            key: Hash of the inputs of the job.
+            func: A picklable function run in a worker process.
+            args: Picklable arguments of the function.
+        Returns:
+            A future whose result is the return value of the function.
+        """
+        with self._lock:
+            if key in self._results:
+                self._results.move_to_end(key)
+                future = Future()
+                future.set_result(self._results[key])
+                return future
+            if key in self._pending:
+                return self._pending[key]
+            if self._executor is None:
+                self._executor = process_pool(self.max_workers)
+            future = self._executor.submit(func, *args)
+            self._pending[key] = future
+        future.add_done_callback(lambda f: self._store(key, f))
+        return future
+
+    def _store(self, key: str, future: Future) -> None:
+        with self._lock:
+            self._pending.pop(key, None)
+            if future.cancelled() or future.exception() is not None:
+                return
+            self._results[key] = future.result()
+            while len(self._results) > self.max_entries:
+                self._results.popitem(last=False)
+
+    def shutdown(self) -> None:
+        """Stop the worker processes."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,142 @@
+"""Monthly means, sidecar loading and summaries of the compared EPW files."""
+import json
+import pathlib
+
+import numpy as np
+import pytest
+from ladybug.analysisperiod import AnalysisPeriod
+from ladybug.epw import EPW
+
+from epwviz.analysis import FIELDS, comparison_analysis
+from epwviz.cache import content_hash
+from epwviz.compare import load_stores, monthly_means, summarize, summarize_stores
+from epwviz.degreedays import DegreeDayEngine
+from epwviz.store import EPWStore, SIDECAR_VERSION, has_sidecar
+
+SAMPLE = pathlib.Path(__file__).parents[1] / 'assets' / 'sample.epw'
+
+
+def _synthetic(timestep: int, is_leap_year: bool) -> str:
+    """Content of an EPW file of the sample location with a smooth dry bulb temperature.
+
+    The other fields of every row are the ones of the first row of the sample.
+    """
+    lines = SAMPLE.read_text().splitlines()
+    header, row = lines[:8], lines[8].split(',')
+    header[4] = 'HOLIDAYS/DAYLIGHT SAVINGS,{},0,0,0'.format('Yes' if is_leap_year else 'No')
+    header[7] = 'DATA PERIODS,1,{},Data,Sunday, 1/ 1,12/31'.format(timestep)
+    rows = []
+    for i, dt in enumerate(AnalysisPeriod(is_leap_year=is_leap_year).datetimes):
+        for step in range(timestep):
+            temperature = 20 + 10 * np.sin(2 * np.pi * (i * timestep + step) / 997)
+            rows.append(','.join(row[:1] + [str(dt.month), str(dt.day), str(dt.hour + 1),
+                                            str(60 * (step + 1) // timestep), row[5], f'{temperature:.1f}']
+                                 + row[7:]))
+    return '\n'.join(header + rows) + '\n'
+
+
+def _shifted(epw_bytes: bytes, delta: float) -> bytes:
+    """Content of an EPW file with delta added to its dry bulb temperature."""
+    lines = epw_bytes.decode().splitlines(True)
+    rows = [line.split(',') for line in lines[8:]]
+    return ''.join(lines[:8] + [','.join(row[:6] + [f'{float(row[6]) + delta:.1f}'] + row[7:])
+                                for row in rows]).encode()
+
+
+def _grouped_means(values, datetimes) -> np.ndarray:
+    """Mean of every month of values, grouped by their datetimes."""
+    months = np.array([dt.month for dt in datetimes])
+    values = np.asarray(values)
+    return np.array([values[months == month].mean() for month in range(1, 13)])
+
+
+@pytest.fixture(scope='module')
+def store():
+    return EPWStore.from_text(SAMPLE.read_text())
+
+
+@pytest.fixture(scope='module')
+def epw_bytes():
+    return SAMPLE.read_bytes()
+
+
+@pytest.mark.parametrize('field', ['dry_bulb_temperature', 'relative_humidity', 'wind_speed'])
+def test_monthly_means_match_ladybug(store, field):
+    data = getattr(EPW(str(SAMPLE)), field)
+    np.testing.assert_allclose(monthly_means(store, [field])[field], _grouped_means(data.values, data.datetimes))
+
+
+def test_leap_year_monthly_means_match_ladybug(tmp_path):
+    text = _synthetic(1, True)
+    epw_path = tmp_path / 'leap.epw'
+    epw_path.write_text(text)
+    data = EPW(str(epw_path)).dry_bulb_temperature
+    store = EPWStore.from_text(text)
+
+    assert store.is_leap_year and len(data) == 8784
+    np.testing.assert_allclose(monthly_means(store, ['dry_bulb_temperature'])['dry_bulb_temperature'],
+                               _grouped_means(data.values, data.datetimes))
+
+
+@pytest.mark.parametrize('timestep, is_leap_year', [(4, False), (2, True)])
+def test_subhourly_monthly_means_follow_the_datetimes(timestep, is_leap_year):
+    store = EPWStore.from_text(_synthetic(timestep, is_leap_year))
+    datetimes = AnalysisPeriod(timestep=timestep, is_leap_year=is_leap_year).datetimes
+
+    assert store.timestep == timestep
+    np.testing.assert_allclose(monthly_means(store, ['dry_bulb_temperature'])['dry_bulb_temperature'],
+                               _grouped_means(store.field('dry_bulb_temperature'), datetimes))
+
+
+def test_load_stores_keeps_the_order_of_the_files(tmp_path, epw_bytes):
+    files = [epw_bytes, _shifted(epw_bytes, 1.5), _shifted(epw_bytes, 3.0)]
+    stores = load_stores(files, tmp_path, workers=2)
+
+    assert all(has_sidecar(tmp_path, content_hash(file)) for file in files)
+    for store, delta in zip(stores, [0.0, 1.5, 3.0]):
+        np.testing.assert_allclose(store.field('dry_bulb_temperature'),
+                                   stores[0].field('dry_bulb_temperature') + delta, atol=1e-9)
+
+
+def test_load_stores_rebuilds_stale_sidecars(tmp_path, epw_bytes):
+    epw_hash = content_hash(epw_bytes)
+    load_stores([epw_bytes], tmp_path, workers=1)
+    header_path = tmp_path / f'{epw_hash}.json'
+    header = json.loads(header_path.read_text())
+    header['version'] = SIDECAR_VERSION - 1
+    header_path.write_text(json.dumps(header))
+    assert not has_sidecar(tmp_path, epw_hash)
+
+    store, = load_stores([epw_bytes], tmp_path, workers=1)
+    assert has_sidecar(tmp_path, epw_hash)
+    assert tuple(store.array[['month', 'day', 'hour']][0]) == (1, 1, 1)
+
+
+def test_summarize_stores_matches_summarize(store):
+    fields = list(FIELDS.values())
+    stores = [store, store]
+    summaries = summarize_stores(stores, fields, 18.0, 24.0, 8, 17, workers=2)
+    expected = summarize(store, fields, 18.0, 24.0, 8, 17)
+    degree_days = DegreeDayEngine.from_store(store, 8, 17).degree_days([18.0], [24.0])
+
+    assert len(summaries) == 2
+    for summary in summaries:
+        for column, means in expected.monthly_means.items():
+            np.testing.assert_array_equal(summary.monthly_means[column], means)
+        np.testing.assert_allclose(summary.heating, degree_days.monthly_heating[:, 0])
+        np.testing.assert_allclose(summary.cooling, degree_days.monthly_cooling[:, 0])
+        assert summary.ts_shares.sum() == pytest.approx(100)
+
+
+def test_comparison_analysis_deltas(tmp_path, epw_bytes):
+    stores = load_stores([epw_bytes, _shifted(epw_bytes, 1.5)], tmp_path, workers=1)
+    summaries = summarize_stores(stores, list(FIELDS.values()), 18.0, 24.0)
+    field = FIELDS['Dry Bulb Temperature']
+    result = comparison_analysis(['base.epw', 'plus.epw'], summaries, field,
+                                 stores[0].unit(field), 'C')
+
+    np.testing.assert_allclose(result['monthly_table'].loc['plus.epw'], 1.5, atol=0.01)
+    degree_days = result['degree_days_table']
+    assert degree_days.loc['base.epw', 'Δ HDD'] == 0 and degree_days.loc['base.epw', 'Δ CDD'] == 0
+    assert degree_days.loc['plus.epw', 'Δ HDD'] < 0 < degree_days.loc['plus.epw', 'Δ CDD']
+    assert list(result['ts_table'].index) == ['plus.epw']
@@ -0,0 +1,56 @@
+"""Parity of the sorted prefix sum degree days with ladybug_comfort degree time."""
+import pathlib
+
+import numpy as np
+import pytest
+from ladybug.analysisperiod import AnalysisPeriod
+from ladybug.datatype.temperaturetime import CoolingDegreeTime, HeatingDegreeTime
+from ladybug.epw import EPW
+from ladybug_comfort.degreetime import cooling_degree_time, heating_degree_time
+
+from epwviz.degreedays import DegreeDayEngine
+from epwviz.store import EPWStore
+
+SAMPLE = pathlib.Path(__file__).parents[1] / 'assets' / 'sample.epw'
+
+
+@pytest.fixture(scope='module')
+def epw():
+    return EPW(str(SAMPLE))
+
+
+@pytest.fixture(scope='module')
+def store():
+    return EPWStore.from_text(SAMPLE.read_text())
+
+
+def _ladybug_degree_days(data, function, data_type, base):
+    """Hourly degree days of a collection, computed like the dashboard used to."""
+    hourly = data.compute_function_aligned(function, [data, base], data_type, 'degC-hours')
+    hourly.convert_to_unit('degC-days')
+    return hourly
+
+
+def _monthly(data) -> np.ndarray:
+    """Total of every month of a collection, grouped by the datetimes of its values.
+
+    HourlyContinuousCollection.total_monthly is not used as the reference:
+    its months overlap, each one also counting the first hour of the next.
+    """
+    months = np.array([dt.month for dt in data.datetimes])
+    values = np.array(data.values)
+    return np.array([values[months == month].sum() for month in range(1, 13)])
+
+
+@pytest.mark.parametrize('st_hour, end_hour', [(0, 23), (8, 17), (22, 5)])
+def test_degree_days_match_ladybug(store, epw, st_hour, end_hour):
+    heat_base, cool_base = 18.0, 24.0
+    data = epw.dry_bulb_temperature.filter_by_analysis_period(AnalysisPeriod(1, 1, st_hour, 12, 31, end_hour))
+    degree_days = DegreeDayEngine.from_store(store, st_hour, end_hour).degree_days([heat_base], [cool_base])
+    heating = _ladybug_degree_days(data, heating_degree_time, HeatingDegreeTime(), heat_base)
+    cooling = _ladybug_degree_days(data, cooling_degree_time, CoolingDegreeTime(), cool_base)
+
+    np.testing.assert_allclose(degree_days.monthly_heating[:, 0], _monthly(heating), atol=1e-9)
+    np.testing.assert_allclose(degree_days.monthly_cooling[:, 0], _monthly(cooling), atol=1e-9)
+    np.testing.assert_allclose(degree_days.heating[0], heating.total)
+    np.testing.assert_allclose(degree_days.cooling[0], cooling.total)
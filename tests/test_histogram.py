@@ -0,0 +1,33 @@
+"""Binned distributions of EPW fields against pandas.cut and ladybug datetimes."""
+import pathlib
+
+import numpy as np
+import pandas as pd
+import pytest
+from ladybug.analysisperiod import AnalysisPeriod
+from ladybug.epw import EPW
+
+from epwviz.histogram import bin_edges, store_histogram
+from epwviz.store import EPWStore
+
+SAMPLE = pathlib.Path(__file__).parents[1] / 'assets' / 'sample.epw'
+
+
+def test_monthly_counts_match_ladybug_months():
+    store = EPWStore.from_text(SAMPLE.read_text())
+    data = EPW(str(SAMPLE)).dry_bulb_temperature
+    edges = bin_edges(0, 40, 2)
+    distribution = store_histogram(store, 'dry_bulb_temperature', AnalysisPeriod(), edges)
+
+    frame = pd.DataFrame({'month': [dt.month for dt in data.datetimes],
+                          'bin': pd.cut(data.values, edges, labels=False)})
+    expected = frame.dropna().groupby(['month', 'bin']).size().unstack(fill_value=0)
+    expected = expected.reindex(index=range(1, 13), columns=range(len(edges) - 1), fill_value=0)
+    np.testing.assert_array_equal(distribution.monthly, expected.to_numpy())
+    assert distribution.total == len(data)
+
+
+@pytest.mark.parametrize('low, high, step', [(40, 0, 2), (0, 40, 0), (0, 40, -1)])
+def test_invalid_bins_are_rejected(low, high, step):
+    with pytest.raises(ValueError):
+        bin_edges(low, high, step)
@@ -0,0 +1,60 @@
+"""Parity of the cached analysis period rows with ladybug AnalysisPeriod."""
+import numpy as np
+import pytest
+from ladybug.analysisperiod import AnalysisPeriod
+from ladybug.datacollection import HourlyContinuousCollection
+from ladybug.datatype.temperature import Temperature
+from ladybug.header import Header
+
+from epwviz.periods import filter_period, period_mask, period_rows, time_index
+
+PERIODS = [
+    (1, 1, 0, 12, 31, 23),
+    (1, 1, 8, 1, 2, 17),
+    (1, 1, 22, 1, 2, 2),
+    (12, 30, 0, 1, 2, 23),
+    (2, 28, 0, 3, 1, 0),
+    (3, 5, 0, 3, 9, 23),
+    (12, 31, 22, 1, 1, 3),
+    (6, 1, 10, 6, 1, 10),
+    (6, 1, 23, 6, 3, 23),
+    (6, 1, 0, 6, 3, 22),
+    (1, 20, 5, 1, 10, 20),
+    (12, 1, 23, 1, 31, 0),
+]
+
+
+@pytest.mark.parametrize('timestep', [1, 2, 4, 6])
+@pytest.mark.parametrize('is_leap_year', [False, True])
+@pytest.mark.parametrize('period', PERIODS)
+def test_period_rows_match_ladybug(period, timestep, is_leap_year):
+    ap = AnalysisPeriod(*period, timestep=timestep, is_leap_year=is_leap_year)
+    expected = np.round(np.array(ap.hoys) * timestep).astype(int)
+    np.testing.assert_array_equal(period_rows(period, timestep, is_leap_year), expected)
+
+    mask = period_mask(period, timestep, is_leap_year)
+    assert np.count_nonzero(mask) == len(expected)
+    assert mask[expected].all()
+
+
+@pytest.mark.parametrize('timestep', [1, 4])
+@pytest.mark.parametrize('is_leap_year', [False, True])
+def test_time_index_matches_ladybug(timestep, is_leap_year):
+    datetimes = AnalysisPeriod(timestep=timestep, is_leap_year=is_leap_year).datetimes
+    index = time_index(timestep, is_leap_year)
+    np.testing.assert_array_equal(index.month, [dt.month for dt in datetimes])
+    np.testing.assert_array_equal(index.day, [dt.day for dt in datetimes])
+    np.testing.assert_array_equal(index.hour, [dt.hour for dt in datetimes])
+
+
+@pytest.mark.parametrize('period', [(1, 1, 0, 12, 31, 23), (12, 30, 0, 1, 2, 23),
+                                    (1, 1, 8, 3, 2, 17), (12, 1, 22, 1, 31, 2)])
+def test_filter_period_matches_ladybug(period):
+    ap = AnalysisPeriod(timestep=4, is_leap_year=True)
+    values = np.random.default_rng(0).random(len(ap.hoys)).tolist()
+    data = HourlyContinuousCollection(Header(Temperature(), 'C', ap), values)
+    expected = data.filter_by_analysis_period(AnalysisPeriod(*period, timestep=4, is_leap_year=True))
+    filtered = filter_period(data, period)
+    assert type(filtered) is type(expected)
+    assert list(filtered.values) == list(expected.values)
+    assert [dt.moy for dt in filtered.datetimes] == [dt.moy for dt in expected.datetimes]
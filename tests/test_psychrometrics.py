@@ -0,0 +1,47 @@
+"""Parity of the array psychrometrics with ladybug.psychrometrics."""
+import pathlib
+
+import numpy as np
+import pytest
+from ladybug import psychrometrics as lb
+from ladybug.epw import EPW
+
+from epwviz.psychrometrics import (SEA_LEVEL_PRESSURE, TOLERANCE, psychrometrics, wet_bulb_from_db_rh,
+                                  wet_bulb_table)
+
+SAMPLE = pathlib.Path(__file__).parents[1] / 'assets' / 'sample.epw'
+
+
+@pytest.fixture(scope='module')
+def weather():
+    epw = EPW(str(SAMPLE))
+    return np.array(epw.dry_bulb_temperature.values), np.array(epw.relative_humidity.values)
+
+
+def test_solver_matches_ladybug(weather):
+    db_temp, rel_humid = weather
+    result = psychrometrics(db_temp, rel_humid)
+    np.testing.assert_allclose(result.humid_ratio,
+                               [lb.humid_ratio_from_db_rh(t, rh) for t, rh in zip(db_temp, rel_humid)])
+    np.testing.assert_allclose(result.dew_point,
+                               [lb.dew_point_from_db_rh(t, rh) for t, rh in zip(db_temp, rel_humid)])
+    np.testing.assert_allclose(result.wet_bulb,
+                               [lb.wet_bulb_from_db_rh(t, rh) for t, rh in zip(db_temp, rel_humid)],
+                               atol=TOLERANCE)
+
+
+def test_table_error_bounds():
+    rng = np.random.default_rng(0)
+    db_temp, rel_humid = rng.uniform(-20, 50, 100000), rng.uniform(0, 100, 100000)
+    solved = wet_bulb_from_db_rh(db_temp, rel_humid)
+    error = np.abs(wet_bulb_table()(db_temp, rel_humid) - solved)
+    # the wet bulb temperature of ladybug jumps around 0 C, between its ice and water formulas
+    assert error[np.abs(solved) >= 1].max() <= 0.05
+    assert error.max() <= 0.75
+
+
+def test_table_is_shared_whatever_the_call_form():
+    table = wet_bulb_table()
+    assert wet_bulb_table(SEA_LEVEL_PRESSURE) is table
+    assert wet_bulb_table(b_press=SEA_LEVEL_PRESSURE) is table
+    assert wet_bulb_table(int(SEA_LEVEL_PRESSURE)) is table
@@ -0,0 +1,62 @@
+"""Parity of the columnar EPW store with the ladybug EPW parser."""
+import json
+import pathlib
+
+import numpy as np
+import pytest
+from ladybug.epw import EPW
+
+from epwviz.store import EPWStore, SIDECAR_VERSION, has_sidecar
+
+SAMPLE = pathlib.Path(__file__).parents[1] / 'assets' / 'sample.epw'
+
+
+@pytest.fixture(scope='module')
+def epw():
+    return EPW(str(SAMPLE))
+
+
+@pytest.fixture(scope='module')
+def store():
+    return EPWStore.from_text(SAMPLE.read_text())
+
+
+def test_time_columns_match_the_file(store):
+    first, last = store.array[['month', 'day', 'hour']][[0, -1]]
+    assert tuple(first) == (1, 1, 1)
+    assert tuple(last) == (12, 31, 24)
+
+
+def test_months_and_hours_match_ladybug_datetimes(store, epw):
+    datetimes = epw.dry_bulb_temperature.datetimes
+    np.testing.assert_array_equal(store.months, [dt.month for dt in datetimes])
+    np.testing.assert_array_equal(store.hours, [dt.hour for dt in datetimes])
+    np.testing.assert_array_equal(store.array['month'], [dt.month for dt in datetimes])
+    np.testing.assert_array_equal(store.array['day'], [dt.day for dt in datetimes])
+
+
+@pytest.mark.parametrize('field', ['dry_bulb_temperature', 'relative_humidity', 'wind_speed',
+                                   'global_horizontal_radiation', 'total_sky_cover'])
+def test_fields_match_ladybug(store, epw, field):
+    np.testing.assert_allclose(store.field(field), getattr(epw, field).values)
+
+
+def test_ip_fields_match_ladybug(store, epw):
+    np.testing.assert_allclose(store.field('dry_bulb_temperature', 'IP'),
+                               epw.dry_bulb_temperature.to_ip().values)
+
+
+def test_stale_sidecar_is_rebuilt(tmp_path):
+    epw_bytes = SAMPLE.read_bytes()
+    EPWStore.open(epw_bytes, 'sample', tmp_path)
+    assert has_sidecar(tmp_path, 'sample')
+
+    header_path = tmp_path / 'sample.json'
+    header = json.loads(header_path.read_text())
+    header['version'] = SIDECAR_VERSION - 1
+    header_path.write_text(json.dumps(header))
+    assert not has_sidecar(tmp_path, 'sample')
+
+    store = EPWStore.open(epw_bytes, 'sample', tmp_path)
+    assert has_sidecar(tmp_path, 'sample')
+    assert tuple(store.array[['month', 'day', 'hour']][0]) == (1, 1, 1)
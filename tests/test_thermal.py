@@ -0,0 +1,58 @@
+"""Parity of the vectorized thermal sensation with ladybug_comfort."""
+import pathlib
+from collections import Counter
+
+import numpy as np
+import pytest
+from ladybug.epw import EPW
+from ladybug_comfort import ts
+
+from epwviz.store import EPWStore
+from epwviz.thermal import CATEGORIES, DEFAULT_GROUND_TEMPERATURE, store_thermal_sensation
+
+SAMPLE = pathlib.Path(__file__).parents[1] / 'assets' / 'sample.epw'
+
+
+@pytest.fixture(scope='module')
+def expected():
+    """Category of every hour computed by ladybug_comfort, with its ladybug datetime."""
+    epw = EPW(str(SAMPLE))
+    categories = [
+        ts.thermal_sensation_effect_category(ts.thermal_sensation(
+            ta, ws, rh, sr, DEFAULT_GROUND_TEMPERATURE))
+        for ta, ws, rh, sr in zip(epw.dry_bulb_temperature.values, epw.wind_speed.values,
+                                  epw.relative_humidity.values, epw.global_horizontal_radiation.values)]
+    return categories, epw.dry_bulb_temperature.datetimes
+
+
+@pytest.fixture(scope='module')
+def result():
+    return store_thermal_sensation(EPWStore.from_text(SAMPLE.read_text()))
+
+
+def _shares(categories) -> list:
+    counts = Counter(categories)
+    return [round(counts[category] / len(categories) * 100, 2) for category in range(-3, 4)]
+
+
+def test_categories_match_ladybug(result, expected):
+    np.testing.assert_array_equal(result.categories, expected[0])
+
+
+def test_annual_shares_match_ladybug(result, expected):
+    assert list(result.shares) == list(CATEGORIES)
+    np.testing.assert_allclose(list(result.shares.values()), _shares(expected[0]))
+
+
+def test_monthly_shares_match_ladybug(result, expected):
+    categories, datetimes = expected
+    for month in range(1, 13):
+        month_categories = [c for c, dt in zip(categories, datetimes) if dt.month == month]
+        np.testing.assert_allclose(result.monthly[month - 1], _shares(month_categories))
+
+
+def test_hourly_shares_match_ladybug(result, expected):
+    categories, datetimes = expected
+    for hour in range(24):
+        hour_categories = [c for c, dt in zip(categories, datetimes) if dt.hour == hour]
+        np.testing.assert_allclose(result.hourly[hour], _shares(hour_categories))